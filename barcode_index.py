@@ -0,0 +1,70 @@
+from database import *
+
+class BarcodeIndex:
+    """Índice em memória código de barras -> produto, usado pelo leitor do caixa"""
+
+    def __init__(self):
+        self._by_barcode = {}   # barcode -> (id, nome, preço, estoque)
+        self._barcode_by_id = {}
+
+    def __len__(self):
+        return len(self._by_barcode)
+
+    def load(self, products):
+        """Reconstrói o índice a partir de linhas completas da tabela products"""
+        # Monta dicionários novos e troca no fim: leituras em andamento na thread
+        # do Tk nunca veem o índice pela metade
+        by_barcode, barcode_by_id = {}, {}
+        for product in products:
+            if product[8]:
+                by_barcode[product[8]] = (product[0], product[1], product[4], product[5])
+                barcode_by_id[product[0]] = product[8]
+        self._by_barcode, self._barcode_by_id = by_barcode, barcode_by_id
+
+    def load_from_db(self, conn):
+        """Reconstrói o índice com todos os produtos que têm código de barras"""
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM products WHERE barcode IS NOT NULL AND barcode <> ''")
+            self.load(cursor.fetchall())
+        except Error as e:
+            print(e)
+
+    def update(self, product):
+        """Indexa (ou reindexa) uma linha da tabela products"""
+        product_id, barcode = product[0], product[8]
+        old_barcode = self._barcode_by_id.pop(product_id, None)
+        if old_barcode is not None:
+            self._by_barcode.pop(old_barcode, None)
+        if barcode:
+            self._by_barcode[barcode] = (product_id, product[1], product[4], product[5])
+            self._barcode_by_id[product_id] = barcode
+
+    def remove(self, product_id):
+        """Retira um produto do índice"""
+        barcode = self._barcode_by_id.pop(product_id, None)
+        if barcode is not None:
+            self._by_barcode.pop(barcode, None)
+
+    def invalidate(self, conn, product_ids):
+        """Relê do banco apenas os produtos informados (alterados ou vendidos)"""
+        product_ids = [int(product_id) for product_id in product_ids]
+        if not product_ids:
+            return
+        try:
+            cursor = conn.cursor()
+            placeholders = ",".join("?" * len(product_ids))
+            cursor.execute(f"SELECT * FROM products WHERE id IN ({placeholders})", product_ids)
+            found = set()
+            for product in cursor.fetchall():
+                self.update(product)
+                found.add(product[0])
+            for product_id in product_ids:
+                if product_id not in found:
+                    self.remove(product_id)
+        except Error as e:
+            print(e)
+
+    def lookup(self, barcode):
+        """Retorna (id, nome, preço, estoque) do código lido, ou None"""
+        return self._by_barcode.get(barcode)
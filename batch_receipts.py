@@ -0,0 +1,122 @@
+import argparse
+import io
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from database import *
+from receipts import build_receipt_data, renderer
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:
+    # Só --merge precisa do pypdf (requirements.txt); sem ele main() recusa a opção
+    PdfWriter = None
+
+# Notas por tarefa enviada a um processo
+DEFAULT_CHUNK_SIZE = 50
+
+def receipt_file_name(sale_id):
+    return f"NotaFiscal_{sale_id}.pdf"
+
+def write_receipts(chunk, output_dir):
+    """Tarefa do processo: grava um PDF por nota do lote e devolve quantas gravou"""
+    for receipt_data in chunk:
+        path = os.path.join(output_dir, receipt_file_name(receipt_data['sale_id']))
+        with open(path, "wb") as f:
+            f.write(renderer.render(receipt_data))
+    return len(chunk)
+
+def render_chunk(chunk):
+    """Tarefa do processo: devolve (notas do lote, PDF com todas elas)"""
+    return len(chunk), renderer.render_many(chunk)
+
+def iter_receipts(conn, first_id=None, last_id=None):
+    """Dados das notas do intervalo de ids, lidos do banco em lotes"""
+    cashiers = {user[0]: user[3] for user in get_all_users(conn)}
+    for sale, items in iter_sales_with_items(conn, first_id, last_id):
+        yield build_receipt_data(sale, items, cashiers.get(sale[8], ""))
+
+def iter_chunks(receipts, chunk_size):
+    chunk = []
+    for receipt_data in receipts:
+        chunk.append(receipt_data)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def run_bounded(executor, func, chunks, max_pending, *args):
+    """Gera os resultados na ordem dos lotes, com no máximo max_pending lotes em andamento
+
+    A leitura do banco só avança quando um lote termina, então a memória fica
+    limitada a alguns lotes mesmo em intervalos com milhares de vendas.
+    """
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(func, chunk, *args))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def export_files(conn, first_id, last_id, output_dir, workers, chunk_size):
+    """Gera um PDF por venda em output_dir; devolve o número de notas"""
+    os.makedirs(output_dir, exist_ok=True)
+    chunks = iter_chunks(iter_receipts(conn, first_id, last_id), chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return sum(run_bounded(executor, write_receipts, chunks, workers * 2, output_dir))
+
+def export_merged(conn, first_id, last_id, output_path, workers, chunk_size):
+    """Gera um único PDF com todas as notas do intervalo; devolve o número de notas"""
+    count = 0
+    writer = PdfWriter()
+    chunks = iter_chunks(iter_receipts(conn, first_id, last_id), chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Conta notas, não páginas: uma nota com muitos itens ocupa mais de uma página
+        for receipts, data in run_bounded(executor, render_chunk, chunks, workers * 2):
+            count += receipts
+            writer.append(PdfReader(io.BytesIO(data)))
+    with open(output_path, "wb") as f:
+        writer.write(f)
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera em lote os PDFs das notas fiscais de um intervalo de vendas")
+    parser.add_argument("--db", default=DATABASE_FILE, help="arquivo do banco de dados")
+    parser.add_argument("--first", type=int, help="primeiro id de venda")
+    parser.add_argument("--last", type=int, help="último id de venda")
+    parser.add_argument("--day", help="usa o intervalo de ids das vendas do dia (AAAA-MM-DD)")
+    parser.add_argument("--output", default="notas", help="pasta das notas ou, com --merge, arquivo PDF")
+    parser.add_argument("--merge", action="store_true", help="gera um único PDF com todas as notas")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processos em paralelo")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="notas por tarefa")
+    args = parser.parse_args()
+    if args.merge and PdfWriter is None:
+        parser.error("--merge precisa do pypdf para juntar os PDFs dos processos (pip install -r requirements.txt)")
+
+    configure_database(args.db)
+    initialize_database()
+
+    with pooled_connection() as conn:
+        first_id, last_id = args.first, args.last
+        if args.day:
+            first_id, last_id = get_sale_id_range(conn, start_date=args.day, end_date=args.day)
+            if first_id is None:
+                print(f"Nenhuma venda em {args.day}")
+                close_all_connections()
+                return
+
+        started = time.perf_counter()
+        if args.merge:
+            count = export_merged(conn, first_id, last_id, args.output, args.workers, args.chunk_size)
+        else:
+            count = export_files(conn, first_id, last_id, args.output, args.workers, args.chunk_size)
+        elapsed = time.perf_counter() - started
+
+    print(f"{count} notas geradas em {elapsed:.2f}s ({count / elapsed if elapsed else 0:.1f} notas/s) -> {args.output}")
+    close_all_connections()
+
+if __name__ == "__main__":
+    main()
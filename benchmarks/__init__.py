@@ -0,0 +1,8 @@
+"""Benchmarks sem interface gráfica
+
+python -m benchmarks.datagen         gera um banco sintético de loja grande
+python -m benchmarks.run             mede os cenários e grava o resultado em JSON
+python -m benchmarks.load_test       vários caixas simultâneos no mesmo banco
+python -m benchmarks.bench_receipts  notas fiscais por segundo
+python -m benchmarks.bench_startup   tempo até a tela de login
+"""
@@ -0,0 +1,117 @@
+"""Micro-benchmark da geração de notas fiscais: notas por segundo antes e depois do ReceiptRenderer
+
+Uso: python benchmarks/bench_receipts.py [--count 300] [--items 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fpdf import FPDF
+from money import Money
+from receipts import ReceiptRenderer
+
+def legacy_create_pdf(receipt_data, file_path):
+    """Implementação anterior (um FPDF montado do zero, com fonte "Arial" e ln posicional)"""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 10, "NOTA FISCAL", 0, 1, 'C')
+    pdf.set_font("Arial", size=12)
+    pdf.cell(0, 10, f"Nº: {receipt_data['sale_id']}", 0, 1)
+    pdf.cell(0, 10, f"Data: {receipt_data['date']}", 0, 1)
+    pdf.ln(5)
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(0, 10, "CLIENTE:", 0, 1)
+    pdf.set_font("Arial", size=12)
+    pdf.cell(0, 10, receipt_data['customer_name'], 0, 1)
+    if receipt_data['customer_doc']:
+        pdf.cell(0, 10, f"CPF/CNPJ: {receipt_data['customer_doc']}", 0, 1)
+    pdf.ln(5)
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(0, 10, "ITENS", 0, 1)
+    pdf.set_font("Arial", size=10)
+    pdf.cell(100, 10, "Descrição", 1)
+    pdf.cell(20, 10, "Qtd", 1, 0, 'C')
+    pdf.cell(30, 10, "Unit. (R$)", 1, 0, 'R')
+    pdf.cell(30, 10, "Total (R$)", 1, 0, 'R')
+    pdf.ln()
+    for item in receipt_data['items']:
+        pdf.cell(100, 10, item['name'], 1)
+        pdf.cell(20, 10, str(item['quantity']), 1, 0, 'C')
+        pdf.cell(30, 10, f"{item['unit_price']:.2f}", 1, 0, 'R')
+        pdf.cell(30, 10, f"{item['total_price']:.2f}", 1, 0, 'R')
+        pdf.ln()
+    pdf.set_font("Arial", size=12)
+    pdf.cell(150, 10, "Subtotal:", 0, 0, 'R')
+    pdf.cell(30, 10, f"R$ {receipt_data['subtotal']:.2f}", 0, 1, 'R')
+    pdf.cell(150, 10, "Desconto:", 0, 0, 'R')
+    pdf.cell(30, 10, f"R$ {receipt_data['discount']:.2f}", 0, 1, 'R')
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(150, 10, "TOTAL:", 0, 0, 'R')
+    pdf.cell(30, 10, f"R$ {receipt_data['total']:.2f}", 0, 1, 'R')
+    pdf.ln(10)
+    pdf.set_font("Arial", size=12)
+    pdf.cell(0, 10, f"Forma de Pagamento: {receipt_data['payment_method']}", 0, 1)
+    pdf.cell(0, 10, f"Atendente: {receipt_data['cashier']}", 0, 1)
+    pdf.set_y(-15)
+    pdf.set_font("Arial", 'I', 8)
+    pdf.cell(0, 10, "Sistema de Gerenciamento de Estoque", 0, 0, 'C')
+    pdf.output(file_path)
+
+def sample_receipt(sale_id, item_count):
+    items = []
+    for i in range(1, item_count + 1):
+        price = Money(199 + i * 37)
+        items.append({"name": f"Produto de teste {i}", "quantity": i,
+                      "unit_price": price, "total_price": i * price})
+    subtotal = sum(item["total_price"] for item in items)
+    discount = Money(150)
+    return {
+        "sale_id": sale_id,
+        "date": "2026-01-15 10:30:00",
+        "customer_name": "Cliente de Teste",
+        "customer_doc": "123.456.789-00",
+        "subtotal": subtotal,
+        "discount": discount,
+        "total": subtotal - discount,
+        "payment_method": "Cartão de Crédito",
+        "cashier": "Administrador",
+        "items": items
+    }
+
+def measure(label, func, count, item_count):
+    func(sample_receipt(0, item_count))  # aquecimento
+    started = time.perf_counter()
+    for sale_id in range(1, count + 1):
+        func(sample_receipt(sale_id, item_count))
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed
+    print(f"{label:<28} {rate:>8.1f} notas/s  ({elapsed * 1000 / count:.2f} ms por nota)")
+    return rate
+
+def main():
+    parser = argparse.ArgumentParser(description="Notas fiscais por segundo antes e depois do ReceiptRenderer")
+    parser.add_argument("--count", type=int, default=300, help="notas geradas em cada medição")
+    parser.add_argument("--items", type=int, default=8, help="itens por nota")
+    args = parser.parse_args()
+
+    renderer = ReceiptRenderer()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "nota.pdf")
+
+        def renderer_to_file(receipt_data):
+            with open(path, "wb") as f:
+                f.write(renderer.render(receipt_data))
+
+        before = measure("antes (create_pdf antigo)", lambda data: legacy_create_pdf(data, path), args.count, args.items)
+        after = measure("depois (arquivo)", renderer_to_file, args.count, args.items)
+        measure("depois (só bytes)", renderer.render, args.count, args.items)
+    print(f"Ganho: {after / before:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Tempo de inicialização até a tela de login, antes e depois do carregamento adiado
+
+Cada medição é um processo Python novo que faz as importações de main.py e
+initialize_database() sobre uma cópia do banco, como o sistema ao abrir (a
+janela em si não é criada, para rodar sem monitor). "antes" importa também
+menu_interface e catalog_cache, como o main.py antigo fazia no início.
+
+Uso: python -m benchmarks.bench_startup [--runs 10] [--db users.db]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = (
+    ("antes (menu_interface no início)", "import main, menu_interface, catalog_cache"),
+    ("depois (só a tela de login)", "import main"),
+)
+
+MEASURE = """
+import time
+started = time.perf_counter()
+{imports}
+imported = time.perf_counter()
+main.initialize_database()
+print((imported - started) * 1000, (time.perf_counter() - imported) * 1000)
+"""
+
+def measure(code, directory, env):
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", code], cwd=directory, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    total = (time.perf_counter() - started) * 1000
+    imports, database = (float(value) for value in output.split()[-2:])
+    return total, imports, database
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de inicialização antes e depois do carregamento adiado")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--db", default=os.path.join(ROOT, "users.db"), help="banco copiado para as medições")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    with tempfile.TemporaryDirectory() as directory:
+        # initialize_database usa users.db na pasta atual: trabalha sobre uma cópia
+        if os.path.exists(args.db):
+            shutil.copy(args.db, os.path.join(directory, "users.db"))
+        # Primeira execução migra a cópia e aquece o cache de bytecode
+        for _, imports in SCENARIOS:
+            measure(MEASURE.format(imports=imports), directory, env)
+
+        print(f"{'cenário':<36}{'processo':>10}{'importações':>13}{'banco':>8}")
+        for label, imports in SCENARIOS:
+            results = [measure(MEASURE.format(imports=imports), directory, env) for _ in range(args.runs)]
+            total, imported, database = (statistics.median(column) for column in zip(*results))
+            print(f"{label:<36}{total:>8.0f}ms{imported:>11.0f}ms{database:>6.1f}ms")
+
+if __name__ == "__main__":
+    main()
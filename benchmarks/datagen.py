@@ -0,0 +1,191 @@
+"""Gerador determinístico de um banco sintético de loja grande
+
+A mesma semente e os mesmos tamanhos produzem sempre o mesmo banco, então os
+resultados de benchmarks.run são comparáveis entre execuções e máquinas.
+
+Uso: python -m benchmarks.datagen bench.db [--products 1000000] [--sales 2000000] [--users 300]
+"""
+import argparse
+import os
+import random
+import time
+from array import array
+from datetime import datetime, timedelta
+from database import *
+from database import _create_change_tracking, _create_products_fts, _create_sales_summaries, _rebuild_sales_summaries
+
+# Vocabulário dos nomes de produtos (com acentos, como no cadastro real)
+PRODUCT_TYPES = [
+    "Arroz", "Feijão", "Açúcar", "Café", "Leite", "Óleo", "Macarrão", "Farinha", "Biscoito", "Sabão",
+    "Detergente", "Shampoo", "Sabonete", "Papel Higiênico", "Refrigerante", "Suco", "Água", "Cerveja",
+    "Chocolate", "Molho de Tomate", "Queijo", "Presunto", "Manteiga", "Iogurte", "Pão", "Bolacha",
+    "Amaciante", "Desinfetante", "Esponja", "Creme Dental", "Vinagre", "Sal", "Milho", "Ervilha",
+    "Atum", "Sardinha", "Granola", "Aveia", "Achocolatado", "Gelatina",
+]
+BRANDS = [
+    "Bom Sabor", "Da Fazenda", "Tio João", "Vale Verde", "Estrela", "Primor", "Qualitá", "Nobre",
+    "Sol Nascente", "Campo Belo", "Boa Vista", "Santa Clara", "Real", "Imperial", "União", "Ouro Fino",
+]
+VARIANTS = [
+    "Tradicional", "Integral", "Light", "Zero", "Premium", "Extra", "Orgânico", "Diet",
+    "Família", "Econômico", "Original", "Especial",
+]
+SIZES = ["100g", "200g", "500g", "1kg", "2kg", "5kg", "350ml", "500ml", "1L", "2L", "12un", "4un"]
+CATEGORIES = [f"Categoria {n:02d}" for n in range(1, 41)]
+SUPPLIERS = [f"Fornecedor {n:03d}" for n in range(1, 201)]
+PAYMENT_METHODS = ["Dinheiro", "Cartão de Crédito", "Cartão de Débito", "PIX"]
+
+# Vendas distribuídas a partir desta data (fixa, para o banco não depender do dia em que é gerado)
+FIRST_SALE_DATE = datetime(2024, 1, 1, 8, 0, 0)
+SALES_PER_DAY = 2000
+
+BATCH_SIZE = 10000
+
+def product_name(rng):
+    return f"{rng.choice(PRODUCT_TYPES)} {rng.choice(BRANDS)} {rng.choice(VARIANTS)} {rng.choice(SIZES)}"
+
+def barcode_for(product_id):
+    return f"789{product_id:010d}"
+
+def username_for(number):
+    return f"caixa{number:03d}"
+
+def password_for(number):
+    return f"senha{number:03d}"
+
+def generate_users(conn, rng, count):
+    """Cria count atendentes (caixa001/senha001, ...); devolve os ids"""
+    rows = [(username_for(n), password_for(n), f"Atendente {n:03d}", f"{username_for(n)}@loja.com", int(n <= 5))
+            for n in range(1, count + 1)]
+    with transaction(conn):
+        conn.executemany("INSERT INTO users(username, password, full_name, email, is_admin) VALUES(?,?,?,?,?)", rows)
+    return [row[0] for row in conn.execute("SELECT id FROM users ORDER BY id")]
+
+def generate_products(conn, rng, count, progress):
+    """Cria count produtos; devolve os preços em centavos indexados pelo id"""
+    prices = array('q', [0])
+    created = 0
+    while created < count:
+        size = min(BATCH_SIZE, count - created)
+        rows = []
+        for product_id in range(created + 1, created + size + 1):
+            price = rng.randint(99, 49999)
+            prices.append(price)
+            rows.append((product_id, product_name(rng), f"Produto sintético {product_id}",
+                         rng.choice(CATEGORIES), price, rng.randint(0, 500), rng.randint(0, 20),
+                         rng.choice(SUPPLIERS), barcode_for(product_id)))
+        with transaction(conn):
+            conn.executemany("""
+                INSERT INTO products(id, name, description, category, price, quantity, min_quantity, supplier, barcode)
+                VALUES(?,?,?,?,?,?,?,?,?)
+            """, rows)
+        created += size
+        progress("produtos", created, count)
+    return prices
+
+def generate_sales(conn, rng, count, user_ids, prices, max_items, progress):
+    """Cria count vendas com 1 a max_items itens cada; devolve o número de itens"""
+    product_count = len(prices) - 1
+    item_total = 0
+    sale_id = 0
+    seconds_per_sale = 86400 / SALES_PER_DAY
+    while sale_id < count:
+        size = min(BATCH_SIZE, count - sale_id)
+        sales = []
+        items = []
+        for sale_id in range(sale_id + 1, sale_id + size + 1):
+            sale_date = FIRST_SALE_DATE + timedelta(seconds=int(sale_id * seconds_per_sale))
+            subtotal = 0
+            for _ in range(rng.randint(1, max_items)):
+                # Poucos produtos concentram a maior parte das vendas, como numa loja real
+                product_id = 1 + int(product_count * rng.random() ** 3)
+                quantity = rng.randint(1, 5)
+                total_price = quantity * prices[product_id]
+                subtotal += total_price
+                items.append((sale_id, product_id, quantity, prices[product_id], total_price))
+            discount = subtotal // 20 if rng.random() < 0.1 else 0
+            customer = rng.randint(1, 50000)
+            sales.append((sale_id, sale_date.strftime("%Y-%m-%d %H:%M:%S"), f"Cliente {customer}",
+                          f"{customer:011d}" if rng.random() < 0.3 else "", subtotal, discount,
+                          subtotal - discount, rng.choice(PAYMENT_METHODS), rng.choice(user_ids)))
+        with transaction(conn):
+            conn.executemany("""
+                INSERT INTO sales(id, sale_date, customer_name, customer_doc, subtotal, discount, total, payment_method, user_id)
+                VALUES(?,?,?,?,?,?,?,?,?)
+            """, sales)
+            conn.executemany("""
+                INSERT INTO sale_items(sale_id, product_id, quantity, unit_price, total_price)
+                VALUES(?,?,?,?,?)
+            """, items)
+        item_total += len(items)
+        progress("vendas", sale_id, count)
+    return item_total
+
+# Gatilhos que atualizam índices derivados linha a linha; na carga em massa eles
+# são removidos e os dados derivados são reconstruídos de uma vez no final
+BULK_LOAD_TRIGGERS = (
+    "products_fts_ai", "products_version_insert",
+    "sales_summary_insert", "sale_items_summary_insert",
+)
+
+def begin_bulk_load(conn):
+    with transaction(conn):
+        for trigger in BULK_LOAD_TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+def finish_bulk_load(conn):
+    """Recria os gatilhos e reconstrói FTS, row_versions e resumos de vendas"""
+    with transaction(conn):
+        _create_products_fts(conn)   # recria o gatilho e reconstrói o índice
+        _create_change_tracking(conn)
+        conn.execute("""
+            INSERT OR REPLACE INTO row_versions(table_name, row_id, version, deleted)
+            SELECT 'products', id, id, 0 FROM products
+        """)
+        _create_sales_summaries(conn)
+        _rebuild_sales_summaries(conn)
+
+def generate(path, products=1000000, sales=2000000, users=300, max_items=9, seed=42, verbose=True):
+    """Cria em path um banco novo com os tamanhos pedidos (em média 5 itens por venda)"""
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} já existe; escolha outro arquivo ou apague-o")
+    
+    started = time.perf_counter()
+    
+    def progress(label, done, total):
+        if verbose and (done == total or done % (BATCH_SIZE * 10) == 0):
+            print(f"  {label}: {done}/{total} ({time.perf_counter() - started:.0f}s)")
+    
+    # Carga em massa: sem fsync a cada transação (o banco é descartável)
+    configure_database(path, synchronous='OFF')
+    initialize_database()
+    rng = random.Random(seed)
+    with pooled_connection() as conn:
+        user_ids = generate_users(conn, rng, users)
+        begin_bulk_load(conn)
+        prices = generate_products(conn, rng, products, progress)
+        item_count = generate_sales(conn, rng, sales, user_ids, prices, max_items, progress)
+        if verbose:
+            print("  reconstruindo índice de busca e resumos...")
+        finish_bulk_load(conn)
+        conn.execute("ANALYZE")
+    close_all_connections()
+    
+    if verbose:
+        print(f"{products} produtos, {sales} vendas, {item_count} itens e {len(user_ids)} usuários "
+              f"em {time.perf_counter() - started:.0f}s -> {path}")
+    return item_count
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um banco sintético de loja grande para os benchmarks")
+    parser.add_argument("path", help="arquivo do banco a criar")
+    parser.add_argument("--products", type=int, default=1000000)
+    parser.add_argument("--sales", type=int, default=2000000, help="vendas (cerca de 5 itens cada)")
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--max-items", type=int, default=9, help="máximo de itens por venda")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    generate(args.path, args.products, args.sales, args.users, args.max_items, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Teste de carga com vários caixas simultâneos sobre o mesmo arquivo de banco
+
+Cada caixa repete o ciclo de um atendimento: pesquisa produtos, passa os itens
+no leitor de código de barras, monta o carrinho e grava a venda (write_sale,
+a mesma transação de record_sale). Gravações recusadas por bloqueio ("database
+is locked") são contadas e tentadas de novo com espera exponencial.
+
+Uso:
+    python -m benchmarks.load_test bench.db --cashiers 1,2,4,8 --duration 30
+    python -m benchmarks.load_test bench.db --mode process --busy-timeout 0 --output carga.json
+
+Use um banco de teste (benchmarks.datagen): as vendas são gravadas de verdade.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from database import *
+from cart import Cart
+from benchmarks.datagen import BRANDS, PAYMENT_METHODS, PRODUCT_TYPES, barcode_for
+from benchmarks.run import Context, summarize
+
+OPERATIONS = ("search", "scan", "sale", "lookup")
+
+class SessionStats:
+    """Latências e contadores de um caixa"""
+
+    def __init__(self):
+        self.latencies = {operation: [] for operation in OPERATIONS}
+        self.sales = 0
+        self.write_attempts = 0
+        self.locked_errors = 0
+        self.retries = 0
+        self.failed_sales = 0          # desistiu após max_retries ou erro que não é de bloqueio
+        self.insufficient_stock = 0
+
+    def merge(self, other):
+        for operation in OPERATIONS:
+            self.latencies[operation].extend(other.latencies[operation])
+        for name in ("sales", "write_attempts", "locked_errors", "retries", "failed_sales", "insufficient_stock"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def timed(self, operation, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        self.latencies[operation].append(time.perf_counter() - started)
+        return result
+
+def finalize_sale(conn, stats, rng, header, items, max_retries, backoff):
+    """Grava a venda com novas tentativas em caso de bloqueio; a latência inclui as esperas"""
+    started = time.perf_counter()
+    for attempt in range(max_retries + 1):
+        stats.write_attempts += 1
+        try:
+            sale_id, failed = write_sale(conn, header, items)
+        except Error as e:
+            if is_busy_error(e) and attempt < max_retries:
+                stats.locked_errors += 1
+                stats.retries += 1
+                # Espera exponencial com variação, para os caixas não tentarem juntos de novo
+                time.sleep(backoff * (2 ** attempt) * (0.5 + rng.random()))
+                continue
+            if is_busy_error(e):
+                stats.locked_errors += 1
+            stats.failed_sales += 1
+            break
+        if sale_id is None:
+            stats.insufficient_stock += 1
+        else:
+            stats.sales += 1
+        break
+    stats.latencies["sale"].append(time.perf_counter() - started)
+
+def cashier_session(conn, number, ctx, deadline, seed, options):
+    """Atendimentos em sequência até deadline (time.time()); devolve SessionStats"""
+    rng = random.Random(seed * 1000 + number)
+    stats = SessionStats()
+    user_id = ctx.user_ids[number % len(ctx.user_ids)]
+    think = options["think_ms"] / 1000
+
+    while time.time() < deadline:
+        cart = Cart()
+        for _ in range(rng.randint(0, 2)):
+            term = rng.choice(PRODUCT_TYPES)[:rng.randint(3, 6)] if rng.random() < 0.6 else \
+                f"{rng.choice(PRODUCT_TYPES)} {rng.choice(BRANDS).split()[0]}"
+            stats.timed("search", search_products, conn, term)
+            time.sleep(think)
+
+        for _ in range(rng.randint(1, 8)):
+            # Mesma distribuição das vendas geradas: poucos produtos concentram os itens
+            product_id = 1 + int(ctx.product_count * rng.random() ** 3)
+            product = stats.timed("scan", get_product_by_barcode, conn, barcode_for(product_id))
+            if product:
+                cart.add(product[0], product[1], product[4], rng.randint(1, 3))
+            time.sleep(think)
+
+        if len(cart):
+            header = {
+                "customer_name": "Cliente Carga",
+                "customer_doc": "",
+                "subtotal": cart.subtotal,
+                "discount": Money(0),
+                "total": cart.subtotal,
+                "payment_method": rng.choice(PAYMENT_METHODS),
+                "user_id": user_id,
+            }
+            finalize_sale(conn, stats, rng, header, cart.sale_items(), options["max_retries"], options["backoff"])
+
+        if rng.random() < 0.05:
+            # Reimpressão de uma nota antiga
+            stats.timed("lookup", get_sale_by_id, conn, rng.randint(1, max(1, ctx.sale_count)))
+        time.sleep(think)
+    return stats
+
+def thread_cashier(number, ctx, deadline, seed, options):
+    with pooled_connection() as conn:
+        return cashier_session(conn, number, ctx, deadline, seed, options)
+
+def process_cashier(path, pool_options, number, ctx, deadline, seed, options):
+    # Cada processo abre o próprio pool, como um terminal separado
+    configure_database(path, **pool_options)
+    try:
+        return thread_cashier(number, ctx, deadline, seed, options)
+    finally:
+        close_all_connections()
+
+def run_load(path, cashiers, mode, duration, seed, pool_options, options):
+    """Executa cashiers caixas simultâneos por duration segundos; devolve o resumo"""
+    configure_database(path, **pool_options)
+    with pooled_connection() as conn:
+        ctx = Context(conn)
+
+    # Todos começam juntos e param no mesmo instante
+    started = time.time()
+    deadline = started + duration
+    if mode == "thread":
+        with ThreadPoolExecutor(max_workers=cashiers) as executor:
+            futures = [executor.submit(thread_cashier, number, ctx, deadline, seed, options)
+                       for number in range(cashiers)]
+            results = [future.result() for future in futures]
+    else:
+        with ProcessPoolExecutor(max_workers=cashiers) as executor:
+            futures = [executor.submit(process_cashier, path, pool_options, number, ctx, deadline, seed, options)
+                       for number in range(cashiers)]
+            results = [future.result() for future in futures]
+    elapsed = time.time() - started
+    close_all_connections()
+
+    total = SessionStats()
+    for stats in results:
+        total.merge(stats)
+
+    operations = {}
+    for operation in OPERATIONS:
+        latencies = total.latencies[operation]
+        if latencies:
+            summary = summarize(latencies)
+            summary["throughput_per_s"] = round(len(latencies) / elapsed, 1)
+            operations[operation] = summary
+    return {
+        "cashiers": cashiers,
+        "mode": mode,
+        "elapsed_s": round(elapsed, 2),
+        "sales": total.sales,
+        "sales_per_s": round(total.sales / elapsed, 1),
+        "write_attempts": total.write_attempts,
+        "locked_errors": total.locked_errors,
+        "locked_error_rate": round(total.locked_errors / total.write_attempts, 4) if total.write_attempts else 0.0,
+        "retries": total.retries,
+        "failed_sales": total.failed_sales,
+        "insufficient_stock": total.insufficient_stock,
+        "operations": operations,
+    }
+
+def print_run(result):
+    print(f"\n{result['cashiers']} caixa(s) ({result['mode']}), {result['elapsed_s']}s: "
+          f"{result['sales']} vendas ({result['sales_per_s']}/s)")
+    print(f"  bloqueios: {result['locked_errors']} em {result['write_attempts']} tentativas "
+          f"({result['locked_error_rate']:.2%}), novas tentativas: {result['retries']}, "
+          f"desistências: {result['failed_sales']}, sem estoque: {result['insufficient_stock']}")
+    print(f"  {'operação':<10}{'ops/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for operation, stats in result["operations"].items():
+        print(f"  {operation:<10}{stats['throughput_per_s']:>10.1f}{stats['median_ms']:>8.2f}ms"
+              f"{stats['p95_ms']:>8.2f}ms{stats['p99_ms']:>8.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simula vários caixas gravando vendas no mesmo banco")
+    parser.add_argument("database", help="banco de teste (criado por benchmarks.datagen)")
+    parser.add_argument("--cashiers", default="1,2,4,8", help="quantidades de caixas a testar, separadas por vírgula")
+    parser.add_argument("--mode", choices=("thread", "process"), default="thread",
+                        help="caixas como threads de um processo ou como processos separados")
+    parser.add_argument("--duration", type=float, default=20.0, help="segundos por rodada")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pausa do operador entre ações (ms)")
+    parser.add_argument("--max-retries", type=int, default=5, help="novas tentativas de uma venda bloqueada")
+    parser.add_argument("--backoff", type=float, default=0.01, help="espera inicial entre tentativas (s)")
+    parser.add_argument("--busy-timeout", type=int, default=5000, help="PRAGMA busy_timeout (ms)")
+    parser.add_argument("--journal-mode", default="WAL", help="PRAGMA journal_mode")
+    parser.add_argument("--synchronous", default="NORMAL", help="PRAGMA synchronous")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        parser.error(f"{args.database} não existe; gere-o com python -m benchmarks.datagen")
+
+    pool_options = {"busy_timeout": args.busy_timeout, "journal_mode": args.journal_mode,
+                    "synchronous": args.synchronous}
+    options = {"think_ms": args.think_ms, "max_retries": args.max_retries, "backoff": args.backoff}
+    runs = []
+    for cashiers in (int(value) for value in args.cashiers.split(",")):
+        result = run_load(args.database, cashiers, args.mode, args.duration, args.seed, pool_options, options)
+        print_run(result)
+        runs.append(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"database": os.path.abspath(args.database), "settings": {**pool_options, **options},
+                       "runs": runs}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
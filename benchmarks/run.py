@@ -0,0 +1,252 @@
+"""Cenários cronometrados contra as funções de database.py, com resultado em JSON
+
+Uso:
+    python -m benchmarks.run bench.db [--iterations 200] [--output resultado.json]
+    python -m benchmarks.run bench.db --compare anterior.json [--threshold 0.10]
+
+O banco deve ter sido criado por benchmarks.datagen (usa os mesmos usuários e
+vocabulário). Cada execução usa uma cópia temporária do banco, então as vendas
+gravadas por sale_write não alteram os dados vistos pela execução seguinte.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from database import *
+from benchmarks.datagen import BRANDS, PAYMENT_METHODS, PRODUCT_TYPES, barcode_for, password_for, username_for
+
+def percentile(sorted_values, fraction):
+    """Percentil (0 a 1) de uma lista já ordenada, pelo método do posto mais próximo"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def summarize(durations):
+    """Estatísticas (em ms) de uma lista de durações em segundos"""
+    values = sorted(duration * 1000 for duration in durations)
+    total = sum(values)
+    return {
+        "iterations": len(values),
+        "min_ms": round(values[0], 4) if values else 0.0,
+        "median_ms": round(percentile(values, 0.5), 4),
+        "p95_ms": round(percentile(values, 0.95), 4),
+        "p99_ms": round(percentile(values, 0.99), 4),
+        "max_ms": round(values[-1], 4) if values else 0.0,
+        "mean_ms": round(total / len(values), 4) if values else 0.0,
+        "ops_per_s": round(len(values) * 1000 / total, 1) if total else 0.0,
+    }
+
+class Context:
+    """Tamanhos do banco usados para sortear argumentos válidos"""
+
+    def __init__(self, conn):
+        self.product_count = conn.execute("SELECT MAX(id) FROM products").fetchone()[0] or 0
+        self.sale_count = conn.execute("SELECT MAX(id) FROM sales").fetchone()[0] or 0
+        self.user_count = conn.execute("SELECT COUNT(*) FROM users WHERE username LIKE 'caixa%'").fetchone()[0]
+        self.user_ids = [row[0] for row in conn.execute("SELECT id FROM users")]
+        self.first_day, self.last_day = conn.execute("SELECT MIN(day), MAX(day) FROM sales_daily").fetchone()
+
+def scenario_login(conn, rng, ctx):
+    number = rng.randint(1, ctx.user_count)
+    return login_user(conn, username_for(number), password_for(number))
+
+def scenario_product_listing(conn, rng, ctx):
+    order_by = rng.choice(('name', 'price', 'quantity'))
+    page = get_products_page(conn, order_by=order_by, limit=50)
+    # Rolagem: a página seguinte parte da chave da última linha
+    if page:
+        last = page[-1]
+        get_products_page(conn, order_by=order_by, after=(last[PRODUCT_COLUMN_INDEX[order_by]], last[0]), limit=50)
+    return page
+
+def scenario_search(conn, rng, ctx):
+    kind = rng.random()
+    if kind < 0.4:
+        term = rng.choice(PRODUCT_TYPES)[:rng.randint(2, 5)]        # digitando o início do nome
+    elif kind < 0.8:
+        term = f"{rng.choice(PRODUCT_TYPES)} {rng.choice(BRANDS).split()[0]}"
+    else:
+        term = barcode_for(rng.randint(1, ctx.product_count))
+    return search_products(conn, term)
+
+def scenario_sale_lookup(conn, rng, ctx):
+    return get_sale_by_id(conn, rng.randint(1, ctx.sale_count))
+
+def scenario_sales_listing(conn, rng, ctx):
+    kind = rng.random()
+    if kind < 0.4:
+        return get_sales_page(conn)
+    if kind < 0.7:
+        return get_sales_page(conn, user_id=rng.choice(ctx.user_ids))
+    if kind < 0.9:
+        return get_sales_page(conn, payment_method=rng.choice(PAYMENT_METHODS), start_date=ctx.first_day)
+    return get_sales_page(conn, start_date=ctx.last_day, end_date=ctx.last_day)
+
+def scenario_sale_write(conn, rng, ctx):
+    items = []
+    subtotal = Money(0)
+    for product_id in rng.sample(range(1, ctx.product_count + 1), rng.randint(1, 5)):
+        product = get_product_by_id(conn, product_id)
+        price = Money.of(product[4])
+        items.append((product_id, 1, price, price))
+        subtotal += price
+    header = {
+        "customer_name": "Cliente Benchmark",
+        "customer_doc": "",
+        "subtotal": subtotal,
+        "discount": Money(0),
+        "total": subtotal,
+        "payment_method": rng.choice(PAYMENT_METHODS),
+        "user_id": rng.choice(ctx.user_ids),
+    }
+    return record_sale(conn, header, items)
+
+# Cenários na ordem de execução (os de escrita por último)
+SCENARIOS = {
+    "login": scenario_login,
+    "product_listing": scenario_product_listing,
+    "search": scenario_search,
+    "sale_lookup": scenario_sale_lookup,
+    "sales_listing": scenario_sales_listing,
+    "sale_write": scenario_sale_write,
+}
+
+def run_scenario(conn, func, ctx, iterations, warmup, seed):
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        func(conn, rng, ctx)
+    rng = random.Random(seed)
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func(conn, rng, ctx)
+        durations.append(time.perf_counter() - started)
+    return summarize(durations)
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def copy_database(path):
+    """Copia o banco (inclusive o que ainda está no WAL) para um arquivo temporário ao lado dele"""
+    handle, copy_path = tempfile.mkstemp(suffix=".db", prefix="bench-", dir=os.path.dirname(os.path.abspath(path)))
+    os.close(handle)
+    source = sqlite3.connect(path)
+    target = sqlite3.connect(copy_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return copy_path
+
+def remove_database(path):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def run(path, names=None, iterations=200, warmup=20, seed=1):
+    """Executa os cenários numa cópia do banco e devolve o resultado no formato gravado em JSON"""
+    working_copy = copy_database(path)
+    try:
+        return _run(path, working_copy, names, iterations, warmup, seed)
+    finally:
+        close_all_connections()
+        remove_database(working_copy)
+
+def _run(path, working_copy, names, iterations, warmup, seed):
+    configure_database(working_copy)
+    results = {}
+    with pooled_connection() as conn:
+        ctx = Context(conn)
+        meta = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "database": os.path.abspath(path),
+            "database_bytes": os.path.getsize(path),
+            "products": ctx.product_count,
+            "sales": ctx.sale_count,
+            "sale_items": conn.execute("SELECT COUNT(*) FROM sale_items").fetchone()[0],
+            "users": len(ctx.user_ids),
+            "iterations": iterations,
+            "warmup": warmup,
+            "seed": seed,
+        }
+        for name, func in SCENARIOS.items():
+            if names and name not in names:
+                continue
+            results[name] = run_scenario(conn, func, ctx, iterations, warmup, seed)
+    return {"meta": meta, "scenarios": results}
+
+def print_results(result):
+    print(f"{'cenário':<18}{'mediana':>10}{'p95':>10}{'p99':>10}{'ops/s':>10}")
+    for name, stats in result["scenarios"].items():
+        print(f"{name:<18}{stats['median_ms']:>8.3f}ms{stats['p95_ms']:>8.3f}ms"
+              f"{stats['p99_ms']:>8.3f}ms{stats['ops_per_s']:>10.1f}")
+
+def compare(result, baseline, threshold):
+    """Mostra a variação da mediana e do p95 em relação a baseline; devolve os cenários que pioraram"""
+    regressions = []
+    print(f"\n{'cenário':<18}{'mediana':>12}{'p95':>12}")
+    for name, stats in result["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            print(f"{name:<18}{'(novo)':>12}")
+            continue
+        changes = []
+        for key in ("median_ms", "p95_ms"):
+            changes.append((stats[key] - before[key]) / before[key] if before[key] else 0.0)
+        flag = ""
+        if changes[0] > threshold:
+            regressions.append(name)
+            flag = "  <- piorou"
+        print(f"{name:<18}{changes[0]:>+11.1%}{changes[1]:>+12.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede os cenários do sistema contra um banco sintético")
+    parser.add_argument("database", help="banco criado por benchmarks.datagen")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="executa só este cenário (repetível)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="grava o resultado em JSON neste arquivo ('-' para a saída padrão)")
+    parser.add_argument("--compare", help="resultado JSON anterior para comparação")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="piora relativa da mediana considerada regressão (padrão: 0.10)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        parser.error(f"{args.database} não existe; gere-o com python -m benchmarks.datagen")
+
+    result = run(args.database, args.scenario, args.iterations, args.warmup, args.seed)
+    if args.output == "-":
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    else:
+        print_results(result)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
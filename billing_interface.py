@@ -2,9 +2,20 @@ import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from tkinter import filedialog
 from database import *
+from catalog_cache import catalog
+from cart import Cart
+from money import Money
+from db_worker import DBExecutor
+from virtual_list import VirtualTreeview, ProductPageSource
+from receipt_queue import ReceiptQueue, STATUS_DONE, STATUS_FAILED
 from datetime import datetime
-import os
-from fpdf import FPDF
+import re
+import time
+
+# Leitor de código de barras (keyboard wedge): intervalo máximo entre as teclas de
+# uma mesma leitura e tamanho mínimo para que uma rajada seja tratada como leitura
+SCAN_KEY_INTERVAL = 0.05
+SCAN_MIN_LENGTH = 4
 
 class BillingSystem:
     def __init__(self, root, current_user):
@@ -13,10 +24,17 @@ class BillingSystem:
         self.root.title("Sistema de Cobrança")
         
         # Variáveis da venda
-        self.cart = []
+        self.cart = Cart()
+        self.cart.subscribe(self.on_cart_changed)
         self.customer_name = ""
         self.customer_doc = ""
         self.payment_method = "Dinheiro"
+        self.last_receipt = None
+        
+        # Índice de códigos de barras (mantido pelo catálogo compartilhado) e buffer do leitor
+        self.barcode_index = catalog.barcodes
+        self.scan_buffer = []
+        self.scan_last_key = 0.0
         
         # Configurar tamanho e centralizar
         self.root.state('zoomed')  # Maximiza a janela
@@ -24,6 +42,18 @@ class BillingSystem:
         # Criar widgets
         self.create_widgets()
         
+        # Consultas ao banco rodam fora da thread da interface
+        self.db = DBExecutor(self.root, indicator=self.loading_label)
+        self.products_tree.executor = self.db
+        
+        # Notas fiscais geradas e impressas em segundo plano: o caixa já pode iniciar a próxima venda
+        self.receipt_queue = ReceiptQueue(self.root, on_status=self.on_receipt_status)
+        self.root.bind('<Destroy>', self.on_destroy)
+        
+        # Catálogo compartilhado: vendas e edições chegam como alterações pontuais
+        catalog.subscribe(self.on_catalog_changed)
+        catalog.watch(self.root, self.db)
+        
         # Carregar produtos disponíveis
         self.load_products()
     
@@ -40,8 +70,26 @@ class BillingSystem:
         products_frame = ttk.LabelFrame(top_frame, text="Produtos Disponíveis", padding="10")
         products_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # Treeview para produtos
-        self.products_tree = ttk.Treeview(products_frame, columns=("ID", "Nome", "Preço", "Estoque"), show="headings")
+        # Entrada do leitor de código de barras ("3*código" adiciona 3 unidades)
+        scan_frame = ttk.Frame(products_frame)
+        scan_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        ttk.Label(scan_frame, text="Código:").pack(side=tk.LEFT)
+        self.scan_entry = ttk.Entry(scan_frame, width=25)
+        self.scan_entry.pack(side=tk.LEFT, padx=5)
+        self.scan_entry.bind('<Return>', self.on_scan_entry)
+        self.scan_entry.bind('<KP_Enter>', self.on_scan_entry)
+        
+        self.scan_status_label = ttk.Label(scan_frame, text="")
+        self.scan_status_label.pack(side=tk.LEFT, padx=5)
+        
+        # Lista virtualizada de produtos com estoque > 0
+        self.products_tree = VirtualTreeview(products_frame, columns=("ID", "Nome", "Preço", "Estoque"), sort_columns={
+            "ID": "id",
+            "Nome": "name",
+            "Preço": "price",
+            "Estoque": "quantity"
+        })
         self.products_tree.heading("ID", text="ID")
         self.products_tree.heading("Nome", text="Nome")
         self.products_tree.heading("Preço", text="Preço (R$)")
@@ -52,10 +100,6 @@ class BillingSystem:
         self.products_tree.column("Preço", width=80, anchor=tk.E)
         self.products_tree.column("Estoque", width=80, anchor=tk.CENTER)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(products_frame, orient=tk.VERTICAL, command=self.products_tree.yview)
-        self.products_tree.configure(yscroll=scrollbar.set)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.products_tree.pack(fill=tk.BOTH, expand=True)
         
         # Frame do carrinho
@@ -149,6 +193,10 @@ class BillingSystem:
         # Bind events
         self.discount_entry.bind('<KeyRelease>', self.update_totals)
         
+        # Leituras feitas com o foco em outro widget são detectadas pela rajada de teclas
+        self.root.bind('<Key>', self.on_key_burst)
+        self.scan_entry.focus_set()
+        
         # Barra de status
         self.status_frame = ttk.Frame(self.root)
         self.status_frame.pack(fill=tk.X, pady=(0, 10))
@@ -158,26 +206,37 @@ class BillingSystem:
             text=f"Atendente: {self.current_user[3]} | Carrinho: 0 itens"
         )
         self.status_label.pack(side=tk.LEFT, padx=10)
+        
+        self.loading_label = ttk.Label(self.status_frame, text="")
+        self.loading_label.pack(side=tk.RIGHT, padx=10)
+        
+        self.receipt_status_label = ttk.Label(self.status_frame, text="")
+        self.receipt_status_label.pack(side=tk.RIGHT, padx=10)
+    
+    def on_destroy(self, event):
+        if event.widget is self.root:
+            catalog.unsubscribe(self.on_catalog_changed)
+            self.db.shutdown()
+            self.receipt_queue.shutdown()
     
     def load_products(self):
-        # Limpar treeview
-        for item in self.products_tree.get_children():
-            self.products_tree.delete(item)
-        
-        # Carregar produtos do banco de dados
-        conn = create_connection()
-        if conn is not None:
-            products = get_all_products(conn)
-            conn.close()
-            
-            for product in products:
-                if product[5] > 0:  # Só mostra produtos com estoque > 0
-                    self.products_tree.insert("", tk.END, values=(
-                        product[0],  # ID
-                        product[1],  # Nome
-                        f"{product[4]:.2f}",  # Preço
-                        product[5]   # Quantidade
-                    ))
+        # Lista paginada: só a janela visível é lida do banco
+        if self.products_tree.source is None:
+            self.products_tree.set_source(ProductPageSource(self.format_product, in_stock_only=True))
+        else:
+            self.products_tree.refresh()
+    
+    def on_catalog_changed(self, changed, deleted):
+        # Só as linhas alteradas; a janela visível é relida apenas se foi afetada
+        self.products_tree.apply_changes(changed, deleted)
+    
+    def format_product(self, product):
+        return (
+            product[0],  # ID
+            product[1],  # Nome
+            f"{product[4]:.2f}",  # Preço
+            product[5]   # Quantidade
+        )
     
     def add_to_cart(self):
         selected_item = self.products_tree.selection()
@@ -186,35 +245,110 @@ class BillingSystem:
             return
         
         product_id = self.products_tree.item(selected_item[0], "values")[0]
-        product_name = self.products_tree.item(selected_item[0], "values")[1]
-        price = float(self.products_tree.item(selected_item[0], "values")[2])
-        stock = int(self.products_tree.item(selected_item[0], "values")[3])
+        
+        # Nome, preço e estoque vêm da linha atual do banco, não do texto exibido
+        # (o estoque da lista pode estar desatualizado: outros caixas vendendo)
+        self.db.submit(get_product_by_id, product_id, callback=self.on_product_selected, key="stock")
+    
+    def on_product_selected(self, product):
+        if not product:
+            messagebox.showwarning("Aviso", "O produto selecionado não existe mais")
+            return
+        self.ask_quantity(product[0], product[1], product[4], product[5])
+    
+    def ask_quantity(self, product_id, product_name, price, stock):
+        stock -= self.cart.quantity_of(product_id)
+        if stock <= 0:
+            messagebox.showwarning("Aviso", f"Não há estoque disponível de '{product_name}'")
+            return
         
         # Pedir quantidade
         quantity = simpledialog.askinteger("Quantidade", f"Quantidade de '{product_name}':", minvalue=1, maxvalue=stock)
         if quantity is None or quantity <= 0:
             return
         
-        # Verificar se o produto já está no carrinho
-        for item in self.cart:
-            if item["id"] == product_id:
-                item["quantity"] += quantity
-                item["total"] = item["quantity"] * price
-                self.update_cart_display()
-                self.update_totals()
-                return
-        
-        # Adicionar novo item ao carrinho
-        self.cart.append({
-            "id": product_id,
-            "name": product_name,
-            "quantity": quantity,
-            "price": price,
-            "total": quantity * price
-        })
+        self.add_item_to_cart(product_id, product_name, price, quantity)
+    
+    def add_item_to_cart(self, product_id, product_name, price, quantity):
+        # Soma ao item existente ou cria um novo; a tela é atualizada por on_cart_changed
+        self.cart.add(product_id, product_name, price, quantity)
+    
+    def on_scan_entry(self, event=None):
+        code = self.scan_entry.get()
+        self.scan_entry.delete(0, tk.END)
+        self.process_scan(code)
+        return "break"
+    
+    def on_key_burst(self, event):
+        """Detecta leituras do leitor feitas com o foco fora do campo de código"""
+        widget = event.widget
+        if widget is self.scan_entry or not isinstance(widget, tk.Misc):
+            return
         
-        self.update_cart_display()
-        self.update_totals()
+        if event.keysym in ('Return', 'KP_Enter'):
+            code = "".join(self.scan_buffer)
+            self.scan_buffer = []
+            if len(code) >= SCAN_MIN_LENGTH and time.monotonic() - self.scan_last_key <= SCAN_KEY_INTERVAL * 4:
+                # Remove os caracteres que a leitura digitou no campo com foco
+                if isinstance(widget, tk.Entry):
+                    insert = widget.index(tk.INSERT)
+                    widget.delete(max(insert - len(code), 0), insert)
+                self.process_scan(code)
+                return "break"
+            return
+        
+        if event.char and event.char.isprintable():
+            now = time.monotonic()
+            if now - self.scan_last_key > SCAN_KEY_INTERVAL:
+                self.scan_buffer = []
+            self.scan_buffer.append(event.char)
+            self.scan_last_key = now
+    
+    def process_scan(self, code):
+        """Adiciona ao carrinho o produto lido, sem diálogos (quantidade 1 ou prefixo "N*")"""
+        code = code.strip()
+        if not code:
+            return
+        
+        quantity = 1
+        match = re.match(r"^(\d+)\s*\*\s*(.+)$", code)
+        if match:
+            quantity = int(match.group(1))
+            code = match.group(2).strip()
+        if quantity <= 0:
+            self.root.bell()
+            return
+        
+        product = self.barcode_index.lookup(code)
+        if product is None:
+            # Produto cadastrado depois da última carga: uma única consulta pontual
+            self.db.submit(
+                get_product_by_barcode, code,
+                callback=lambda row: self.on_barcode_fetched(code, quantity, row)
+            )
+            return
+        
+        self.add_scanned(code, quantity, product)
+    
+    def on_barcode_fetched(self, code, quantity, row):
+        if row:
+            self.barcode_index.update(row)
+        self.add_scanned(code, quantity, self.barcode_index.lookup(code))
+    
+    def add_scanned(self, code, quantity, product):
+        if product is None:
+            self.root.bell()
+            self.scan_status_label.config(text=f"Código não encontrado: {code}")
+            return
+        
+        product_id, product_name, price, stock = product
+        if self.cart.quantity_of(product_id) + quantity > stock:
+            self.root.bell()
+            self.scan_status_label.config(text=f"Estoque insuficiente: {product_name} ({stock} disponível)")
+            return
+        
+        self.add_item_to_cart(product_id, product_name, price, quantity)
+        self.scan_status_label.config(text=f"{quantity} x {product_name}")
     
     def remove_from_cart(self):
         selected_item = self.cart_tree.selection()
@@ -222,53 +356,57 @@ class BillingSystem:
             messagebox.showwarning("Aviso", "Por favor, selecione um item para remover")
             return
         
-        product_id = self.cart_tree.item(selected_item[0], "values")[0]
-        
-        # Remover item do carrinho
-        self.cart = [item for item in self.cart if item["id"] != product_id]
-        
-        self.update_cart_display()
-        self.update_totals()
+        # Remover item do carrinho (o iid da linha é o id do produto)
+        self.cart.remove(selected_item[0])
     
     def clear_cart(self):
         if not self.cart:
             return
             
         if messagebox.askyesno("Confirmar", "Deseja limpar todo o carrinho?"):
-            self.cart = []
-            self.update_cart_display()
-            self.update_totals()
+            self.cart.clear()
+    
+    def cart_values(self, item):
+        return (
+            item.product_id,
+            item.name,
+            item.quantity,
+            f"{item.price:.2f}",
+            f"{item.total:.2f}"
+        )
     
-    def update_cart_display(self):
-        # Limpar treeview
-        for item in self.cart_tree.get_children():
-            self.cart_tree.delete(item)
-        
-        # Adicionar itens do carrinho
-        for item in self.cart:
-            self.cart_tree.insert("", tk.END, values=(
-                item["id"],
-                item["name"],
-                item["quantity"],
-                f"{item['price']:.2f}",
-                f"{item['total']:.2f}"
-            ))
-        
-        # Atualizar status
+    def on_cart_changed(self, event, item):
+        """Atualiza só a linha alterada do carrinho, os totais e o status"""
+        if event == "added":
+            self.cart_tree.insert("", tk.END, iid=str(item.product_id), values=self.cart_values(item))
+        elif event == "updated":
+            self.cart_tree.item(str(item.product_id), values=self.cart_values(item))
+        elif event == "removed":
+            self.cart_tree.delete(str(item.product_id))
+        elif event == "cleared":
+            self.cart_tree.delete(*self.cart_tree.get_children())
+        
+        self.update_totals()
         self.status_label.config(text=f"Atendente: {self.current_user[3]} | Carrinho: {len(self.cart)} itens")
     
+    def current_totals(self):
+        """Retorna (subtotal, desconto, total) da venda em andamento"""
+        try:
+            discount = Money.parse(self.discount_entry.get())
+        except ValueError:
+            discount = Money(0)
+        subtotal = self.cart.subtotal
+        total = max(Money(0), subtotal - discount)  # Garante que o total não seja negativo
+        return subtotal, discount, total
+    
     def update_totals(self, event=None):
-        subtotal = sum(item["total"] for item in self.cart)
-        
         try:
-            discount = float(self.discount_entry.get())
+            Money.parse(self.discount_entry.get())
         except ValueError:
-            discount = 0.0
             self.discount_entry.delete(0, tk.END)
             self.discount_entry.insert(0, "0.00")
         
-        total = max(0, subtotal - discount)  # Garante que o total não seja negativo
-        
+        subtotal, discount, total = self.current_totals()
         self.subtotal_label.config(text=f"R$ {subtotal:.2f}")
         self.total_label.config(text=f"R$ {total:.2f}")
     
@@ -283,110 +421,101 @@ class BillingSystem:
         self.payment_method = self.payment_var.get()
         
         # Calcular totais
-        subtotal = sum(item["total"] for item in self.cart)
-        try:
-            discount = float(self.discount_entry.get())
-        except ValueError:
-            discount = 0.0
-        total = max(0, subtotal - discount)
+        subtotal, discount, total = self.current_totals()
         
         # Confirmar venda
         if not messagebox.askyesno("Confirmar Venda", f"Total da venda: R$ {total:.2f}\n\nConfirmar venda?"):
             return
         
-        # Registrar venda no banco de dados
-        conn = create_connection()
-        if conn is not None:
-            try:
-                # Iniciar transação
-                conn.execute("BEGIN TRANSACTION")
-                
-                # Adicionar venda
-                sale_id = add_sale(
-                    conn,
-                    self.customer_name if self.customer_name else "Consumidor Final",
-                    self.customer_doc,
-                    subtotal,
-                    discount,
-                    total,
-                    self.payment_method,
-                    self.current_user[0]  # user_id
-                )
-                
-                if sale_id:
-                    # Adicionar itens da venda e atualizar estoque
-                    for item in self.cart:
-                        add_sale_item(
-                            conn,
-                            sale_id,
-                            item["id"],
-                            item["quantity"],
-                            item["price"],
-                            item["total"]
-                        )
-                        
-                        # Atualizar estoque
-                        update_product_quantity(conn, item["id"], item["quantity"])
-                    
-                    # Commit da transação
-                    conn.commit()
-                    
-                    messagebox.showinfo("Sucesso", f"Venda finalizada com sucesso!\nNúmero da nota: {sale_id}")
-                    
-                    # Limpar carrinho e campos
-                    self.cart = []
-                    self.customer_entry.delete(0, tk.END)
-                    self.doc_entry.delete(0, tk.END)
-                    self.discount_entry.delete(0, tk.END)
-                    self.discount_entry.insert(0, "0.00")
-                    self.update_cart_display()
-                    self.update_totals()
-                    self.load_products()  # Atualizar estoque
-                    
-                    # Gerar nota fiscal
-                    self.generate_receipt(sale_id)
-                else:
-                    conn.rollback()
-                    messagebox.showerror("Erro", "Não foi possível registrar a venda")
-                
-            except Error as e:
-                conn.rollback()
-                messagebox.showerror("Erro", f"Ocorreu um erro ao registrar a venda:\n{str(e)}")
+        # Registrar venda, itens e baixa de estoque em uma única transação
+        self.finalize_button.config(state=tk.DISABLED)
+        self.db.submit(
+            record_sale,
+            {
+                "customer_name": self.customer_name if self.customer_name else "Consumidor Final",
+                "customer_doc": self.customer_doc,
+                "subtotal": subtotal,
+                "discount": discount,
+                "total": total,
+                "payment_method": self.payment_method,
+                "user_id": self.current_user[0]
+            },
+            self.cart.sale_items(),
+            callback=self.on_sale_recorded,
+            errback=self.on_sale_error
+        )
+    
+    def on_sale_recorded(self, result):
+        self.finalize_button.config(state=tk.NORMAL)
+        sale_id, failed = result
+        
+        if sale_id:
+            messagebox.showinfo("Sucesso", f"Venda finalizada com sucesso!\nNúmero da nota: {sale_id}")
             
-            finally:
-                conn.close()
+            # Limpar carrinho e campos
+            self.cart.clear()
+            self.customer_entry.delete(0, tk.END)
+            self.doc_entry.delete(0, tk.END)
+            self.discount_entry.delete(0, tk.END)
+            self.discount_entry.insert(0, "0.00")
+            self.update_totals()
+            catalog.refresh(self.db)  # Estoque dos produtos vendidos, sem recarregar a lista
+            
+            # Gerar nota fiscal
+            self.generate_receipt(sale_id)
+        elif failed:
+            self.adjust_cart_to_stock(failed)
+        else:
+            messagebox.showerror("Erro", "Não foi possível registrar a venda")
+    
+    def on_sale_error(self, error):
+        self.finalize_button.config(state=tk.NORMAL)
+        messagebox.showerror("Erro", f"Não foi possível registrar a venda: {error}")
+    
+    def adjust_cart_to_stock(self, failed):
+        """Ajusta apenas as linhas do carrinho recusadas por falta de estoque"""
+        lines = []
+        for product_id, requested, available in failed:
+            available = max(available or 0, 0)
+            item = self.cart.get(product_id)
+            if item is not None:
+                lines.append(f"- {item.name}: pedido {requested}, disponível {available}")
+                self.cart.set_quantity(product_id, available)
+        
+        catalog.refresh(self.db)  # Atualizar estoque
+        
+        messagebox.showwarning(
+            "Estoque Insuficiente",
+            "Alguns itens não têm mais estoque suficiente e foram ajustados:\n\n"
+            + "\n".join(lines)
+            + "\n\nRevise o carrinho e finalize a venda novamente."
+        )
     
     def generate_receipt(self, sale_id):
-        """Gera os dados da nota fiscal"""
-        conn = create_connection()
-        if conn is not None:
-            sale, items = get_sale_by_id(conn, sale_id)
-            conn.close()
-            
-            if sale and items:
-                receipt_data = {
-                    "sale_id": sale[0],
-                    "date": sale[1],
-                    "customer_name": sale[2],
-                    "customer_doc": sale[3],
-                    "subtotal": sale[4],
-                    "discount": sale[5],
-                    "total": sale[6],
-                    "payment_method": sale[7],
-                    "cashier": self.current_user[3],
-                    "items": []
-                }
-                
-                for item in items:
-                    receipt_data["items"].append({
-                        "name": item[6],  # product name
-                        "quantity": item[3],
-                        "unit_price": item[4],
-                        "total_price": item[5]
-                    })
-                
-                return receipt_data
-        return None
+        """Agenda a geração e impressão da nota fiscal na fila de notas"""
+        self.receipt_queue.submit(sale_id, self.current_user[3], quiet=True)
+    
+    def on_receipt_status(self, job):
+        """Mostra o andamento das notas; diálogos só para pedidos feitos pelo usuário"""
+        text = f"Nota {job.sale_id}: {job.status}"
+        if job.status == STATUS_FAILED:
+            text += f" ({job.error})"
+            self.root.bell()
+        self.receipt_status_label.config(text=text)
+        
+        if job.status == STATUS_DONE:
+            if job.action == "print" and job.receipt_data is not None and not job.preview:
+                self.last_receipt = job.receipt_data
+            if not job.quiet:
+                if job.action == "save":
+                    messagebox.showinfo("Sucesso", f"Nota fiscal salva como:\n{job.file_path}")
+                else:
+                    messagebox.showinfo("Impressão", "Nota fiscal enviada para impressão")
+        elif job.status == STATUS_FAILED and not job.quiet:
+            if job.action == "save":
+                messagebox.showerror("Erro", f"Não foi possível salvar a nota:\n{job.error}")
+            else:
+                messagebox.showerror("Erro", f"Não foi possível imprimir:\n{job.error}")
     
     def print_receipt(self):
         """Imprime a nota fiscal"""
@@ -396,17 +525,18 @@ class BillingSystem:
         
         # Para impressão real, você precisaria de uma impressora configurada
         # Aqui vamos apenas mostrar uma prévia
+        subtotal, discount, total = self.current_totals()
         receipt_data = {
             "sale_id": "PRÉVIA",
             "date": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
             "customer_name": self.customer_entry.get() or "Consumidor Final",
             "customer_doc": self.doc_entry.get() or "",
-            "subtotal": sum(item["total"] for item in self.cart),
-            "discount": float(self.discount_entry.get()),
-            "total": float(self.total_label.cget("text").replace("R$ ", "")),
+            "subtotal": subtotal,
+            "discount": discount,
+            "total": total,
             "payment_method": self.payment_var.get(),
             "cashier": self.current_user[3],
-            "items": self.cart
+            "items": self.cart.receipt_items()
         }
         
         self.show_receipt_preview(receipt_data)
@@ -418,17 +548,18 @@ class BillingSystem:
             return
         
         # Gerar dados da nota
+        subtotal, discount, total = self.current_totals()
         receipt_data = {
             "sale_id": "PRÉVIA",
             "date": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
             "customer_name": self.customer_entry.get() or "Consumidor Final",
             "customer_doc": self.doc_entry.get() or "",
-            "subtotal": sum(item["total"] for item in self.cart),
-            "discount": float(self.discount_entry.get()),
-            "total": float(self.total_label.cget("text").replace("R$ ", "")),
+            "subtotal": subtotal,
+            "discount": discount,
+            "total": total,
             "payment_method": self.payment_var.get(),
             "cashier": self.current_user[3],
-            "items": self.cart
+            "items": self.cart.receipt_items()
         }
         
         # Pedir local para salvar
@@ -440,8 +571,8 @@ class BillingSystem:
         )
         
         if file_path:
-            self.create_pdf(receipt_data, file_path)
-            messagebox.showinfo("Sucesso", f"Nota fiscal salva como:\n{file_path}")
+            self.receipt_queue.submit(receipt_data['sale_id'], receipt_data['cashier'], action="save",
+                                      file_path=file_path, receipt_data=receipt_data, preview=True)
     
     def show_receipt_preview(self, receipt_data):
         """Mostra uma prévia da nota fiscal"""
@@ -511,90 +642,10 @@ class BillingSystem:
         ttk.Button(button_frame, text="Salvar como PDF", command=lambda: self.save_receipt_as_pdf(receipt_data)).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Fechar", command=preview_window.destroy).pack(side=tk.LEFT, padx=5)
     
-    def create_pdf(self, receipt_data, file_path):
-        """Cria um PDF da nota fiscal"""
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-        
-        # Cabeçalho
-        pdf.set_font("Arial", 'B', 16)
-        pdf.cell(0, 10, "NOTA FISCAL", 0, 1, 'C')
-        pdf.set_font("Arial", size=12)
-        pdf.cell(0, 10, f"Nº: {receipt_data['sale_id']}", 0, 1)
-        pdf.cell(0, 10, f"Data: {receipt_data['date']}", 0, 1)
-        pdf.ln(5)
-        
-        # Cliente
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(0, 10, "CLIENTE:", 0, 1)
-        pdf.set_font("Arial", size=12)
-        pdf.cell(0, 10, receipt_data['customer_name'], 0, 1)
-        if receipt_data['customer_doc']:
-            pdf.cell(0, 10, f"CPF/CNPJ: {receipt_data['customer_doc']}", 0, 1)
-        pdf.ln(5)
-        
-        # Itens
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(0, 10, "ITENS", 0, 1)
-        pdf.set_font("Arial", size=10)
-        
-        # Cabeçalho da tabela
-        pdf.cell(100, 10, "Descrição", 1)
-        pdf.cell(20, 10, "Qtd", 1, 0, 'C')
-        pdf.cell(30, 10, "Unit. (R$)", 1, 0, 'R')
-        pdf.cell(30, 10, "Total (R$)", 1, 0, 'R')
-        pdf.ln()
-        
-        # Itens
-        for item in receipt_data['items']:
-            pdf.cell(100, 10, item['name'], 1)
-            pdf.cell(20, 10, str(item['quantity']), 1, 0, 'C')
-            pdf.cell(30, 10, f"{item['unit_price']:.2f}", 1, 0, 'R')
-            pdf.cell(30, 10, f"{item['total_price']:.2f}", 1, 0, 'R')
-            pdf.ln()
-        
-        # Totais
-        pdf.set_font("Arial", size=12)
-        pdf.cell(150, 10, "Subtotal:", 0, 0, 'R')
-        pdf.cell(30, 10, f"R$ {receipt_data['subtotal']:.2f}", 0, 1, 'R')
-        
-        pdf.cell(150, 10, "Desconto:", 0, 0, 'R')
-        pdf.cell(30, 10, f"R$ {receipt_data['discount']:.2f}", 0, 1, 'R')
-        
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(150, 10, "TOTAL:", 0, 0, 'R')
-        pdf.cell(30, 10, f"R$ {receipt_data['total']:.2f}", 0, 1, 'R')
-        pdf.ln(10)
-        
-        # Pagamento e atendente
-        pdf.set_font("Arial", size=12)
-        pdf.cell(0, 10, f"Forma de Pagamento: {receipt_data['payment_method']}", 0, 1)
-        pdf.cell(0, 10, f"Atendente: {receipt_data['cashier']}", 0, 1)
-        
-        # Rodapé
-        pdf.set_y(-15)
-        pdf.set_font("Arial", 'I', 8)
-        pdf.cell(0, 10, "Sistema de Gerenciamento de Estoque", 0, 0, 'C')
-        
-        # Salvar PDF
-        pdf.output(file_path)
-    
     def print_receipt_to_printer(self, receipt_data):
-        """Envia a nota fiscal para a impressora"""
-        # Esta é uma implementação simplificada
-        # Em um sistema real, você precisaria configurar a impressora
-        
-        # Primeiro criamos um PDF temporário
-        temp_path = os.path.join(os.getenv("TEMP"), f"temp_receipt_{receipt_data['sale_id']}.pdf")
-        self.create_pdf(receipt_data, temp_path)
-        
-        try:
-            # Abrir o PDF com o visualizador padrão (que pode ter opção de impressão)
-            os.startfile(temp_path, 'print')
-            messagebox.showinfo("Impressão", "Nota fiscal enviada para impressão")
-        except Exception as e:
-            messagebox.showerror("Erro", f"Não foi possível imprimir:\n{str(e)}")
+        """Envia a nota fiscal para a impressora (em segundo plano)"""
+        self.receipt_queue.submit(receipt_data['sale_id'], receipt_data['cashier'], receipt_data=receipt_data,
+                                  preview=True)
     
     def save_receipt_as_pdf(self, receipt_data):
         """Salva a nota fiscal como PDF"""
@@ -606,5 +657,5 @@ class BillingSystem:
         )
         
         if file_path:
-            self.create_pdf(receipt_data, file_path)
-            messagebox.showinfo("Sucesso", f"Nota fiscal salva como:\n{file_path}")
\ No newline at end of file
+            self.receipt_queue.submit(receipt_data['sale_id'], receipt_data['cashier'], action="save",
+                                      file_path=file_path, receipt_data=receipt_data, preview=True)
\ No newline at end of file
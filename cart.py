@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from money import Money
+
+class CartItem:
+    """Linha do carrinho (preço unitário em Money)"""
+
+    __slots__ = ('product_id', 'name', 'price', 'quantity')
+
+    def __init__(self, product_id, name, price, quantity):
+        self.product_id = product_id
+        self.name = name
+        self.price = Money.of(price)
+        self.quantity = quantity
+
+    @property
+    def total(self):
+        return self.quantity * self.price
+
+class Cart:
+    """Carrinho da venda: itens por id de produto e subtotal mantido a cada alteração
+
+    Os inscritos recebem listener(evento, item) com evento "added", "updated",
+    "removed" ou "cleared" (item None), e só atualizam o que mudou.
+    """
+
+    def __init__(self):
+        self._items = OrderedDict()   # id do produto -> CartItem, na ordem de inclusão
+        self._listeners = []
+        self.subtotal = Money(0)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __contains__(self, product_id):
+        return int(product_id) in self._items
+
+    def get(self, product_id):
+        return self._items.get(int(product_id))
+
+    def quantity_of(self, product_id):
+        """Quantidade do produto já no carrinho"""
+        item = self._items.get(int(product_id))
+        return item.quantity if item else 0
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _emit(self, event, item):
+        for listener in self._listeners:
+            listener(event, item)
+
+    def add(self, product_id, name, price, quantity):
+        """Soma a quantidade ao item do produto, criando-o se necessário"""
+        product_id = int(product_id)
+        item = self._items.get(product_id)
+        if item is None:
+            item = CartItem(product_id, name, price, quantity)
+            self._items[product_id] = item
+            self.subtotal += item.total
+            self._emit("added", item)
+        else:
+            self.subtotal += quantity * item.price
+            item.quantity += quantity
+            self._emit("updated", item)
+        return item
+
+    def set_quantity(self, product_id, quantity):
+        """Altera a quantidade de um item (zero ou menos o remove)"""
+        item = self._items.get(int(product_id))
+        if item is None:
+            return
+        if quantity <= 0:
+            self.remove(product_id)
+            return
+        self.subtotal += (quantity - item.quantity) * item.price
+        item.quantity = quantity
+        self._emit("updated", item)
+
+    def remove(self, product_id):
+        item = self._items.pop(int(product_id), None)
+        if item is None:
+            return
+        self.subtotal -= item.total
+        self._emit("removed", item)
+
+    def clear(self):
+        if not self._items:
+            return
+        self._items.clear()
+        self.subtotal = Money(0)
+        self._emit("cleared", None)
+
+    def sale_items(self):
+        """Itens no formato de record_sale: (id, quantidade, preço unitário, total)"""
+        return [(item.product_id, item.quantity, item.price, item.total) for item in self._items.values()]
+
+    def receipt_items(self):
+        """Itens no formato usado pela nota fiscal"""
+        return [
+            {
+                "name": item.name,
+                "quantity": item.quantity,
+                "unit_price": item.price,
+                "total_price": item.total
+            }
+            for item in self._items.values()
+        ]
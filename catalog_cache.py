@@ -0,0 +1,143 @@
+import sqlite3
+import sys
+import threading
+from database import *
+from barcode_index import BarcodeIndex
+
+# Intervalo (ms) entre as verificações de alterações feitas por outros processos/caixas
+CATALOG_POLL_INTERVAL = 2000
+
+# Colunas de texto com poucos valores distintos, compartilhadas entre as linhas
+_INTERNED_COLUMNS = (3, 7)   # categoria, fornecedor
+
+def _compact(row):
+    """Linha de products como tupla, com categoria e fornecedor internados"""
+    row = list(row)
+    for column in _INTERNED_COLUMNS:
+        if isinstance(row[column], str):
+            row[column] = sys.intern(row[column])
+    return tuple(row)
+
+class CatalogCache:
+    """Catálogo de produtos em memória compartilhado pelas janelas do processo
+
+    sync() roda numa thread de trabalho: PRAGMA data_version numa conexão dedicada
+    diz, sem ler nenhuma tabela, se alguém gravou no banco; só então row_versions
+    indica quais produtos reler. publish() roda na thread do Tk e avisa as janelas
+    inscritas com (linhas alteradas, ids excluídos).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._products = {}            # id -> linha de products
+        self.barcodes = BarcodeIndex()
+        self.version = None            # versão de row_versions já refletida
+        self._watch_conn = None
+        self._data_version = None
+        self._subscribers = []
+
+    def __len__(self):
+        return len(self._products)
+
+    def get(self, product_id):
+        """Retorna a linha do produto em memória, ou None"""
+        return self._products.get(int(product_id))
+
+    def products(self):
+        """Retorna todas as linhas em memória"""
+        return list(self._products.values())
+
+    def subscribe(self, callback):
+        """Registra callback(linhas alteradas, ids excluídos), chamado na thread do Tk"""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _read_data_version(self):
+        # data_version muda quando outra conexão (inclusive as do pool) faz commit;
+        # None se não foi possível ler (a sincronização então consulta row_versions)
+        try:
+            if self._watch_conn is None:
+                self._watch_conn = sqlite3.connect(get_pool().database, check_same_thread=False)
+            return self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+        except Error as e:
+            print(e)
+            self._watch_conn = None
+            return None
+
+    def sync(self, conn):
+        """Atualiza o catálogo com as alterações gravadas desde a última sincronização
+
+        Retorna (linhas alteradas, ids excluídos), ou None se nada mudou. A primeira
+        chamada carrega o catálogo inteiro (a única leitura completa de products;
+        as seguintes só releem as linhas indicadas por row_versions) e também
+        retorna None. Erros do SQLite são propagados (errback do executor) e a
+        próxima chamada tenta de novo: data_version só é guardado depois da leitura.
+        """
+        with self._lock:
+            data_version = self._read_data_version()
+            if self.version is not None and data_version is not None and data_version == self._data_version:
+                return None
+
+            if self.version is None:
+                # Versão lida antes dos dados: alterações durante a carga serão relidas
+                version = read_change_version(conn, 'products')
+                products = [_compact(row) for row in read_all_products(conn)]
+                self._products = {row[0]: row for row in products}
+                self.barcodes.load(products)
+                self.version = version
+                self._data_version = data_version
+                return None
+
+            version, changed, deleted = read_changes_since(conn, 'products', self.version)
+            self._data_version = data_version
+            if version == self.version:
+                return None
+            for product_id in deleted:
+                self._products.pop(product_id, None)
+                self.barcodes.remove(product_id)
+            for row in changed:
+                row = _compact(row)
+                self._products[row[0]] = row
+                self.barcodes.update(row)
+            self.version = version
+            return changed, deleted
+
+    def publish(self, changes):
+        """Avisa as janelas inscritas (chamado na thread do Tk com o resultado de sync)"""
+        if not changes:
+            return
+        changed, deleted = changes
+        for callback in list(self._subscribers):
+            callback(changed, deleted)
+
+    def refresh(self, executor, background=False):
+        """Agenda uma sincronização no executor da janela e avisa as inscritas"""
+        return executor.submit(self.sync, callback=self.publish, errback=self._sync_failed,
+                               key="catalog", background=background)
+
+    def _sync_failed(self, error):
+        # Ex.: "database is locked"; a próxima verificação periódica tenta de novo
+        print(error)
+
+    def watch(self, root, executor, interval=CATALOG_POLL_INTERVAL):
+        """Sincroniza periodicamente enquanto o executor da janela estiver ativo"""
+        def tick():
+            # Verificação de fundo: não mostra "Carregando..." a cada intervalo
+            if self.refresh(executor, background=True) is not None:
+                root.after(interval, tick)
+        tick()
+
+    def close(self):
+        """Fecha a conexão usada para verificar data_version"""
+        with self._lock:
+            if self._watch_conn is not None:
+                self._watch_conn.close()
+                self._watch_conn = None
+            self._data_version = None
+
+# Catálogo único do processo
+catalog = CatalogCache()
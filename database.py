@@ -1,322 +1,1429 @@
-import sqlite3
-from sqlite3 import Error
-
-def create_connection():
-    """Cria uma conexão com o banco de dados SQLite"""
-    conn = None
-    try:
-        conn = sqlite3.connect('users.db')
-        return conn
-    except Error as e:
-        print(e)
-    return conn
-
-def create_table(conn):
-    """Cria a tabela de usuários se não existir"""
-    try:
-        sql = '''CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT NOT NULL UNIQUE,
-                    password TEXT NOT NULL,
-                    full_name TEXT NOT NULL,
-                    email TEXT,
-                    is_admin INTEGER DEFAULT 0,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                );'''
-        cursor = conn.cursor()
-        cursor.execute(sql)
-        conn.commit()
-    except Error as e:
-        print(e)
-
-def create_product_table(conn):
-    """Cria a tabela de produtos se não existir"""
-    try:
-        sql = '''CREATE TABLE IF NOT EXISTS products (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    category TEXT,
-                    price REAL NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    min_quantity INTEGER DEFAULT 0,
-                    supplier TEXT,
-                    barcode TEXT UNIQUE,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-                );'''
-        cursor = conn.cursor()
-        cursor.execute(sql)
-        conn.commit()
-    except Error as e:
-        print(e)
-
-def create_sales_tables(conn):
-    """Cria as tabelas para vendas e itens de venda"""
-    try:
-        # Tabela de vendas
-        sales_table = '''CREATE TABLE IF NOT EXISTS sales (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            sale_date TEXT DEFAULT CURRENT_TIMESTAMP,
-                            customer_name TEXT,
-                            customer_doc TEXT,
-                            subtotal REAL NOT NULL,
-                            discount REAL DEFAULT 0,
-                            total REAL NOT NULL,
-                            payment_method TEXT,
-                            user_id INTEGER NOT NULL,
-                            FOREIGN KEY (user_id) REFERENCES users (id)
-                        );'''
-        
-        # Tabela de itens de venda
-        sale_items_table = '''CREATE TABLE IF NOT EXISTS sale_items (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                sale_id INTEGER NOT NULL,
-                                product_id INTEGER NOT NULL,
-                                quantity INTEGER NOT NULL,
-                                unit_price REAL NOT NULL,
-                                total_price REAL NOT NULL,
-                                FOREIGN KEY (sale_id) REFERENCES sales (id),
-                                FOREIGN KEY (product_id) REFERENCES products (id)
-                            );'''
-        
-        cursor = conn.cursor()
-        cursor.execute(sales_table)
-        cursor.execute(sale_items_table)
-        conn.commit()
-    except Error as e:
-        print(e)
-
-def initialize_database():
-    """Inicializa o banco de dados e cria tabelas necessárias"""
-    conn = create_connection()
-    if conn is not None:
-        create_table(conn)          # Tabela de usuários
-        create_product_table(conn)  # Tabela de produtos
-        create_sales_tables(conn)   # Tabelas de vendas
-        
-        # Verifica se existe algum admin
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM users WHERE is_admin=1")
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            # Cria um admin padrão (usuário: admin, senha: admin123)
-            add_user(conn, "admin", "admin123", "Administrador", "admin@system.com", 1)
-        
-        conn.close()
-
-def add_user(conn, username, password, full_name, email, is_admin=0):
-    """Adiciona um novo usuário ao banco de dados"""
-    try:
-        sql = '''INSERT INTO users(username, password, full_name, email, is_admin)
-                 VALUES(?,?,?,?,?)'''
-        cursor = conn.cursor()
-        cursor.execute(sql, (username, password, full_name, email, is_admin))
-        conn.commit()
-        return cursor.lastrowid
-    except Error as e:
-        print(e)
-        return None
-
-def get_all_users(conn):
-    """Retorna todos os usuários do banco de dados"""
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users")
-        return cursor.fetchall()
-    except Error as e:
-        print(e)
-        return []
-
-def get_user_by_id(conn, user_id):
-    """Retorna um usuário específico pelo ID"""
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE id=?", (user_id,))
-        return cursor.fetchone()
-    except Error as e:
-        print(e)
-        return None
-
-def update_user(conn, user_id, username, password, full_name, email, is_admin):
-    """Atualiza os dados de um usuário"""
-    try:
-        sql = '''UPDATE users
-                 SET username=?, password=?, full_name=?, email=?, is_admin=?
-                 WHERE id=?'''
-        cursor = conn.cursor()
-        cursor.execute(sql, (username, password, full_name, email, is_admin, user_id))
-        conn.commit()
-        return True
-    except Error as e:
-        print(e)
-        return False
-
-def delete_user(conn, user_id):
-    """Remove um usuário do banco de dados"""
-    try:
-        sql = 'DELETE FROM users WHERE id=?'
-        cursor = conn.cursor()
-        cursor.execute(sql, (user_id,))
-        conn.commit()
-        return True
-    except Error as e:
-        print(e)
-        return False
-
-def login_user(conn, username, password):
-    """Verifica as credenciais do usuário"""
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE username=? AND password=?", (username, password))
-        return cursor.fetchone()
-    except Error as e:
-        print(e)
-        return None
-    
-def add_product(conn, name, description, category, price, quantity, min_quantity, supplier, barcode):
-    """Adiciona um novo produto ao banco de dados"""
-    try:
-        sql = '''INSERT INTO products(name, description, category, price, quantity, min_quantity, supplier, barcode)
-                 VALUES(?,?,?,?,?,?,?,?)'''
-        cursor = conn.cursor()
-        cursor.execute(sql, (name, description, category, price, quantity, min_quantity, supplier, barcode))
-        conn.commit()
-        return cursor.lastrowid
-    except Error as e:
-        print(e)
-        return None
-
-def get_all_products(conn):
-    """Retorna todos os produtos do banco de dados"""
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM products")
-        return cursor.fetchall()
-    except Error as e:
-        print(e)
-        return []
-
-def get_product_by_id(conn, product_id):
-    """Retorna um produto específico pelo ID"""
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM products WHERE id=?", (product_id,))
-        return cursor.fetchone()
-    except Error as e:
-        print(e)
-        return None
-
-def update_product(conn, product_id, name, description, category, price, quantity, min_quantity, supplier, barcode):
-    """Atualiza os dados de um produto"""
-    try:
-        sql = '''UPDATE products
-                 SET name=?, description=?, category=?, price=?, quantity=?, min_quantity=?, supplier=?, barcode=?, updated_at=CURRENT_TIMESTAMP
-                 WHERE id=?'''
-        cursor = conn.cursor()
-        cursor.execute(sql, (name, description, category, price, quantity, min_quantity, supplier, barcode, product_id))
-        conn.commit()
-        return True
-    except Error as e:
-        print(e)
-        return False
-
-def delete_product(conn, product_id):
-    """Remove um produto do banco de dados"""
-    try:
-        sql = 'DELETE FROM products WHERE id=?'
-        cursor = conn.cursor()
-        cursor.execute(sql, (product_id,))
-        conn.commit()
-        return True
-    except Error as e:
-        print(e)
-        return False
-
-def search_products(conn, search_term):
-    """Busca produtos por nome, descrição ou categoria"""
-    try:
-        cursor = conn.cursor()
-        search_term = f"%{search_term}%"
-        cursor.execute("""
-            SELECT * FROM products 
-            WHERE name LIKE ? OR description LIKE ? OR category LIKE ? OR barcode LIKE ?
-        """, (search_term, search_term, search_term, search_term))
-        return cursor.fetchall()
-    except Error as e:
-        print(e)
-        return []
-    
-def add_sale(conn, customer_name, customer_doc, subtotal, discount, total, payment_method, user_id):
-    """Adiciona uma nova venda ao banco de dados"""
-    try:
-        sql = '''INSERT INTO sales(customer_name, customer_doc, subtotal, discount, total, payment_method, user_id)
-                 VALUES(?,?,?,?,?,?,?)'''
-        cursor = conn.cursor()
-        cursor.execute(sql, (customer_name, customer_doc, subtotal, discount, total, payment_method, user_id))
-        conn.commit()
-        return cursor.lastrowid
-    except Error as e:
-        print(e)
-        return None
-
-def add_sale_item(conn, sale_id, product_id, quantity, unit_price, total_price):
-    """Adiciona um item à venda"""
-    try:
-        sql = '''INSERT INTO sale_items(sale_id, product_id, quantity, unit_price, total_price)
-                 VALUES(?,?,?,?,?)'''
-        cursor = conn.cursor()
-        cursor.execute(sql, (sale_id, product_id, quantity, unit_price, total_price))
-        conn.commit()
-        return cursor.lastrowid
-    except Error as e:
-        print(e)
-        return None
-
-def get_sale_by_id(conn, sale_id):
-    """Obtém os detalhes de uma venda"""
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM sales WHERE id=?", (sale_id,))
-        sale = cursor.fetchone()
-        
-        if sale:
-            cursor.execute("""
-                SELECT si.*, p.name 
-                FROM sale_items si
-                JOIN products p ON si.product_id = p.id
-                WHERE si.sale_id=?
-            """, (sale_id,))
-            items = cursor.fetchall()
-            return sale, items
-        return None, None
-    except Error as e:
-        print(e)
-        return None, None
-
-def get_all_sales(conn):
-    """Obtém todas as vendas"""
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT s.*, u.full_name 
-            FROM sales s
-            JOIN users u ON s.user_id = u.id
-            ORDER BY s.sale_date DESC
-        """)
-        return cursor.fetchall()
-    except Error as e:
-        print(e)
-        return []
-
-def update_product_quantity(conn, product_id, quantity_sold):
-    """Atualiza a quantidade em estoque de um produto"""
-    try:
-        cursor = conn.cursor()
-        cursor.execute("UPDATE products SET quantity = quantity - ? WHERE id=?", (quantity_sold, product_id))
-        conn.commit()
-        return True
-    except Error as e:
-        print(e)
-        return False
\ No newline at end of file
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from sqlite3 import Error
+from money import Money
+
+DATABASE_FILE = 'users.db'
+
+# Valores monetários são gravados em centavos inteiros, em colunas declaradas
+# "CENTS INTEGER" (afinidade INTEGER); com PARSE_DECLTYPES elas voltam como Money
+sqlite3.register_adapter(Money, lambda money: money.cents)
+sqlite3.register_converter("CENTS", Money.from_db)
+
+class PooledConnection:
+    """Conexão emprestada do pool; close() devolve a conexão em vez de fechá-la"""
+
+    __slots__ = ('_conn', '_pool')
+
+    def __init__(self, conn, pool):
+        self._conn = conn
+        self._pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self._checked(), name)
+
+    def _checked(self):
+        conn = self._conn
+        if conn is None:
+            raise sqlite3.ProgrammingError("A conexão já foi devolvida ao pool")
+        return conn
+
+    def __enter__(self):
+        self._checked()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Mesmo comportamento de sqlite3.Connection: commit ou rollback, sem fechar
+        return self._checked().__exit__(exc_type, exc, tb)
+
+    @property
+    def raw(self):
+        """Conexão sqlite3 subjacente"""
+        return self._conn
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+class ConnectionPool:
+    """Mantém um pequeno conjunto de conexões configuradas por thread"""
+
+    def __init__(self, database=DATABASE_FILE, max_idle=2, busy_timeout=5000,
+                 journal_mode='WAL', synchronous='NORMAL', cache_size=-16000,
+                 mmap_size=268435456, health_check_interval=30.0):
+        self.database = database
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+        self.busy_timeout = busy_timeout
+        self.pragmas = (
+            f"PRAGMA journal_mode={journal_mode}",
+            f"PRAGMA busy_timeout={int(busy_timeout)}",
+            f"PRAGMA synchronous={synchronous}",
+            f"PRAGMA cache_size={int(cache_size)}",   # negativo = KiB de cache de páginas
+            f"PRAGMA mmap_size={int(mmap_size)}",
+            "PRAGMA temp_store=MEMORY",
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._closed = False
+        self._pid = os.getpid()
+
+    def _open(self):
+        conn = sqlite3.connect(self.database, timeout=self.busy_timeout / 1000,
+                               check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES)
+        try:
+            for pragma in self.pragmas:
+                conn.execute(pragma)
+        except Error:
+            conn.close()
+            raise
+        with self._lock:
+            self._connections.add(conn)
+        return conn
+
+    def _idle(self):
+        # Após um fork (multiprocessing) as conexões herdadas não podem ser usadas
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+        idle = getattr(self._local, 'idle', None)
+        if idle is None:
+            idle = self._local.idle = []
+        return idle
+
+    def _reset_after_fork(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._pid = os.getpid()
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except Error:
+            return False
+
+    def _discard(self, conn):
+        with self._lock:
+            self._connections.discard(conn)
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def acquire(self):
+        """Empresta uma conexão da thread atual, abrindo uma nova se necessário"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("O pool de conexões foi encerrado")
+        idle = self._idle()
+        now = time.monotonic()
+        while idle:
+            conn, released_at = idle.pop()
+            if now - released_at < self.health_check_interval or self._is_healthy(conn):
+                return PooledConnection(conn, self)
+            self._discard(conn)
+        return PooledConnection(self._open(), self)
+
+    def release(self, conn):
+        """Devolve uma conexão ao pool da thread atual"""
+        try:
+            if conn.in_transaction:
+                # Transação deixada aberta pelo chamador não deve vazar para o próximo uso
+                conn.rollback()
+        except Error:
+            self._discard(conn)
+            return
+        idle = self._idle()
+        if self._closed or len(idle) >= self.max_idle or conn not in self._connections:
+            self._discard(conn)
+        else:
+            idle.append((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        """Empresta uma conexão e a devolve ao final do bloco with"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close_all(self):
+        """Encerra o pool fechando todas as conexões abertas"""
+        self._closed = True
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn.execute("PRAGMA optimize")
+                conn.close()
+            except Error:
+                pass
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Retorna o pool de conexões padrão, criando-o na primeira chamada"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DATABASE_FILE)
+    return _pool
+
+def configure_database(database=DATABASE_FILE, **options):
+    """Substitui o pool padrão por um novo (outro arquivo ou outras configurações)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = ConnectionPool(database, **options)
+    return _pool
+
+def close_all_connections():
+    """Fecha todas as conexões do pool padrão (chamar ao encerrar o sistema)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+            _pool = None
+
+@contextmanager
+def pooled_connection():
+    """Empresta uma conexão do pool padrão durante um bloco with"""
+    with get_pool().connection() as conn:
+        yield conn
+
+def create_connection():
+    """Obtém uma conexão configurada do pool (close() devolve a conexão ao pool)"""
+    conn = None
+    try:
+        conn = get_pool().acquire()
+        return conn
+    except Error as e:
+        print(e)
+    return conn
+
+@contextmanager
+def transaction(conn, immediate=True):
+    """Executa um bloco em uma única transação (commit ao final, rollback em caso de erro)"""
+    # BEGIN IMMEDIATE reserva a escrita logo no início e evita deadlocks entre terminais
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+# Definições das tabelas base (usadas pela migração 1 e pelas funções create_*)
+USERS_TABLE_SQL = '''CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT NOT NULL UNIQUE,
+                    password TEXT NOT NULL,
+                    full_name TEXT NOT NULL,
+                    email TEXT,
+                    is_admin INTEGER DEFAULT 0,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                );'''
+
+PRODUCTS_TABLE_SQL = '''CREATE TABLE IF NOT EXISTS products (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    description TEXT,
+                    category TEXT,
+                    price CENTS INTEGER NOT NULL,
+                    quantity INTEGER NOT NULL,
+                    min_quantity INTEGER DEFAULT 0,
+                    supplier TEXT,
+                    barcode TEXT UNIQUE,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                );'''
+
+SALES_TABLE_SQL = '''CREATE TABLE IF NOT EXISTS sales (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sale_date TEXT DEFAULT CURRENT_TIMESTAMP,
+                    customer_name TEXT,
+                    customer_doc TEXT,
+                    subtotal CENTS INTEGER NOT NULL,
+                    discount CENTS INTEGER DEFAULT 0,
+                    total CENTS INTEGER NOT NULL,
+                    payment_method TEXT,
+                    user_id INTEGER NOT NULL,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                );'''
+
+SALE_ITEMS_TABLE_SQL = '''CREATE TABLE IF NOT EXISTS sale_items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sale_id INTEGER NOT NULL,
+                    product_id INTEGER NOT NULL,
+                    quantity INTEGER NOT NULL,
+                    unit_price CENTS INTEGER NOT NULL,
+                    total_price CENTS INTEGER NOT NULL,
+                    FOREIGN KEY (sale_id) REFERENCES sales (id),
+                    FOREIGN KEY (product_id) REFERENCES products (id)
+                );'''
+
+def create_table(conn):
+    """Cria a tabela de usuários se não existir"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute(USERS_TABLE_SQL)
+        conn.commit()
+    except Error as e:
+        print(e)
+
+def create_product_table(conn):
+    """Cria a tabela de produtos se não existir"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute(PRODUCTS_TABLE_SQL)
+        conn.commit()
+    except Error as e:
+        print(e)
+
+def create_sales_tables(conn):
+    """Cria as tabelas para vendas e itens de venda"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute(SALES_TABLE_SQL)
+        cursor.execute(SALE_ITEMS_TABLE_SQL)
+        conn.commit()
+    except Error as e:
+        print(e)
+
+def _create_products_fts(conn):
+    """Cria o índice FTS5 de produtos e os gatilhos que o mantêm sincronizado"""
+    try:
+        # unicode61 com remove_diacritics ignora acentos ("feijao" encontra "Feijão");
+        # prefix='2 3' acelera buscas por prefixos curtos enquanto o usuário digita
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                name, description, category, barcode,
+                content='products', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        # SQLite compilado sem FTS5: search_products continua usando LIKE
+        print(e)
+        return
+    
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts(rowid, name, description, category, barcode)
+            VALUES (new.id, new.name, new.description, new.category, new.barcode);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, description, category, barcode)
+            VALUES ('delete', old.id, old.name, old.description, old.category, old.barcode);
+        END
+    """)
+    # Só reindexa quando colunas pesquisáveis mudam (baixas de estoque não tocam o índice)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description, category, barcode ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name, description, category, barcode)
+            VALUES ('delete', old.id, old.name, old.description, old.category, old.barcode);
+            INSERT INTO products_fts(rowid, name, description, category, barcode)
+            VALUES (new.id, new.name, new.description, new.category, new.barcode);
+        END
+    """)
+    conn.execute("INSERT INTO products_fts(products_fts) VALUES('rebuild')")
+
+# Tabelas com contador de alterações (row_versions), usado nas atualizações incrementais
+CHANGE_TRACKED_TABLES = ('products', 'users')
+
+def _create_change_tracking(conn):
+    """Cria row_versions e os gatilhos que registram cada linha inserida, alterada ou excluída"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS row_versions (
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (table_name, row_id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_row_versions_version ON row_versions(table_name, version)")
+    
+    # Só a versão mais recente de cada linha é mantida, então a tabela não cresce com as vendas
+    for table in CHANGE_TRACKED_TABLES:
+        next_version = f"(SELECT COALESCE(MAX(version), 0) + 1 FROM row_versions WHERE table_name = '{table}')"
+        for event, row, deleted in (("INSERT", "new", 0), ("UPDATE", "new", 0), ("DELETE", "old", 1)):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    INSERT OR REPLACE INTO row_versions(table_name, row_id, version, deleted)
+                    VALUES ('{table}', {row}.id, {next_version}, {deleted});
+                END
+            """)
+
+# Índices das consultas mais frequentes e da ordenação das listas de produtos
+HOT_QUERY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_sale_items_sale_id ON sale_items(sale_id)",
+    "CREATE INDEX IF NOT EXISTS idx_sale_items_product_id ON sale_items(product_id)",
+    "CREATE INDEX IF NOT EXISTS idx_sales_sale_date ON sales(sale_date)",
+    "CREATE INDEX IF NOT EXISTS idx_sales_user_id ON sales(user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_products_category ON products(category)",
+]
+
+PRODUCT_SORT_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_products_name ON products(name)",
+    "CREATE INDEX IF NOT EXISTS idx_products_price ON products(price)",
+    "CREATE INDEX IF NOT EXISTS idx_products_quantity ON products(quantity)",
+]
+
+# Colunas monetárias de cada tabela (centavos inteiros desde a migração 6)
+MONEY_COLUMNS = {
+    'products': ('price',),
+    'sales': ('subtotal', 'discount', 'total'),
+    'sale_items': ('unit_price', 'total_price'),
+}
+
+def _convert_money_to_cents(conn):
+    """Reconstrói as tabelas com valores REAL em reais para CENTS INTEGER em centavos
+
+    Mantém nomes e posições das colunas, ids e a sequência AUTOINCREMENT; tabelas
+    já em centavos (bancos criados com o esquema atual) não são tocadas.
+    """
+    table_sql = {
+        'products': PRODUCTS_TABLE_SQL,
+        'sales': SALES_TABLE_SQL,
+        'sale_items': SALE_ITEMS_TABLE_SQL,
+    }
+    converted = False
+    for table, money_columns in MONEY_COLUMNS.items():
+        columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+        types = {column[1]: column[2].upper() for column in columns}
+        if types.get(money_columns[0]) != 'REAL':
+            continue
+        
+        names = [column[1] for column in columns]
+        select = ", ".join(
+            f"CAST(ROUND({name} * 100) AS INTEGER)" if name in money_columns else name
+            for name in names
+        )
+        sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name=?", (table,)).fetchone()
+        
+        conn.execute(table_sql[table].replace(f"EXISTS {table} (", f"EXISTS {table}_cents (", 1))
+        conn.execute(f"INSERT INTO {table}_cents ({', '.join(names)}) SELECT {select} FROM {table}")
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_cents RENAME TO {table}")
+        if sequence is not None:
+            conn.execute("UPDATE sqlite_sequence SET seq=MAX(seq, ?) WHERE name=?", (sequence[0], table))
+        converted = True
+    
+    if converted:
+        # DROP TABLE leva junto índices e gatilhos: recria os de todas as migrações anteriores
+        for sql in HOT_QUERY_INDEXES + PRODUCT_SORT_INDEXES:
+            conn.execute(sql)
+        _create_products_fts(conn)
+        _create_change_tracking(conn)
+
+# Resumos de vendas por dia (total, produto, atendente e forma de pagamento),
+# mantidos por gatilhos na mesma transação que grava, altera ou exclui a
+# venda. O dia é o de sale_date, gravado em UTC (CURRENT_TIMESTAMP).
+SALES_SUMMARY_TABLES_SQL = [
+    """CREATE TABLE IF NOT EXISTS sales_daily (
+        day TEXT PRIMARY KEY,
+        sale_count INTEGER NOT NULL DEFAULT 0,
+        subtotal CENTS INTEGER NOT NULL DEFAULT 0,
+        discount CENTS INTEGER NOT NULL DEFAULT 0,
+        total CENTS INTEGER NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS sales_daily_product (
+        day TEXT NOT NULL,
+        product_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        revenue CENTS INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, product_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS sales_daily_cashier (
+        day TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        sale_count INTEGER NOT NULL DEFAULT 0,
+        total CENTS INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, user_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS sales_daily_payment (
+        day TEXT NOT NULL,
+        payment_method TEXT NOT NULL,
+        sale_count INTEGER NOT NULL DEFAULT 0,
+        total CENTS INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, payment_method)
+    )""",
+]
+
+def _sale_summary_sql(row, sign):
+    # Soma (+) ou subtrai (-) a venda row ('new' ou 'old') nos resumos por dia, atendente e pagamento
+    return f"""
+                INSERT INTO sales_daily(day, sale_count, subtotal, discount, total)
+                VALUES (date({row}.sale_date), {sign}1, {sign}{row}.subtotal, {sign}COALESCE({row}.discount, 0), {sign}{row}.total)
+                ON CONFLICT(day) DO UPDATE SET
+                    sale_count = sale_count + excluded.sale_count,
+                    subtotal = subtotal + excluded.subtotal,
+                    discount = discount + excluded.discount,
+                    total = total + excluded.total;
+                INSERT INTO sales_daily_cashier(day, user_id, sale_count, total)
+                VALUES (date({row}.sale_date), {row}.user_id, {sign}1, {sign}{row}.total)
+                ON CONFLICT(day, user_id) DO UPDATE SET
+                    sale_count = sale_count + excluded.sale_count,
+                    total = total + excluded.total;
+                INSERT INTO sales_daily_payment(day, payment_method, sale_count, total)
+                VALUES (date({row}.sale_date), COALESCE({row}.payment_method, ''), {sign}1, {sign}{row}.total)
+                ON CONFLICT(day, payment_method) DO UPDATE SET
+                    sale_count = sale_count + excluded.sale_count,
+                    total = total + excluded.total;"""
+
+def _sale_items_summary_sql(row, sign):
+    # Soma ou subtrai, no dia da venda row, os itens que apontam para ela
+    return f"""
+                INSERT INTO sales_daily_product(day, product_id, quantity, revenue)
+                SELECT date({row}.sale_date), product_id, {sign}quantity, {sign}total_price
+                FROM sale_items WHERE sale_id = {row}.id
+                ON CONFLICT(day, product_id) DO UPDATE SET
+                    quantity = quantity + excluded.quantity,
+                    revenue = revenue + excluded.revenue;"""
+
+def _item_summary_sql(row, sign):
+    # Soma ou subtrai o item row no dia da sua venda; item sem venda não entra no resumo
+    return f"""
+                INSERT INTO sales_daily_product(day, product_id, quantity, revenue)
+                SELECT date(sale_date), {row}.product_id, {sign}{row}.quantity, {sign}{row}.total_price
+                FROM sales WHERE id = {row}.sale_id
+                ON CONFLICT(day, product_id) DO UPDATE SET
+                    quantity = quantity + excluded.quantity,
+                    revenue = revenue + excluded.revenue;"""
+
+# Gatilhos de resumo (nome, evento da tabela, corpo). Um item só é contado
+# enquanto sua venda existe, como em _rebuild_sales_summaries: a venda soma ou
+# subtrai os itens que já apontam para ela, então a ordem em que vendas e
+# itens são gravados ou excluídos não importa. Alterações subtraem os valores
+# antigos e somam os novos.
+SALES_SUMMARY_TRIGGERS = [
+    ("sales_summary_insert", "INSERT ON sales",
+     _sale_summary_sql("new", "+") + _sale_items_summary_sql("new", "+")),
+    ("sales_summary_delete", "DELETE ON sales",
+     _sale_summary_sql("old", "-") + _sale_items_summary_sql("old", "-")),
+    ("sales_summary_update", "UPDATE OF sale_date, subtotal, discount, total, payment_method, user_id ON sales",
+     _sale_summary_sql("old", "-") + _sale_summary_sql("new", "+")),
+    ("sales_summary_move_items", "UPDATE OF id, sale_date ON sales",
+     _sale_items_summary_sql("old", "-") + _sale_items_summary_sql("new", "+")),
+    ("sale_items_summary_insert", "INSERT ON sale_items", _item_summary_sql("new", "+")),
+    ("sale_items_summary_delete", "DELETE ON sale_items", _item_summary_sql("old", "-")),
+    ("sale_items_summary_update", "UPDATE OF sale_id, product_id, quantity, total_price ON sale_items",
+     _item_summary_sql("old", "-") + _item_summary_sql("new", "+")),
+]
+
+def _sales_summary_triggers():
+    """SQL dos gatilhos que mantêm os resumos em inserções, exclusões e alterações"""
+    return [f"""
+            CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} BEGIN{body}
+            END
+        """ for name, event, body in SALES_SUMMARY_TRIGGERS]
+
+def _create_sales_summaries(conn):
+    """Cria as tabelas de resumo de vendas e os gatilhos que as mantêm"""
+    for sql in SALES_SUMMARY_TABLES_SQL + _sales_summary_triggers():
+        conn.execute(sql)
+
+def _recreate_sales_summary_triggers(conn):
+    # Substitui os gatilhos da migração 7 (só inserção e exclusão) pelos atuais
+    for name, _, _ in SALES_SUMMARY_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for sql in _sales_summary_triggers():
+        conn.execute(sql)
+
+def _rebuild_sales_summaries(conn):
+    # Recalcula os resumos a partir de sales e sale_items (dentro da transação do chamador)
+    conn.execute("DELETE FROM sales_daily")
+    conn.execute("DELETE FROM sales_daily_product")
+    conn.execute("DELETE FROM sales_daily_cashier")
+    conn.execute("DELETE FROM sales_daily_payment")
+    conn.execute("""
+        INSERT INTO sales_daily(day, sale_count, subtotal, discount, total)
+        SELECT date(sale_date), COUNT(*), SUM(subtotal), SUM(COALESCE(discount, 0)), SUM(total)
+        FROM sales GROUP BY date(sale_date)
+    """)
+    conn.execute("""
+        INSERT INTO sales_daily_product(day, product_id, quantity, revenue)
+        SELECT date(s.sale_date), si.product_id, SUM(si.quantity), SUM(si.total_price)
+        FROM sale_items si JOIN sales s ON s.id = si.sale_id
+        GROUP BY date(s.sale_date), si.product_id
+    """)
+    conn.execute("""
+        INSERT INTO sales_daily_cashier(day, user_id, sale_count, total)
+        SELECT date(sale_date), user_id, COUNT(*), SUM(total)
+        FROM sales GROUP BY date(sale_date), user_id
+    """)
+    conn.execute("""
+        INSERT INTO sales_daily_payment(day, payment_method, sale_count, total)
+        SELECT date(sale_date), COALESCE(payment_method, ''), COUNT(*), SUM(total)
+        FROM sales GROUP BY date(sale_date), COALESCE(payment_method, '')
+    """)
+
+def _seed_default_admin(conn):
+    # Cria o admin padrão (usuário: admin, senha: admin123) se não houver nenhum administrador
+    if conn.execute("SELECT 1 FROM users WHERE is_admin=1 LIMIT 1").fetchone() is None:
+        conn.execute('''INSERT INTO users(username, password, full_name, email, is_admin)
+                        VALUES(?,?,?,?,?)''', ("admin", "admin123", "Administrador", "admin@system.com", 1))
+
+# Migrações do esquema, aplicadas em ordem e registradas em PRAGMA user_version.
+# Cada passo é um comando SQL ou uma função que recebe a conexão.
+MIGRATIONS = [
+    (1, "Tabelas base", [
+        USERS_TABLE_SQL,
+        PRODUCTS_TABLE_SQL,
+        SALES_TABLE_SQL,
+        SALE_ITEMS_TABLE_SQL,
+    ]),
+    (2, "Índices para as consultas mais frequentes", HOT_QUERY_INDEXES),
+    (3, "Índice de busca textual de produtos (FTS5)", [
+        _create_products_fts,
+    ]),
+    (4, "Índices para ordenação das listas paginadas de produtos", PRODUCT_SORT_INDEXES),
+    (5, "Contador de alterações por linha para atualizações incrementais", [
+        _create_change_tracking,
+    ]),
+    (6, "Valores monetários em centavos inteiros", [
+        _convert_money_to_cents,
+    ]),
+    (7, "Resumos de vendas por dia, produto, atendente e forma de pagamento", [
+        _create_sales_summaries,
+        _rebuild_sales_summaries,
+    ]),
+    (8, "Índices do histórico de vendas filtrado e paginado por (sale_date, id)", [
+        "CREATE INDEX IF NOT EXISTS idx_sales_user_date ON sales(user_id, sale_date)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_payment_date ON sales(payment_method, sale_date)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_customer_doc_date ON sales(customer_doc, sale_date)",
+        "DROP INDEX IF EXISTS idx_sales_user_id",   # prefixo de idx_sales_user_date
+    ]),
+    (9, "Administrador padrão em bancos sem nenhum administrador", [
+        _seed_default_admin,
+    ]),
+    (10, "Resumos de vendas mantidos também em alterações de vendas e itens", [
+        _recreate_sales_summary_triggers,
+        _rebuild_sales_summaries,
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn):
+    """Retorna a versão do esquema gravada no banco (PRAGMA user_version)"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """Aplica as migrações pendentes, cada uma em sua própria transação"""
+    for version, description, steps in MIGRATIONS:
+        if version <= get_schema_version(conn):
+            continue
+        with transaction(conn):
+            # Outro terminal pode ter aplicado a migração enquanto esperávamos o lock
+            if version <= get_schema_version(conn):
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+    return get_schema_version(conn)
+
+def initialize_database():
+    """Inicializa o banco de dados e cria tabelas necessárias"""
+    conn = create_connection()
+    if conn is not None:
+        # Caminho rápido: com o esquema em dia basta ler PRAGMA user_version
+        # (o admin padrão é criado pela migração 9, não a cada inicialização)
+        try:
+            if get_schema_version(conn) < SCHEMA_VERSION:
+                migrate(conn)
+        except Error as e:
+            print(e)
+        
+        conn.close()
+
+def read_change_version(conn, table_name):
+    """Como get_change_version, mas propaga os erros do SQLite"""
+    if table_name not in CHANGE_TRACKED_TABLES:
+        raise ValueError(f"Tabela sem controle de alterações: {table_name}")
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM row_versions WHERE table_name=?", (table_name,))
+    return cursor.fetchone()[0]
+
+def get_change_version(conn, table_name):
+    """Retorna a última versão de alteração registrada para a tabela"""
+    try:
+        return read_change_version(conn, table_name)
+    except Error as e:
+        print(e)
+        return 0
+
+def read_changes_since(conn, table_name, version):
+    """Como get_changes_since, mas propaga os erros do SQLite
+
+    Para quem precisa distinguir "nada mudou" de uma leitura que falhou.
+    """
+    if table_name not in CHANGE_TRACKED_TABLES:
+        raise ValueError(f"Tabela sem controle de alterações: {table_name}")
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT row_id, version, deleted FROM row_versions
+        WHERE table_name=? AND version > ?
+        ORDER BY version
+    """, (table_name, version))
+    changes = cursor.fetchall()
+    if not changes:
+        return version, [], []
+    
+    new_version = changes[-1][1]
+    deleted_ids = [row_id for row_id, _, deleted in changes if deleted]
+    changed_ids = [row_id for row_id, _, deleted in changes if not deleted]
+    
+    rows = []
+    for start in range(0, len(changed_ids), 500):
+        chunk = changed_ids[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        cursor.execute(f"SELECT * FROM {table_name} WHERE id IN ({placeholders}) ORDER BY id", chunk)
+        rows.extend(cursor.fetchall())
+    return new_version, rows, deleted_ids
+
+def get_changes_since(conn, table_name, version):
+    """Retorna (nova versão, linhas alteradas, ids excluídos) desde a versão informada
+
+    Leia a versão com get_change_version antes da carga completa: assim nenhuma
+    alteração feita durante a carga é perdida (no pior caso ela é relida).
+    """
+    try:
+        return read_changes_since(conn, table_name, version)
+    except Error as e:
+        print(e)
+        return version, [], []
+
+def add_user(conn, username, password, full_name, email, is_admin=0):
+    """Adiciona um novo usuário ao banco de dados"""
+    try:
+        sql = '''INSERT INTO users(username, password, full_name, email, is_admin)
+                 VALUES(?,?,?,?,?)'''
+        cursor = conn.cursor()
+        cursor.execute(sql, (username, password, full_name, email, is_admin))
+        conn.commit()
+        return cursor.lastrowid
+    except Error as e:
+        print(e)
+        return None
+
+def get_all_users(conn):
+    """Retorna todos os usuários do banco de dados"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users")
+        return cursor.fetchall()
+    except Error as e:
+        print(e)
+        return []
+
+def get_user_by_id(conn, user_id):
+    """Retorna um usuário específico pelo ID"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE id=?", (user_id,))
+        return cursor.fetchone()
+    except Error as e:
+        print(e)
+        return None
+
+def update_user(conn, user_id, username, password, full_name, email, is_admin):
+    """Atualiza os dados de um usuário"""
+    try:
+        sql = '''UPDATE users
+                 SET username=?, password=?, full_name=?, email=?, is_admin=?
+                 WHERE id=?'''
+        cursor = conn.cursor()
+        cursor.execute(sql, (username, password, full_name, email, is_admin, user_id))
+        conn.commit()
+        return True
+    except Error as e:
+        print(e)
+        return False
+
+def delete_user(conn, user_id):
+    """Remove um usuário do banco de dados"""
+    try:
+        sql = 'DELETE FROM users WHERE id=?'
+        cursor = conn.cursor()
+        cursor.execute(sql, (user_id,))
+        conn.commit()
+        return True
+    except Error as e:
+        print(e)
+        return False
+
+def login_user(conn, username, password):
+    """Verifica as credenciais do usuário"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE username=? AND password=?", (username, password))
+        return cursor.fetchone()
+    except Error as e:
+        print(e)
+        return None
+    
+def add_product(conn, name, description, category, price, quantity, min_quantity, supplier, barcode):
+    """Adiciona um novo produto ao banco de dados"""
+    try:
+        sql = '''INSERT INTO products(name, description, category, price, quantity, min_quantity, supplier, barcode)
+                 VALUES(?,?,?,?,?,?,?,?)'''
+        cursor = conn.cursor()
+        cursor.execute(sql, (name, description, category, Money.of(price), quantity, min_quantity, supplier, barcode))
+        conn.commit()
+        return cursor.lastrowid
+    except Error as e:
+        print(e)
+        return None
+
+def read_all_products(conn):
+    """Como get_all_products, mas propaga os erros do SQLite"""
+    return conn.execute("SELECT * FROM products").fetchall()
+
+def get_all_products(conn):
+    """Retorna todos os produtos do banco de dados"""
+    try:
+        return read_all_products(conn)
+    except Error as e:
+        print(e)
+        return []
+
+# Colunas de products que podem ordenar as listas paginadas (todas NOT NULL e indexadas)
+# e sua posição na linha (SELECT *), usada para montar a chave (valor, id) da próxima página
+PRODUCT_COLUMN_INDEX = {'id': 0, 'name': 1, 'price': 4, 'quantity': 5}
+PRODUCT_SORT_COLUMNS = tuple(PRODUCT_COLUMN_INDEX)
+
+def count_products(conn, in_stock_only=False):
+    """Retorna a quantidade de produtos (opcionalmente só os que têm estoque)"""
+    try:
+        cursor = conn.cursor()
+        if in_stock_only:
+            cursor.execute("SELECT COUNT(*) FROM products WHERE quantity > 0")
+        else:
+            cursor.execute("SELECT COUNT(*) FROM products")
+        return cursor.fetchone()[0]
+    except Error as e:
+        print(e)
+        return 0
+
+def get_products_page(conn, order_by='id', descending=False, after=None, inclusive=False,
+                      offset=None, limit=50, in_stock_only=False):
+    """Retorna uma página de produtos ordenada por (order_by, id)
+
+    after: chave (valor, id) da última linha já exibida; a página começa logo depois
+    dela no sentido da ordenação (paginação por chave, sem OFFSET). inclusive=True
+    inclui a própria chave. offset só deve ser usado para saltos da barra de rolagem.
+    """
+    if order_by not in PRODUCT_SORT_COLUMNS:
+        raise ValueError(f"Coluna de ordenação inválida: {order_by}")
+    direction = "DESC" if descending else "ASC"
+    comparison = ("<" if descending else ">") + ("=" if inclusive else "")
+    
+    conditions = []
+    params = []
+    if in_stock_only:
+        conditions.append("quantity > 0")
+    if after is not None:
+        if order_by == 'id':
+            conditions.append(f"id {comparison} ?")
+            params.append(after[1])
+        else:
+            conditions.append(f"({order_by}, id) {comparison} (?, ?)")
+            params.extend(after)
+    
+    sql = "SELECT * FROM products"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    if order_by == 'id':
+        sql += f" ORDER BY id {direction}"
+    else:
+        sql += f" ORDER BY {order_by} {direction}, id {direction}"
+    sql += " LIMIT ?"
+    params.append(limit)
+    if offset:
+        sql += " OFFSET ?"
+        params.append(offset)
+    
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    except Error as e:
+        print(e)
+        return []
+
+def get_product_by_id(conn, product_id):
+    """Retorna um produto específico pelo ID"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM products WHERE id=?", (product_id,))
+        return cursor.fetchone()
+    except Error as e:
+        print(e)
+        return None
+
+def get_product_by_barcode(conn, barcode):
+    """Retorna um produto pelo código de barras"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM products WHERE barcode=?", (barcode,))
+        return cursor.fetchone()
+    except Error as e:
+        print(e)
+        return None
+
+def update_product(conn, product_id, name, description, category, price, quantity, min_quantity, supplier, barcode):
+    """Atualiza os dados de um produto"""
+    try:
+        sql = '''UPDATE products
+                 SET name=?, description=?, category=?, price=?, quantity=?, min_quantity=?, supplier=?, barcode=?, updated_at=CURRENT_TIMESTAMP
+                 WHERE id=?'''
+        cursor = conn.cursor()
+        cursor.execute(sql, (name, description, category, Money.of(price), quantity, min_quantity, supplier, barcode, product_id))
+        conn.commit()
+        return True
+    except Error as e:
+        print(e)
+        return False
+
+def delete_product(conn, product_id):
+    """Remove um produto do banco de dados"""
+    try:
+        sql = 'DELETE FROM products WHERE id=?'
+        cursor = conn.cursor()
+        cursor.execute(sql, (product_id,))
+        conn.commit()
+        return True
+    except Error as e:
+        print(e)
+        return False
+
+# Quantidade máxima padrão de resultados devolvidos por search_products
+SEARCH_RESULT_LIMIT = 200
+
+# Pesos do bm25 por coluna do índice: nome, descrição, categoria, código de barras
+SEARCH_COLUMN_WEIGHTS = (10.0, 1.0, 3.0, 8.0)
+
+def _fts_query(search_term):
+    """Converte o texto digitado em uma consulta FTS5 por prefixo ("arroz int" -> "arroz"* "int"*)"""
+    tokens = re.findall(r"[^\W_]+", search_term)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+def search_products(conn, search_term, limit=SEARCH_RESULT_LIMIT):
+    """Busca produtos por nome, descrição, categoria ou código de barras
+
+    Usa o índice FTS5 (busca por prefixo, sem distinção de acentos, ordenada por
+    relevância bm25) e recorre a LIKE se o índice não estiver disponível.
+    """
+    try:
+        cursor = conn.cursor()
+        match = _fts_query(search_term)
+        if match:
+            try:
+                weights = ", ".join(str(w) for w in SEARCH_COLUMN_WEIGHTS)
+                cursor.execute(f"""
+                    SELECT p.* FROM products_fts
+                    JOIN products p ON p.id = products_fts.rowid
+                    WHERE products_fts MATCH ?
+                    ORDER BY bm25(products_fts, {weights})
+                    LIMIT ?
+                """, (match, limit))
+                return cursor.fetchall()
+            except sqlite3.OperationalError:
+                pass  # Sem índice FTS5 neste banco
+        
+        search_term = f"%{search_term}%"
+        cursor.execute("""
+            SELECT * FROM products 
+            WHERE name LIKE ? OR description LIKE ? OR category LIKE ? OR barcode LIKE ?
+            LIMIT ?
+        """, (search_term, search_term, search_term, search_term, limit))
+        return cursor.fetchall()
+    except Error as e:
+        print(e)
+        return []
+    
+def add_sale(conn, customer_name, customer_doc, subtotal, discount, total, payment_method, user_id):
+    """Adiciona uma nova venda ao banco de dados"""
+    try:
+        sql = '''INSERT INTO sales(customer_name, customer_doc, subtotal, discount, total, payment_method, user_id)
+                 VALUES(?,?,?,?,?,?,?)'''
+        cursor = conn.cursor()
+        cursor.execute(sql, (customer_name, customer_doc, Money.of(subtotal), Money.of(discount), Money.of(total),
+                             payment_method, user_id))
+        conn.commit()
+        return cursor.lastrowid
+    except Error as e:
+        print(e)
+        return None
+
+def add_sale_item(conn, sale_id, product_id, quantity, unit_price, total_price):
+    """Adiciona um item à venda"""
+    try:
+        sql = '''INSERT INTO sale_items(sale_id, product_id, quantity, unit_price, total_price)
+                 VALUES(?,?,?,?,?)'''
+        cursor = conn.cursor()
+        cursor.execute(sql, (sale_id, product_id, quantity, Money.of(unit_price), Money.of(total_price)))
+        conn.commit()
+        return cursor.lastrowid
+    except Error as e:
+        print(e)
+        return None
+
+def get_sale_by_id(conn, sale_id):
+    """Obtém os detalhes de uma venda"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM sales WHERE id=?", (sale_id,))
+        sale = cursor.fetchone()
+        
+        if sale:
+            cursor.execute("""
+                SELECT si.*, p.name 
+                FROM sale_items si
+                JOIN products p ON si.product_id = p.id
+                WHERE si.sale_id=?
+            """, (sale_id,))
+            items = cursor.fetchall()
+            return sale, items
+        return None, None
+    except Error as e:
+        print(e)
+        return None, None
+
+def get_sales_with_items(conn, sale_ids):
+    """Retorna [(venda, itens)] de várias vendas com duas consultas, na ordem dos ids pedidos
+
+    Mesmo formato de get_sale_by_id; ids inexistentes são omitidos.
+    """
+    sale_ids = [int(sale_id) for sale_id in sale_ids]
+    if not sale_ids:
+        return []
+    try:
+        cursor = conn.cursor()
+        ids = json.dumps(sale_ids)
+        cursor.execute("SELECT * FROM sales WHERE id IN (SELECT value FROM json_each(?))", (ids,))
+        sales = {sale[0]: sale for sale in cursor.fetchall()}
+        
+        items = {sale_id: [] for sale_id in sales}
+        cursor.execute("""
+            SELECT si.*, p.name 
+            FROM sale_items si
+            JOIN products p ON si.product_id = p.id
+            WHERE si.sale_id IN (SELECT value FROM json_each(?))
+            ORDER BY si.sale_id, si.id
+        """, (ids,))
+        for item in cursor:
+            items[item[1]].append(item)
+        
+        return [(sales[sale_id], items[sale_id]) for sale_id in dict.fromkeys(sale_ids) if sale_id in sales]
+    except Error as e:
+        print(e)
+        return []
+
+def iter_sales_with_items(conn, first_id=None, last_id=None, batch_size=500):
+    """Percorre as vendas de um intervalo de ids com seus itens, lote a lote
+
+    Gerador de (venda, itens) em ordem de id: duas consultas por lote, sem
+    manter o intervalo inteiro em memória.
+    """
+    after = (first_id - 1) if first_id is not None else None
+    while True:
+        try:
+            cursor = conn.cursor()
+            conditions = []
+            params = []
+            if after is not None:
+                conditions.append("id > ?")
+                params.append(after)
+            if last_id is not None:
+                conditions.append("id <= ?")
+                params.append(last_id)
+            sql = "SELECT * FROM sales"
+            if conditions:
+                sql += " WHERE " + " AND ".join(conditions)
+            cursor.execute(sql + " ORDER BY id LIMIT ?", params + [batch_size])
+            sales = cursor.fetchall()
+            if not sales:
+                return
+            
+            items = {sale[0]: [] for sale in sales}
+            cursor.execute("""
+                SELECT si.*, p.name 
+                FROM sale_items si
+                JOIN products p ON si.product_id = p.id
+                WHERE si.sale_id BETWEEN ? AND ?
+                ORDER BY si.sale_id, si.id
+            """, (sales[0][0], sales[-1][0]))
+            for item in cursor:
+                items[item[1]].append(item)
+        except Error as e:
+            print(e)
+            return
+        
+        for sale in sales:
+            yield sale, items[sale[0]]
+        if len(sales) < batch_size:
+            return
+        after = sales[-1][0]
+
+def _sales_filters(start_date=None, end_date=None, user_id=None, payment_method=None,
+                   customer_doc=None, min_total=None):
+    # Condições e parâmetros dos filtros do histórico de vendas
+    conditions = []
+    params = []
+    if start_date:
+        conditions.append("s.sale_date >= ?")
+        params.append(start_date)
+    if end_date:
+        # Data final inclusiva: até o fim do dia
+        conditions.append("s.sale_date < date(?, '+1 day')")
+        params.append(end_date)
+    if user_id is not None:
+        conditions.append("s.user_id = ?")
+        params.append(user_id)
+    if payment_method:
+        conditions.append("s.payment_method = ?")
+        params.append(payment_method)
+    if customer_doc:
+        conditions.append("s.customer_doc = ?")
+        params.append(customer_doc)
+    if min_total is not None:
+        conditions.append("s.total >= ?")
+        params.append(Money.of(min_total))
+    return conditions, params
+
+def get_sales_page(conn, after=None, descending=True, limit=50, inclusive=False, offset=None, **filters):
+    """Retorna uma página de vendas (s.*, nome do atendente) ordenada por (sale_date, id)
+
+    after: chave (sale_date, id) da última venda já lida; a página começa logo
+    depois dela (inclusive=True inclui a própria chave). offset só deve ser usado
+    para saltos da barra de rolagem. Filtros: start_date e end_date ('AAAA-MM-DD',
+    inclusivas), user_id, payment_method, customer_doc e min_total.
+    Vendas de usuários já excluídos aparecem com o atendente como "#id".
+    """
+    conditions, params = _sales_filters(**filters)
+    if after is not None:
+        comparison = ("<" if descending else ">") + ("=" if inclusive else "")
+        conditions.append(f"(s.sale_date, s.id) {comparison} (?, ?)")
+        params.extend(after)
+    direction = "DESC" if descending else "ASC"
+    
+    sql = """
+        SELECT s.*, COALESCE(u.full_name, '#' || s.user_id)
+        FROM sales s
+        LEFT JOIN users u ON s.user_id = u.id
+    """
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY s.sale_date {direction}, s.id {direction} LIMIT ?"
+    params.append(limit)
+    if offset:
+        sql += " OFFSET ?"
+        params.append(offset)
+    
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    except Error as e:
+        print(e)
+        return []
+
+def query_sales(conn, after=None, descending=True, limit=None, batch_size=500, **filters):
+    """Percorre as vendas filtradas em ordem de (sale_date, id), lote a lote
+
+    Gerador: cada lote é uma consulta curta por chave, então nem o histórico
+    inteiro fica em memória nem uma leitura fica aberta entre os lotes.
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = batch_size if remaining is None else min(batch_size, remaining)
+        rows = get_sales_page(conn, after=after, descending=descending, limit=size, **filters)
+        yield from rows
+        if len(rows) < size:
+            return
+        after = (rows[-1][1], rows[-1][0])
+        if remaining is not None:
+            remaining -= len(rows)
+
+def count_sales(conn, **filters):
+    """Conta as vendas que atendem aos filtros de get_sales_page"""
+    conditions, params = _sales_filters(**filters)
+    sql = "SELECT COUNT(*) FROM sales s"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchone()[0]
+    except Error as e:
+        print(e)
+        return 0
+
+def get_sale_id_range(conn, **filters):
+    """Retorna (menor id, maior id) das vendas que atendem aos filtros de get_sales_page
+
+    (None, None) se não houver vendas.
+    """
+    conditions, params = _sales_filters(**filters)
+    sql = "SELECT MIN(s.id), MAX(s.id) FROM sales s"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+    except Error as e:
+        print(e)
+        return None, None
+
+def get_all_sales(conn):
+    """Obtém todas as vendas (prefira query_sales, que filtra e lê em lotes)"""
+    return list(query_sales(conn))
+
+def update_product_quantity(conn, product_id, quantity_sold):
+    """Atualiza a quantidade em estoque de um produto"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE products SET quantity = quantity - ? WHERE id=? AND quantity >= ?",
+                       (quantity_sold, product_id, quantity_sold))
+        conn.commit()
+        return cursor.rowcount == 1  # False quando não há estoque suficiente
+    except Error as e:
+        print(e)
+        return False
+
+class _InsufficientStock(Exception):
+    """Interrompe a transação da venda quando alguma linha não tem estoque"""
+
+    def __init__(self, failed):
+        super().__init__(failed)
+        self.failed = failed
+
+def reserve_stock(conn, items):
+    """Baixa condicionalmente o estoque de vários produtos (WHERE quantity >= ?)
+
+    items: sequência de (product_id, quantity). Deve ser chamada dentro de uma
+    transação. Retorna a lista de (product_id, solicitado, disponível) das linhas
+    que não puderam ser reservadas; disponível é None se o produto não existe.
+    Quando a lista não está vazia o chamador deve desfazer a transação.
+    """
+    requested = {}
+    for product_id, quantity in items:
+        requested[int(product_id)] = requested.get(int(product_id), 0) + int(quantity)
+    if not requested:
+        return []
+    
+    cursor = conn.cursor()
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        # Um único UPDATE para o carrinho inteiro; RETURNING informa quais linhas passaram
+        cursor.execute("""
+            UPDATE products
+            SET quantity = products.quantity - r.qty
+            FROM (SELECT json_extract(value, '$[0]') AS pid, json_extract(value, '$[1]') AS qty
+                  FROM json_each(?)) AS r
+            WHERE products.id = r.pid AND products.quantity >= r.qty
+            RETURNING products.id
+        """, (json.dumps(list(requested.items())),))
+        reserved = {row[0] for row in cursor.fetchall()}
+    else:
+        reserved = set()
+        for product_id, quantity in requested.items():
+            cursor.execute("UPDATE products SET quantity = quantity - ? WHERE id=? AND quantity >= ?",
+                           (quantity, product_id, quantity))
+            if cursor.rowcount == 1:
+                reserved.add(product_id)
+    
+    missing = [product_id for product_id in requested if product_id not in reserved]
+    if not missing:
+        return []
+    
+    placeholders = ",".join("?" * len(missing))
+    cursor.execute(f"SELECT id, quantity FROM products WHERE id IN ({placeholders})", missing)
+    available = dict(cursor.fetchall())
+    return [(product_id, requested[product_id], available.get(product_id)) for product_id in missing]
+
+def write_sale(conn, header, items):
+    """Grava a venda como record_sale, mas propaga os erros do SQLite
+
+    Para quem trata bloqueios ("database is locked") com novas tentativas.
+    Retorna (sale_id, failed) como record_sale.
+    """
+    try:
+        with transaction(conn):
+            # Reserva o estoque primeiro: com BEGIN IMMEDIATE nenhum outro terminal
+            # consegue escrever entre a verificação e a baixa
+            failed = reserve_stock(conn, [(product_id, quantity) for product_id, quantity, _, _ in items])
+            if failed:
+                raise _InsufficientStock(failed)
+            
+            cursor = conn.cursor()
+            cursor.execute('''INSERT INTO sales(customer_name, customer_doc, subtotal, discount, total, payment_method, user_id)
+                              VALUES(?,?,?,?,?,?,?)''',
+                           (header["customer_name"], header["customer_doc"], Money.of(header["subtotal"]),
+                            Money.of(header["discount"]), Money.of(header["total"]),
+                            header["payment_method"], header["user_id"]))
+            sale_id = cursor.lastrowid
+            
+            # Todos os itens em um único executemany
+            cursor.executemany('''INSERT INTO sale_items(sale_id, product_id, quantity, unit_price, total_price)
+                                  VALUES(?,?,?,?,?)''',
+                               [(sale_id, product_id, quantity, Money.of(unit_price), Money.of(total_price))
+                                for product_id, quantity, unit_price, total_price in items])
+        return sale_id, []
+    except _InsufficientStock as e:
+        return None, e.failed
+
+def record_sale(conn, header, items):
+    """Registra a venda, seus itens e a baixa de estoque em uma única transação
+
+    header: dict com customer_name, customer_doc, subtotal, discount, total,
+            payment_method e user_id
+    items: sequência de (product_id, quantity, unit_price, total_price)
+    Valores monetários em Money (ou em reais, convertidos com Money.of).
+
+    Retorna (sale_id, failed). Se algum produto não tiver estoque suficiente nada
+    é gravado, sale_id é None e failed traz as linhas recusadas por reserve_stock.
+    """
+    try:
+        return write_sale(conn, header, items)
+    except Error as e:
+        print(e)
+        return None, []
+
+def is_busy_error(error):
+    """True se o erro do SQLite indica banco bloqueado por outra conexão"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+def rebuild_sales_summaries(conn):
+    """Recalcula todos os resumos de vendas (carga inicial ou correção)"""
+    try:
+        with transaction(conn):
+            _rebuild_sales_summaries(conn)
+        return True
+    except Error as e:
+        print(e)
+        return False
+
+def get_daily_sales(conn, start_day, end_day):
+    """Retorna (dia, vendas, subtotal, desconto, total) de cada dia do período (datas 'AAAA-MM-DD')"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT day, sale_count, subtotal, discount, total FROM sales_daily
+            WHERE day BETWEEN ? AND ? AND sale_count <> 0
+            ORDER BY day
+        """, (start_day, end_day))
+        return cursor.fetchall()
+    except Error as e:
+        print(e)
+        return []
+
+def get_revenue_between(conn, start_day, end_day):
+    """Retorna (vendas, total) do período somando um resumo por dia"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COALESCE(SUM(sale_count), 0), COALESCE(SUM(total), 0) FROM sales_daily
+            WHERE day BETWEEN ? AND ?
+        """, (start_day, end_day))
+        sale_count, total = cursor.fetchone()
+        return sale_count, Money(total)
+    except Error as e:
+        print(e)
+        return 0, Money(0)
+
+def get_month_to_date(conn, day=None):
+    """Retorna (vendas, total) do início do mês até o dia informado (padrão: hoje)"""
+    day = day or time.strftime("%Y-%m-%d", time.gmtime())
+    return get_revenue_between(conn, day[:8] + "01", day)
+
+def get_year_to_date(conn, day=None):
+    """Retorna (vendas, total) do início do ano até o dia informado (padrão: hoje)"""
+    day = day or time.strftime("%Y-%m-%d", time.gmtime())
+    return get_revenue_between(conn, day[:5] + "01-01", day)
+
+def get_top_products(conn, start_day, end_day, limit=10):
+    """Retorna (id, nome, quantidade, faturamento) dos produtos mais vendidos no período"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT d.product_id, p.name, SUM(d.quantity) AS quantity, SUM(d.revenue) AS revenue
+            FROM sales_daily_product d
+            LEFT JOIN products p ON p.id = d.product_id
+            WHERE d.day BETWEEN ? AND ?
+            GROUP BY d.product_id
+            HAVING SUM(d.quantity) <> 0
+            ORDER BY revenue DESC
+            LIMIT ?
+        """, (start_day, end_day, limit))
+        return [(product_id, name, quantity, Money(revenue))
+                for product_id, name, quantity, revenue in cursor.fetchall()]
+    except Error as e:
+        print(e)
+        return []
+
+def get_sales_by_cashier(conn, start_day, end_day):
+    """Retorna (id, nome, vendas, total) de cada atendente no período"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT d.user_id, u.full_name, SUM(d.sale_count), SUM(d.total) AS total
+            FROM sales_daily_cashier d
+            LEFT JOIN users u ON u.id = d.user_id
+            WHERE d.day BETWEEN ? AND ?
+            GROUP BY d.user_id
+            HAVING SUM(d.sale_count) <> 0
+            ORDER BY total DESC
+        """, (start_day, end_day))
+        return [(user_id, name, sale_count, Money(total))
+                for user_id, name, sale_count, total in cursor.fetchall()]
+    except Error as e:
+        print(e)
+        return []
+
+def get_sales_by_payment_method(conn, start_day, end_day):
+    """Retorna (forma de pagamento, vendas, total) no período"""
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT payment_method, SUM(sale_count), SUM(total) AS total
+            FROM sales_daily_payment
+            WHERE day BETWEEN ? AND ?
+            GROUP BY payment_method
+            HAVING SUM(sale_count) <> 0
+            ORDER BY total DESC
+        """, (start_day, end_day))
+        return [(payment_method, sale_count, Money(total))
+                for payment_method, sale_count, total in cursor.fetchall()]
+    except Error as e:
+        print(e)
+        return []
+
+# Com POS_DB_METRICS=1 mede latência, linhas e consultas lentas de todas as
+# funções acima (ver db_metrics.py); desligado, o módulo nem é carregado
+if os.environ.get("POS_DB_METRICS", "0") not in ("", "0"):
+    import db_metrics
+    db_metrics.instrument(globals())
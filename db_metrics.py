@@ -0,0 +1,319 @@
+import functools
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from sqlite3 import Error
+
+# Limites superiores (ms) das faixas do histograma de latência; a última é "acima de 1000 ms"
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Comandos que têm plano de execução (BEGIN, COMMIT, PRAGMA e DDL não têm)
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+# Comandos guardados por chamada lenta (executemany pode gerar milhares)
+MAX_STATEMENTS = 20
+
+# Literais do SQL expandido pelo set_trace_callback (textos, blobs e números):
+# no registro viram "?" para não gravar senhas, documentos e outros dados
+SQL_LITERAL = re.compile(r"[xX]?'(?:[^']|'')*'|\b\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+
+class FunctionStats:
+    """Contadores e histograma de latência de uma função do banco"""
+
+    __slots__ = ('calls', 'errors', 'total_ms', 'max_ms', 'rows', 'changes', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.changes = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms, rows, changes, failed):
+        self.calls += 1
+        self.errors += failed
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.changes += changes
+        for index, limit in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= limit:
+                break
+        else:
+            index = len(LATENCY_BUCKETS_MS)
+        self.buckets[index] += 1
+
+    def percentile(self, fraction):
+        """Estimativa do percentil pelo limite superior da faixa do histograma"""
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "changes": self.changes,
+            "histogram": {f"<={limit}": count for limit, count in zip(LATENCY_BUCKETS_MS, self.buckets)}
+                         | {f">{LATENCY_BUCKETS_MS[-1]}": self.buckets[-1]},
+        }
+
+class _StatementRecorder:
+    # Callback de set_trace_callback: guarda os primeiros comandos distintos da chamada
+    __slots__ = ('statements', '_seen')
+
+    def __init__(self):
+        self.statements = []
+        self._seen = set()
+
+    def __call__(self, sql):
+        # Ignora os comandos internos de gatilhos ("-- ...") e do FTS5 ('main'.'products_fts_...').
+        # Com o SQL expandido, cada gatilho disparado repete o comando que o disparou:
+        # só a primeira ocorrência é guardada.
+        if len(self.statements) >= MAX_STATEMENTS or sql.startswith("--") or "'main'." in sql:
+            return
+        if sql not in self._seen:
+            self._seen.add(sql)
+            self.statements.append(sql)
+
+def count_rows(result):
+    """Linhas devolvidas por uma função do banco (lista -> tamanho, None -> 0, demais -> 1)"""
+    if result is None or result is False:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+class QueryMetrics:
+    """Latência, linhas e erros por função de database.py, com registro de consultas lentas
+
+    Chamadas acima de slow_ms entram no registro de lentas com os comandos SQL
+    executados (valores trocados por "?", argumentos só por tipo e tamanho) e
+    o EXPLAIN QUERY PLAN de cada um. A medição é opcional: POS_DB_METRICS=1 a
+    liga (ver o fim de database.py), POS_SLOW_QUERY_MS define o limite e
+    POS_SLOW_QUERY_LOG o arquivo onde as lentas também são anotadas (nenhum
+    por padrão).
+    """
+
+    def __init__(self, enabled=True, slow_ms=100.0, log_path=None, max_slow=200):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.started_at = time.time()
+        self._stats = {}
+        self._slow = deque(maxlen=max_slow)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def configure(self, enabled=None, slow_ms=None, log_path=None):
+        if enabled is not None:
+            self.enabled = enabled
+        if slow_ms is not None:
+            self.slow_ms = slow_ms
+        if log_path is not None:
+            self.log_path = log_path or None
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+            self.started_at = time.time()
+
+    def wrap(self, func):
+        """Envolve uma função func(conn, ...) para medir cada chamada"""
+        name = func.__name__
+
+        @functools.wraps(func)
+        def instrumented(conn, *args, **kwargs):
+            if not self.enabled:
+                return func(conn, *args, **kwargs)
+            # Só a chamada mais externa da thread registra os comandos executados
+            outermost = getattr(self._local, 'depth', 0) == 0
+            recorder = None
+            if outermost:
+                recorder = _StatementRecorder()
+                try:
+                    conn.set_trace_callback(recorder)
+                except (Error, AttributeError):
+                    recorder = None
+            self._local.depth = getattr(self._local, 'depth', 0) + 1
+            try:
+                changes_before = conn.total_changes
+            except (Error, AttributeError):
+                changes_before = None
+            failed = 0
+            result = None
+            started = time.perf_counter()
+            try:
+                result = func(conn, *args, **kwargs)
+                return result
+            except BaseException:
+                failed = 1
+                raise
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self._local.depth -= 1
+                changes = 0
+                if changes_before is not None:
+                    try:
+                        changes = conn.total_changes - changes_before
+                    except (Error, AttributeError):
+                        pass
+                if recorder is not None:
+                    try:
+                        conn.set_trace_callback(None)
+                    except (Error, AttributeError):
+                        pass
+                self._record(name, elapsed_ms, count_rows(result), changes, failed)
+                if recorder is not None and elapsed_ms >= self.slow_ms:
+                    self._record_slow(conn, name, elapsed_ms, args, kwargs, recorder.statements)
+        return instrumented
+
+    def _record(self, name, elapsed_ms, rows, changes, failed):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = FunctionStats()
+            stats.add(elapsed_ms, rows, changes, failed)
+
+    def _record_slow(self, conn, name, elapsed_ms, args, kwargs, statements):
+        entry = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "function": name,
+            "duration_ms": round(elapsed_ms, 3),
+            "arguments": _describe_arguments(args, kwargs),
+            # O plano usa o SQL com os valores; o registro guarda só o texto com "?"
+            "statements": [{"sql": redact_sql(sql), "plan": explain(conn, sql)} for sql in statements],
+        }
+        with self._lock:
+            self._slow.append(entry)
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(_format_slow(entry) + "\n")
+            except OSError as e:
+                print(e)
+
+    def snapshot(self):
+        """Métricas atuais em um dicionário (o mesmo conteúdo de to_json)"""
+        with self._lock:
+            functions = {name: stats.to_dict() for name, stats in sorted(self._stats.items())}
+            slow = list(self._slow)
+        return {
+            "since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+            "slow_ms": self.slow_ms,
+            "functions": functions,
+            "slow_queries": slow,
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+
+    def to_text(self):
+        """Relatório legível para o administrador"""
+        data = self.snapshot()
+        lines = [f"Métricas do banco de dados desde {data['since']}", ""]
+        lines.append(f"{'função':<28}{'chamadas':>9}{'média':>9}{'p50':>8}{'p95':>8}{'p99':>8}"
+                     f"{'máx':>9}{'linhas':>9}{'alter.':>8}{'erros':>6}")
+        functions = sorted(data["functions"].items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        for name, stats in functions:
+            lines.append(f"{name:<28}{stats['calls']:>9}{stats['mean_ms']:>9.2f}{stats['p50_ms']:>8}"
+                         f"{stats['p95_ms']:>8}{stats['p99_ms']:>8}{stats['max_ms']:>9.1f}"
+                         f"{stats['rows']:>9}{stats['changes']:>8}{stats['errors']:>6}")
+        lines.append("")
+        lines.append(f"Consultas lentas (>= {data['slow_ms']} ms): {len(data['slow_queries'])}")
+        for entry in reversed(data["slow_queries"]):
+            lines.append("")
+            lines.append(_format_slow(entry))
+        return "\n".join(lines)
+
+    def export(self, file_path):
+        """Grava as métricas em JSON (.json) ou texto (qualquer outra extensão)"""
+        content = self.to_json() if file_path.lower().endswith(".json") else self.to_text()
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+def explain(conn, sql):
+    """Linhas de EXPLAIN QUERY PLAN de um comando (vazio para comandos sem plano)"""
+    words = sql.split(None, 1)
+    if not words or words[0].upper() not in EXPLAINABLE:
+        return []
+    try:
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    except (Error, AttributeError):
+        return []
+
+def redact_sql(sql):
+    """SQL com os valores literais trocados por "?" """
+    return SQL_LITERAL.sub("?", sql)
+
+def _describe_argument(value):
+    # Só tipo e tamanho: argumentos podem ser senhas, nomes de clientes ou documentos
+    if value is None or isinstance(value, (bool, int, float)):
+        return type(value).__name__
+    if isinstance(value, (str, bytes, list, tuple, dict, set)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+def _describe_arguments(args, kwargs):
+    parts = [_describe_argument(arg) for arg in args] + \
+        [f"{key}={_describe_argument(value)}" for key, value in kwargs.items()]
+    text = ", ".join(parts)
+    return text if len(text) <= 200 else text[:197] + "..."
+
+def _format_slow(entry):
+    lines = [f"[{entry['time']}] {entry['function']}({entry['arguments']}) {entry['duration_ms']:.1f} ms"]
+    for statement in entry["statements"]:
+        lines.append("    " + " ".join(statement["sql"].split()))
+        for detail in statement["plan"]:
+            lines.append(f"        plano: {detail}")
+    return "\n".join(lines)
+
+def instrument(namespace):
+    """Envolve as funções públicas func(conn, ...) definidas no módulo de namespace
+
+    Geradores e gerenciadores de contexto ficam de fora (suas consultas são
+    medidas pelas funções que eles chamam).
+    """
+    module_name = namespace.get("__name__")
+    for name, obj in list(namespace.items()):
+        if name.startswith("_") or not inspect.isfunction(obj) or obj.__module__ != module_name:
+            continue
+        if inspect.isgeneratorfunction(obj) or hasattr(obj, "__wrapped__"):
+            continue
+        parameters = list(inspect.signature(obj).parameters)
+        if parameters and parameters[0] == "conn":
+            namespace[name] = metrics.wrap(obj)
+
+def enabled_from_environment():
+    """Indica se POS_DB_METRICS pede a medição (desligada por padrão)"""
+    return os.environ.get("POS_DB_METRICS", "0") not in ("", "0")
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+metrics = QueryMetrics(
+    enabled=enabled_from_environment(),
+    slow_ms=_env_float("POS_SLOW_QUERY_MS", 100.0),
+    log_path=os.environ.get("POS_SLOW_QUERY_LOG") or None,
+)
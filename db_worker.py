@@ -0,0 +1,136 @@
+import queue
+import tkinter as tk
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from database import *
+
+class DBRequest:
+    """Pedido agendado no DBExecutor"""
+
+    __slots__ = ('key', 'callback', 'errback', 'background', 'future', 'cancelled')
+
+    def __init__(self, key, callback, errback, background=False):
+        self.key = key
+        self.callback = callback
+        self.errback = errback
+        self.background = background
+        self.future = None
+        self.cancelled = False
+
+class DBExecutor:
+    """Executa chamadas ao banco fora da thread do Tk e devolve o resultado via root.after"""
+
+    # Intervalo (ms) em que a thread do Tk recolhe os resultados prontos
+    POLL_INTERVAL = 15
+
+    def __init__(self, root, max_workers=2, indicator=None):
+        self.root = root
+        self.indicator = indicator   # Label que mostra "Carregando..." enquanto há pedidos
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._results = queue.Queue()
+        self._latest = {}            # chave -> pedido mais recente com essa chave
+        self._inflight = set()
+        self._poll_id = None
+        self._closed = False
+
+    def submit(self, func, *args, callback=None, errback=None, key=None, background=False):
+        """Agenda func(conn, *args) em uma thread de trabalho
+
+        callback(resultado) e errback(exceção) rodam na thread do Tk. Um novo pedido
+        com a mesma key substitui o anterior: se ele ainda não começou é cancelado,
+        senão seu resultado é descartado. Pedidos com background=True (verificações
+        periódicas) não acionam o indicador de carregamento.
+        """
+        if self._closed:
+            return None
+        if key is not None:
+            self.cancel(key)
+
+        request = DBRequest(key, callback, errback, background)
+        if key is not None:
+            self._latest[key] = request
+        self._inflight.add(request)
+        request.future = self._executor.submit(self._run, request, func, args)
+        self._update_indicator()
+        self._schedule_poll()
+        return request
+
+    def cancel(self, key):
+        """Cancela o pedido pendente com a chave informada"""
+        request = self._latest.pop(key, None)
+        if request is not None:
+            request.cancelled = True
+            if request.future is not None and request.future.cancel():
+                # Não chegou a começar: nenhum resultado será entregue
+                self._inflight.discard(request)
+            self._update_indicator()
+
+    def is_pending(self, key):
+        """Indica se há um pedido ainda não entregue com a chave informada"""
+        return key in self._latest
+
+    def shutdown(self):
+        """Encerra as threads de trabalho descartando pedidos ainda não iniciados"""
+        self._closed = True
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except tk.TclError:
+                pass
+            self._poll_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, request, func, args):
+        # Roda na thread de trabalho, com uma conexão do pool dessa thread
+        if request.cancelled:
+            self._results.put((request, None, None))
+            return
+        try:
+            with pooled_connection() as conn:
+                result = func(conn, *args)
+            self._results.put((request, result, None))
+        except Exception as e:
+            self._results.put((request, None, e))
+
+    def _schedule_poll(self):
+        if self._poll_id is None and not self._closed:
+            self._poll_id = self.root.after(self.POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        if self._closed:
+            return
+        while True:
+            try:
+                request, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._inflight.discard(request)
+            if request.cancelled:
+                continue
+            if request.key is not None and self._latest.get(request.key) is request:
+                del self._latest[request.key]
+
+            try:
+                if error is not None:
+                    if request.errback is None:
+                        raise error
+                    request.errback(error)
+                elif request.callback is not None:
+                    request.callback(result)
+            except Exception:
+                # Um callback com erro não pode impedir a entrega dos demais resultados
+                traceback.print_exc()
+
+        self._update_indicator()
+        if self._inflight:
+            self._schedule_poll()
+
+    def _update_indicator(self):
+        busy = any(not request.cancelled and not request.background for request in self._inflight)
+        try:
+            self.root.config(cursor="watch" if busy else "")
+            if self.indicator is not None:
+                self.indicator.config(text="Carregando..." if busy else "")
+        except tk.TclError:
+            pass  # Janela já destruída
@@ -1,23 +1,93 @@
-import tkinter as tk
-from database import initialize_database
-from user_interface import LoginWindow
-from menu_interface import MainMenu
-
-def main():
-    # Inicializar o banco de dados
-    initialize_database()
-    
-    # Criar a janela principal de login
-    root = tk.Tk()
-    
-    def on_login_success(user):
-        # Quando o login é bem-sucedido, criar o menu principal
-        app_root = tk.Tk()
-        app = MainMenu(app_root, user)
-        app_root.mainloop()
-    
-    login_app = LoginWindow(root, on_login_success)
-    root.mainloop()
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import time
+STARTED = time.perf_counter()
+
+import importlib
+import os
+import sys
+import threading
+import traceback
+import tkinter as tk
+from database import initialize_database, close_all_connections
+from user_interface import LoginWindow
+
+# Telas do sistema: menu_interface traz caixa, estoque, histórico e usuários, e
+# com eles fpdf, Pillow e fontTools. Só são necessárias depois do login, então
+# são carregadas em segundo plano enquanto o usuário digita a senha.
+PRELOAD_MODULES = ("menu_interface",)
+
+def preload_modules():
+    """Importa os módulos pesados fora da thread da interface"""
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            # O erro aparece de novo (e é tratado) quando o módulo for usado
+            traceback.print_exc()
+
+def start_ui_profiler():
+    """Carrega o perfil da interface só quando pedido (--profile, --profile-stacks ou POS_UI_PROFILE)"""
+    requested = "--profile" in sys.argv or "--profile-stacks" in sys.argv
+    if not requested and os.environ.get("POS_UI_PROFILE", "0") in ("", "0"):
+        return None
+    import ui_profiler
+    ui_profiler.enable_from_environment()
+    return ui_profiler
+
+def show_startup_timing(timings):
+    """Mostra os tempos de inicialização (--startup-timing ou POS_STARTUP_TIMING=1)"""
+    if "--startup-timing" not in sys.argv and os.environ.get("POS_STARTUP_TIMING", "0") in ("", "0"):
+        return
+    previous = 0.0
+    parts = []
+    for label, moment in timings:
+        parts.append(f"{label} {(moment - previous) * 1000:.0f} ms")
+        previous = moment
+    print(f"Inicialização: {', '.join(parts)} (total {previous * 1000:.0f} ms)")
+
+def main():
+    timings = [("importações", time.perf_counter() - STARTED)]
+    
+    # Modo de perfil da interface (--profile ou POS_UI_PROFILE=1): antes de criar as janelas
+    profiler = start_ui_profiler()
+    
+    # Inicializar o banco de dados
+    initialize_database()
+    timings.append(("banco", time.perf_counter() - STARTED))
+    
+    # Criar a janela principal de login
+    root = tk.Tk()
+    if profiler is not None:
+        profiler.attach(root)
+    
+    def on_login_success(user):
+        # Espera o carregamento em segundo plano, se ainda não terminou
+        from menu_interface import MainMenu
+        
+        # Quando o login é bem-sucedido, criar o menu principal
+        app_root = tk.Tk()
+        if profiler is not None:
+            profiler.attach(app_root)
+        app = MainMenu(app_root, user)
+        app_root.mainloop()
+    
+    login_app = LoginWindow(root, on_login_success)
+    root.update_idletasks()
+    timings.append(("tela de login", time.perf_counter() - STARTED))
+    show_startup_timing(timings)
+    
+    # Com a tela de login desenhada, carrega o resto do sistema
+    root.after_idle(lambda: threading.Thread(target=preload_modules, name="preload", daemon=True).start())
+    root.mainloop()
+    
+    # Fechar as conexões do pool ao encerrar (o catálogo só existe se alguma tela o usou)
+    catalog_cache = sys.modules.get("catalog_cache")
+    if catalog_cache is not None:
+        catalog_cache.catalog.close()
+    close_all_connections()
+    
+    # Relatório de fim de turno com as interações mais lentas
+    if profiler is not None:
+        profiler.finish()
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ from tkinter import ttk
 from user_interface import UserManagementApp
 from product_interface import ProductManagementApp
 from billing_interface import BillingSystem
+from sales_history_interface import SalesHistoryApp
+from metrics_interface import DatabaseMetricsApp
 
 class MainMenu:
     def __init__(self, root, current_user):
@@ -48,6 +50,16 @@ class MainMenu:
         )
         product_btn.pack(pady=15)
         
+        # Botão para Histórico de Vendas
+        history_btn = ttk.Button(
+            button_frame, 
+            text="Histórico de Vendas", 
+            command=self.open_sales_history,
+            width=30,
+            style='Big.TButton'
+        )
+        history_btn.pack(pady=15)
+        
         # Botão para Gerenciamento de Usuários
         user_btn = ttk.Button(
             button_frame, 
@@ -58,6 +70,16 @@ class MainMenu:
         )
         user_btn.pack(pady=15)
         
+        # Botão para Métricas do Banco
+        metrics_btn = ttk.Button(
+            button_frame, 
+            text="Métricas do Banco", 
+            command=self.open_database_metrics,
+            width=30,
+            style='Big.TButton'
+        )
+        metrics_btn.pack(pady=15)
+        
         # Botão para Sair
         exit_btn = ttk.Button(
             button_frame, 
@@ -96,6 +118,13 @@ class MainMenu:
         app = ProductManagementApp(product_window, self.current_user)
         product_window.protocol("WM_DELETE_WINDOW", lambda: self.on_child_close(product_window))
     
+    def open_sales_history(self):
+        """Abre o histórico de vendas"""
+        self.root.withdraw()  # Esconde a janela do menu
+        history_window = tk.Toplevel()
+        app = SalesHistoryApp(history_window, self.current_user)
+        history_window.protocol("WM_DELETE_WINDOW", lambda: self.on_child_close(history_window))
+    
     def open_user_management(self):
         """Abre a interface de gerenciamento de usuários"""
         # Verificar se o usuário é admin
@@ -108,6 +137,16 @@ class MainMenu:
         app = UserManagementApp(user_window, self.current_user)
         user_window.protocol("WM_DELETE_WINDOW", lambda: self.on_child_close(user_window))
     
+    def open_database_metrics(self):
+        """Abre as métricas de desempenho do banco de dados"""
+        if not bool(self.current_user[5]):
+            tk.messagebox.showerror("Acesso Negado", "Apenas administradores podem acessar as métricas do banco")
+            return
+        
+        # Janela avulsa: o menu continua visível para comparar antes e depois de uma operação
+        metrics_window = tk.Toplevel()
+        app = DatabaseMetricsApp(metrics_window, self.current_user)
+    
     def on_child_close(self, child_window):
         """Função chamada quando uma janela filha é fechada"""
         child_window.destroy()
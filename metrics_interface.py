@@ -0,0 +1,90 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from db_metrics import metrics
+
+class DatabaseMetricsApp:
+    def __init__(self, root, current_user):
+        self.root = root
+        self.current_user = current_user
+        self.root.title("Métricas do Banco de Dados")
+        self.root.geometry("1000x650")
+
+        # Criar widgets
+        self.create_widgets()
+        self.refresh()
+
+    def create_widgets(self):
+        # Frame principal
+        self.main_frame = ttk.Frame(self.root, padding="10")
+        self.main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # Limite de consulta lenta
+        options_frame = ttk.Frame(self.main_frame)
+        options_frame.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Label(options_frame, text="Consulta lenta a partir de (ms):").pack(side=tk.LEFT)
+        self.slow_ms_var = tk.StringVar(value=f"{metrics.slow_ms:g}")
+        ttk.Entry(options_frame, textvariable=self.slow_ms_var, width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Button(options_frame, text="Aplicar", command=self.apply_threshold).pack(side=tk.LEFT)
+
+        # Relatório em texto
+        text_frame = ttk.Frame(self.main_frame)
+        text_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.text = tk.Text(text_frame, wrap=tk.NONE, font=('Courier', 10))
+        y_scroll = ttk.Scrollbar(text_frame, orient=tk.VERTICAL, command=self.text.yview)
+        x_scroll = ttk.Scrollbar(text_frame, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
+        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
+        self.text.pack(fill=tk.BOTH, expand=True)
+
+        # Botões
+        button_frame = ttk.Frame(self.main_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+
+        ttk.Button(button_frame, text="Atualizar", command=self.refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Exportar JSON", command=lambda: self.export(".json")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Exportar Texto", command=lambda: self.export(".txt")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Zerar", command=self.reset).pack(side=tk.LEFT, padx=5)
+
+        if not metrics.enabled:
+            ttk.Label(button_frame, text="Medição desligada (inicie o sistema com POS_DB_METRICS=1)").pack(side=tk.RIGHT)
+
+    def refresh(self):
+        """Recarrega o relatório"""
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", metrics.to_text())
+        self.text.config(state=tk.DISABLED)
+
+    def apply_threshold(self):
+        try:
+            slow_ms = float(self.slow_ms_var.get().replace(",", "."))
+        except ValueError:
+            messagebox.showerror("Erro", "Informe o limite em milissegundos")
+            return
+        metrics.configure(slow_ms=slow_ms)
+        self.refresh()
+
+    def export(self, extension):
+        """Salva as métricas em JSON ou texto"""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=extension,
+            filetypes=[("JSON", "*.json")] if extension == ".json" else [("Texto", "*.txt")],
+            title="Exportar Métricas",
+            initialfile=f"metricas_banco{extension}"
+        )
+        if not file_path:
+            return
+        try:
+            metrics.export(file_path)
+        except OSError as e:
+            messagebox.showerror("Erro", f"Não foi possível salvar:\n{e}")
+            return
+        messagebox.showinfo("Sucesso", f"Métricas salvas em:\n{file_path}")
+
+    def reset(self):
+        if messagebox.askyesno("Confirmar", "Zerar as métricas coletadas até agora?"):
+            metrics.reset()
+            self.refresh()
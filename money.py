@@ -0,0 +1,120 @@
+import operator
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import total_ordering
+
+@total_ordering
+class Money:
+    """Valor monetário em centavos inteiros
+
+    Somas e multiplicações por quantidades são exatas. f"{valor:.2f}" continua
+    funcionando, e o banco grava/lê os centavos (ver database.py).
+    """
+
+    __slots__ = ('cents',)
+
+    def __init__(self, cents=0):
+        self.cents = int(cents)
+
+    @classmethod
+    def of(cls, value):
+        """Converte um valor em reais (número, Decimal ou texto) para Money"""
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, str):
+            return cls.parse(value)
+        if isinstance(value, float):
+            value = repr(value)   # 0.1 -> "0.1", não 0.1000000000000000055...
+        try:
+            amount = Decimal(value)
+        except (InvalidOperation, TypeError, ValueError):
+            raise ValueError(f"Valor monetário inválido: {value!r}")
+        return cls(int((amount * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP)))
+
+    @classmethod
+    def parse(cls, text):
+        """Lê um valor digitado: "12.50", "12,50", "R$ 1.234,56" ou "1,234.56" """
+        text = re.sub(r"\s|R\$", "", str(text))
+        if "," in text and "." in text:
+            # O separador que aparece por último é o decimal
+            thousands = "." if text.rfind(",") > text.rfind(".") else ","
+            text = text.replace(thousands, "")
+        text = text.replace(",", ".")
+        if not re.fullmatch(r"-?\d*\.?\d+|-?\d+\.", text):
+            raise ValueError(f"Valor monetário inválido: {text!r}")
+        return cls.of(Decimal(text))
+
+    @classmethod
+    def from_db(cls, raw):
+        """Conversor do sqlite3 para colunas CENTS"""
+        try:
+            return cls(int(raw))
+        except ValueError:
+            return cls(round(float(raw)))
+
+    def to_decimal(self):
+        return Decimal(self.cents).scaleb(-2)
+
+    def __format__(self, spec):
+        return format(self.to_decimal(), spec or ".2f")
+
+    def __str__(self):
+        return format(self, ".2f")
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def __float__(self):
+        return self.cents / 100
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def __hash__(self):
+        # Hash do valor em reais como float: igual ao de 1, 1.5 ou 19.99 quando Money
+        # é igual a eles. A igualdade arredonda para o centavo, então nenhum hash
+        # acompanha todos os casos (Decimal("0.10"), 19.991): não misture Money e
+        # números não inteiros como chaves do mesmo dict ou set.
+        return hash(float(self))
+
+    def _other_cents(self, other):
+        if isinstance(other, Money):
+            return other.cents
+        if isinstance(other, (int, float, Decimal)) and not isinstance(other, bool):
+            return Money.of(other).cents
+        return None
+
+    def _compare(self, other, compare):
+        # Números são convertidos com Money.of, como nas somas: Money.of(0.1) == 0.1
+        cents = self._other_cents(other)
+        return NotImplemented if cents is None else compare(self.cents, cents)
+
+    def __eq__(self, other):
+        return self._compare(other, operator.eq)
+
+    def __lt__(self, other):
+        return self._compare(other, operator.lt)
+
+    def __add__(self, other):
+        cents = self._other_cents(other)
+        return NotImplemented if cents is None else Money(self.cents + cents)
+
+    __radd__ = __add__   # sum() começa em 0
+
+    def __sub__(self, other):
+        cents = self._other_cents(other)
+        return NotImplemented if cents is None else Money(self.cents - cents)
+
+    def __rsub__(self, other):
+        cents = self._other_cents(other)
+        return NotImplemented if cents is None else Money(cents - self.cents)
+
+    def __mul__(self, quantity):
+        if isinstance(quantity, int) and not isinstance(quantity, bool):
+            return Money(self.cents * quantity)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.cents)
@@ -1,6 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database import *
+from money import Money
+from db_worker import DBExecutor
+from virtual_list import VirtualTreeview, ProductPageSource, ListSource
+from search_cache import SearchCache
+from catalog_cache import catalog
+
+# Espera (ms) após a última tecla antes de pesquisar enquanto o usuário digita
+SEARCH_DEBOUNCE_MS = 250
 
 class ProductManagementApp:
     def __init__(self, root, current_user):
@@ -14,9 +22,26 @@ class ProductManagementApp:
         # Verificar se o usuário atual é admin
         self.is_admin = bool(current_user[5])  # is_admin está na posição 5
         
+        # Máximo de resultados exibidos por pesquisa
+        self.search_limit = SEARCH_RESULT_LIMIT
+        
+        # Pesquisa enquanto digita: cache das últimas buscas e agendamento com espera
+        self.search_cache = SearchCache()
+        self.search_after_id = None
+        self.search_term = ""
+        
         # Criar widgets
         self.create_widgets()
         
+        # Consultas ao banco rodam fora da thread da interface
+        self.db = DBExecutor(self.root, indicator=self.loading_label)
+        self.tree.executor = self.db
+        self.root.bind('<Destroy>', self.on_destroy)
+        
+        # Alterações no catálogo (desta ou de outras janelas/caixas) chegam como linhas pontuais
+        catalog.subscribe(self.on_catalog_changed)
+        catalog.watch(self.root, self.db)
+        
         # Carregar dados
         self.load_products()
         
@@ -51,13 +76,21 @@ class ProductManagementApp:
         self.search_button = ttk.Button(self.search_frame, text="Buscar", command=self.search_products)
         self.search_button.pack(side=tk.LEFT)
         self.search_entry.bind('<Return>', lambda event: self.search_products())
+        self.search_entry.bind('<KeyRelease>', self.on_search_key)
         
         # Treeview para exibir produtos
         self.tree_frame = ttk.Frame(self.main_frame)
         self.tree_frame.pack(fill=tk.BOTH, expand=True)
         
+        # Lista virtualizada: só a janela visível é buscada no banco
         columns = ("ID", "Nome", "Categoria", "Preço", "Quantidade", "Mínimo", "Fornecedor", "Código")
-        self.tree = ttk.Treeview(self.tree_frame, columns=columns, show="headings")
+        self.product_source = ProductPageSource(self.format_product)
+        self.tree = VirtualTreeview(self.tree_frame, columns=columns, sort_columns={
+            "ID": "id",
+            "Nome": "name",
+            "Preço": "price",
+            "Quantidade": "quantity"
+        })
         
         # Configurar colunas
         self.tree.heading("ID", text="ID")
@@ -78,10 +111,6 @@ class ProductManagementApp:
         self.tree.column("Fornecedor", width=150)
         self.tree.column("Código", width=120)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.tree.pack(fill=tk.BOTH, expand=True)
         
         # Barra de status
@@ -91,63 +120,87 @@ class ProductManagementApp:
         self.status_label = ttk.Label(self.status_frame, text=f"Logado como: {self.current_user[3]} ({'Admin' if self.is_admin else 'Usuário'})")
         self.status_label.pack(side=tk.LEFT)
         
+        self.loading_label = ttk.Label(self.status_frame, text="")
+        self.loading_label.pack(side=tk.RIGHT)
+        
         # Desabilitar botões se não for admin
         if not self.is_admin:
             self.add_button.config(state=tk.DISABLED)
             self.edit_button.config(state=tk.DISABLED)
             self.delete_button.config(state=tk.DISABLED)
     
+    def format_product(self, product):
+        return (
+            product[0],  # ID
+            product[1],  # Nome
+            product[3],  # Categoria
+            f"{product[4]:.2f}",  # Preço
+            product[5],  # Quantidade
+            product[6],  # Mínimo
+            product[7],  # Fornecedor
+            product[8]   # Código de barras
+        )
+    
+    def on_destroy(self, event):
+        if event.widget is self.root:
+            catalog.unsubscribe(self.on_catalog_changed)
+            self.db.shutdown()
+    
     def load_products(self):
-        # Limpar treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Carregar produtos do banco de dados
-        conn = create_connection()
-        if conn is not None:
-            products = get_all_products(conn)
-            conn.close()
-            
-            for product in products:
-                self.tree.insert("", tk.END, values=(
-                    product[0],  # ID
-                    product[1],  # Nome
-                    product[3],  # Categoria
-                    f"{product[4]:.2f}",  # Preço
-                    product[5],  # Quantidade
-                    product[6],  # Mínimo
-                    product[7],  # Fornecedor
-                    product[8]   # Código de barras
-                ))
+        # Volta para a listagem paginada de todos os produtos
+        if self.tree.source is self.product_source:
+            self.refresh_products()
+        else:
+            self.tree.set_source(self.product_source)
+    
+    def refresh_products(self):
+        """Aplica na lista apenas os produtos alterados desde a última atualização"""
+        catalog.refresh(self.db)
+    
+    def on_catalog_changed(self, changed, deleted):
+        self.search_cache.invalidate(catalog.version)
+        self.tree.apply_changes(changed, deleted)
+    
+    def on_search_key(self, event):
+        """Agenda a pesquisa para quando o usuário parar de digitar"""
+        if self.search_entry.get().strip() == self.search_term:
+            return  # Tecla que não alterou o termo (setas, Shift...)
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self.search_products)
     
     def search_products(self):
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+            self.search_after_id = None
+        
         search_term = self.search_entry.get().strip()
+        self.search_term = search_term
         
         if not search_term:
             self.load_products()
             return
         
-        # Limpar treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Buscar produtos
-        conn = create_connection()
-        if conn is not None:
-            products = search_products(conn, search_term)
-            conn.close()
-            
-            for product in products:
-                self.tree.insert("", tk.END, values=(
-                    product[0],  # ID
-                    product[1],  # Nome
-                    product[3],  # Categoria
-                    f"{product[4]:.2f}",  # Preço
-                    product[5],  # Quantidade
-                    product[6],  # Mínimo
-                    product[7],  # Fornecedor
-                    product[8]   # Código de barras
-                ))
+        # Termo já pesquisado (ou extensão de um resultado completo): sem ir ao banco
+        products = self.search_cache.get(search_term)
+        if products is not None:
+            self.db.cancel("products")
+            self.tree.set_source(ListSource(products, self.format_product))
+            return
+        
+        # Buscar produtos (resultado limitado, exibido na mesma lista virtualizada);
+        # uma nova busca cancela a anterior ainda em andamento
+        self.db.submit(
+            lambda conn: (get_change_version(conn, 'products'), search_products(conn, search_term, self.search_limit)),
+            callback=lambda result: self.on_search_results(search_term, result),
+            key="products"
+        )
+    
+    def on_search_results(self, search_term, result):
+        version, products = result
+        self.search_cache.invalidate(version)
+        self.search_cache.put(search_term, products, len(products) < self.search_limit)
+        self.tree.set_source(ListSource(products, self.format_product))
     
     def show_add_product_dialog(self):
         dialog = tk.Toplevel(self.root)
@@ -225,24 +278,23 @@ class ProductManagementApp:
             return
         
         try:
-            price = float(price)
+            price = Money.parse(price)
             quantity = int(quantity)
             min_quantity = int(min_quantity) if min_quantity else 0
         except ValueError:
             messagebox.showerror("Erro", "Preço deve ser um número decimal e quantidade deve ser um número inteiro")
             return
         
-        conn = create_connection()
-        if conn is not None:
-            product_id = add_product(conn, name, description, category, price, quantity, min_quantity, supplier, barcode)
-            conn.close()
-            
-            if product_id:
-                messagebox.showinfo("Sucesso", "Produto adicionado com sucesso!")
-                dialog.destroy()
-                self.load_products()
-            else:
-                messagebox.showerror("Erro", "Não foi possível adicionar o produto. O código de barras pode já estar em uso.")
+        self.db.submit(add_product, name, description, category, price, quantity, min_quantity, supplier, barcode,
+                       callback=lambda product_id: self.on_product_added(dialog, product_id))
+    
+    def on_product_added(self, dialog, product_id):
+        if product_id:
+            messagebox.showinfo("Sucesso", "Produto adicionado com sucesso!")
+            dialog.destroy()
+            self.refresh_products()
+        else:
+            messagebox.showerror("Erro", "Não foi possível adicionar o produto. O código de barras pode já estar em uso.")
     
     def show_edit_product_dialog(self):
         selected_item = self.tree.selection()
@@ -252,89 +304,89 @@ class ProductManagementApp:
         
         product_id = self.tree.item(selected_item[0], "values")[0]
         
-        conn = create_connection()
-        if conn is not None:
-            product = get_product_by_id(conn, product_id)
-            conn.close()
-            
-            if product:
-                dialog = tk.Toplevel(self.root)
-                dialog.title("Editar Produto")
-                
-                # Centralizar a janela
-                window_width = 500
-                window_height = 400
-                screen_width = dialog.winfo_screenwidth()
-                screen_height = dialog.winfo_screenheight()
-                x = (screen_width - window_width) // 2
-                y = (screen_height - window_height) // 2
-                dialog.geometry(f"{window_width}x{window_height}+{x}+{y}")
-                
-                # Frame principal
-                frame = ttk.Frame(dialog, padding="10")
-                frame.pack(fill=tk.BOTH, expand=True)
-                
-                # Widgets
-                ttk.Label(frame, text="Nome do Produto:").grid(row=0, column=0, sticky=tk.W, pady=5)
-                name_entry = ttk.Entry(frame)
-                name_entry.insert(0, product[1])
-                name_entry.grid(row=0, column=1, sticky=tk.EW, pady=5)
-                
-                ttk.Label(frame, text="Descrição:").grid(row=1, column=0, sticky=tk.W, pady=5)
-                description_entry = ttk.Entry(frame)
-                description_entry.insert(0, product[2])
-                description_entry.grid(row=1, column=1, sticky=tk.EW, pady=5)
-                
-                ttk.Label(frame, text="Categoria:").grid(row=2, column=0, sticky=tk.W, pady=5)
-                category_entry = ttk.Entry(frame)
-                category_entry.insert(0, product[3])
-                category_entry.grid(row=2, column=1, sticky=tk.EW, pady=5)
-                
-                ttk.Label(frame, text="Preço (R$):").grid(row=3, column=0, sticky=tk.W, pady=5)
-                price_entry = ttk.Entry(frame)
-                price_entry.insert(0, str(product[4]))
-                price_entry.grid(row=3, column=1, sticky=tk.EW, pady=5)
-                
-                ttk.Label(frame, text="Quantidade:").grid(row=4, column=0, sticky=tk.W, pady=5)
-                quantity_entry = ttk.Entry(frame)
-                quantity_entry.insert(0, str(product[5]))
-                quantity_entry.grid(row=4, column=1, sticky=tk.EW, pady=5)
-                
-                ttk.Label(frame, text="Quantidade Mínima:").grid(row=5, column=0, sticky=tk.W, pady=5)
-                min_quantity_entry = ttk.Entry(frame)
-                min_quantity_entry.insert(0, str(product[6]))
-                min_quantity_entry.grid(row=5, column=1, sticky=tk.EW, pady=5)
-                
-                ttk.Label(frame, text="Fornecedor:").grid(row=6, column=0, sticky=tk.W, pady=5)
-                supplier_entry = ttk.Entry(frame)
-                supplier_entry.insert(0, product[7] if product[7] else "")
-                supplier_entry.grid(row=6, column=1, sticky=tk.EW, pady=5)
-                
-                ttk.Label(frame, text="Código de Barras:").grid(row=7, column=0, sticky=tk.W, pady=5)
-                barcode_entry = ttk.Entry(frame)
-                barcode_entry.insert(0, product[8] if product[8] else "")
-                barcode_entry.grid(row=7, column=1, sticky=tk.EW, pady=5)
-                
-                button_frame = ttk.Frame(frame)
-                button_frame.grid(row=8, column=0, columnspan=2, pady=10)
-                
-                ttk.Button(button_frame, text="Salvar", command=lambda: self.update_product(
-                    dialog,
-                    product[0],
-                    name_entry.get(),
-                    description_entry.get(),
-                    category_entry.get(),
-                    price_entry.get(),
-                    quantity_entry.get(),
-                    min_quantity_entry.get(),
-                    supplier_entry.get(),
-                    barcode_entry.get()
-                )).pack(side=tk.LEFT, padx=5)
-                
-                ttk.Button(button_frame, text="Cancelar", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
-                
-                # Configurar expansão das colunas
-                frame.columnconfigure(1, weight=1)
+        self.db.submit(get_product_by_id, product_id, callback=self.open_edit_product_dialog)
+    
+    def open_edit_product_dialog(self, product):
+        if not product:
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Editar Produto")
+        
+        # Centralizar a janela
+        window_width = 500
+        window_height = 400
+        screen_width = dialog.winfo_screenwidth()
+        screen_height = dialog.winfo_screenheight()
+        x = (screen_width - window_width) // 2
+        y = (screen_height - window_height) // 2
+        dialog.geometry(f"{window_width}x{window_height}+{x}+{y}")
+        
+        # Frame principal
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Widgets
+        ttk.Label(frame, text="Nome do Produto:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        name_entry = ttk.Entry(frame)
+        name_entry.insert(0, product[1])
+        name_entry.grid(row=0, column=1, sticky=tk.EW, pady=5)
+        
+        ttk.Label(frame, text="Descrição:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        description_entry = ttk.Entry(frame)
+        description_entry.insert(0, product[2])
+        description_entry.grid(row=1, column=1, sticky=tk.EW, pady=5)
+        
+        ttk.Label(frame, text="Categoria:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        category_entry = ttk.Entry(frame)
+        category_entry.insert(0, product[3])
+        category_entry.grid(row=2, column=1, sticky=tk.EW, pady=5)
+        
+        ttk.Label(frame, text="Preço (R$):").grid(row=3, column=0, sticky=tk.W, pady=5)
+        price_entry = ttk.Entry(frame)
+        price_entry.insert(0, str(product[4]))
+        price_entry.grid(row=3, column=1, sticky=tk.EW, pady=5)
+        
+        ttk.Label(frame, text="Quantidade:").grid(row=4, column=0, sticky=tk.W, pady=5)
+        quantity_entry = ttk.Entry(frame)
+        quantity_entry.insert(0, str(product[5]))
+        quantity_entry.grid(row=4, column=1, sticky=tk.EW, pady=5)
+        
+        ttk.Label(frame, text="Quantidade Mínima:").grid(row=5, column=0, sticky=tk.W, pady=5)
+        min_quantity_entry = ttk.Entry(frame)
+        min_quantity_entry.insert(0, str(product[6]))
+        min_quantity_entry.grid(row=5, column=1, sticky=tk.EW, pady=5)
+        
+        ttk.Label(frame, text="Fornecedor:").grid(row=6, column=0, sticky=tk.W, pady=5)
+        supplier_entry = ttk.Entry(frame)
+        supplier_entry.insert(0, product[7] if product[7] else "")
+        supplier_entry.grid(row=6, column=1, sticky=tk.EW, pady=5)
+        
+        ttk.Label(frame, text="Código de Barras:").grid(row=7, column=0, sticky=tk.W, pady=5)
+        barcode_entry = ttk.Entry(frame)
+        barcode_entry.insert(0, product[8] if product[8] else "")
+        barcode_entry.grid(row=7, column=1, sticky=tk.EW, pady=5)
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.grid(row=8, column=0, columnspan=2, pady=10)
+        
+        ttk.Button(button_frame, text="Salvar", command=lambda: self.update_product(
+            dialog,
+            product[0],
+            name_entry.get(),
+            description_entry.get(),
+            category_entry.get(),
+            price_entry.get(),
+            quantity_entry.get(),
+            min_quantity_entry.get(),
+            supplier_entry.get(),
+            barcode_entry.get()
+        )).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(button_frame, text="Cancelar", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+        
+        # Configurar expansão das colunas
+        frame.columnconfigure(1, weight=1)
     
     def update_product(self, dialog, product_id, name, description, category, price, quantity, min_quantity, supplier, barcode):
         if not name or not price or not quantity:
@@ -342,24 +394,23 @@ class ProductManagementApp:
             return
         
         try:
-            price = float(price)
+            price = Money.parse(price)
             quantity = int(quantity)
             min_quantity = int(min_quantity) if min_quantity else 0
         except ValueError:
             messagebox.showerror("Erro", "Preço deve ser um número decimal e quantidade deve ser um número inteiro")
             return
         
-        conn = create_connection()
-        if conn is not None:
-            success = update_product(conn, product_id, name, description, category, price, quantity, min_quantity, supplier, barcode)
-            conn.close()
-            
-            if success:
-                messagebox.showinfo("Sucesso", "Produto atualizado com sucesso!")
-                dialog.destroy()
-                self.load_products()
-            else:
-                messagebox.showerror("Erro", "Não foi possível atualizar o produto. O código de barras pode já estar em uso.")
+        self.db.submit(update_product, product_id, name, description, category, price, quantity, min_quantity, supplier, barcode,
+                       callback=lambda success: self.on_product_updated(dialog, success))
+    
+    def on_product_updated(self, dialog, success):
+        if success:
+            messagebox.showinfo("Sucesso", "Produto atualizado com sucesso!")
+            dialog.destroy()
+            self.refresh_products()
+        else:
+            messagebox.showerror("Erro", "Não foi possível atualizar o produto. O código de barras pode já estar em uso.")
     
     def delete_product(self):
         selected_item = self.tree.selection()
@@ -371,13 +422,11 @@ class ProductManagementApp:
         product_name = self.tree.item(selected_item[0], "values")[1]
         
         if messagebox.askyesno("Confirmar", f"Tem certeza que deseja excluir o produto '{product_name}'?"):
-            conn = create_connection()
-            if conn is not None:
-                success = delete_product(conn, product_id)
-                conn.close()
-                
-                if success:
-                    messagebox.showinfo("Sucesso", "Produto excluído com sucesso!")
-                    self.load_products()
-                else:
-                    messagebox.showerror("Erro", "Não foi possível excluir o produto")
\ No newline at end of file
+            self.db.submit(delete_product, product_id, callback=self.on_product_deleted)
+    
+    def on_product_deleted(self, success):
+        if success:
+            messagebox.showinfo("Sucesso", "Produto excluído com sucesso!")
+            self.refresh_products()
+        else:
+            messagebox.showerror("Erro", "Não foi possível excluir o produto")
\ No newline at end of file
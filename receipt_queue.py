@@ -0,0 +1,140 @@
+import queue
+import threading
+import tkinter as tk
+import traceback
+from database import *
+from receipts import build_receipt_data, create_pdf, print_pdf
+
+# Situações de um pedido de nota fiscal
+STATUS_QUEUED = "na fila"
+STATUS_RUNNING = "gerando"
+STATUS_RETRY = "aguardando nova tentativa"
+STATUS_DONE = "concluída"
+STATUS_FAILED = "falhou"
+
+class ReceiptJob:
+    """Pedido de impressão ou gravação de uma nota fiscal"""
+
+    __slots__ = ('sale_id', 'cashier', 'action', 'file_path', 'quiet', 'preview',
+                 'receipt_data', 'attempts', 'status', 'error')
+
+    def __init__(self, sale_id, cashier, action, file_path, quiet, receipt_data, preview=False):
+        self.sale_id = sale_id
+        self.cashier = cashier
+        self.action = action            # "print" ou "save"
+        self.file_path = file_path
+        self.quiet = quiet              # True: só atualiza a barra de status, sem diálogos
+        self.preview = preview          # True: nota do carrinho, ainda sem venda gravada
+        self.receipt_data = receipt_data
+        self.attempts = 0
+        self.status = STATUS_QUEUED
+        self.error = None
+
+class ReceiptQueue:
+    """Fila de notas fiscais: uma thread gera e imprime os PDFs fora da thread do Tk
+
+    on_status(job) é chamado na thread do Tk a cada mudança de situação. Falhas
+    são tentadas de novo até max_attempts vezes, com espera crescente, sem
+    bloquear as notas seguintes.
+    """
+
+    # Intervalo (ms) em que a thread do Tk recolhe as mudanças de situação
+    POLL_INTERVAL = 100
+
+    def __init__(self, root, on_status=None, max_attempts=3, retry_delay=2.0):
+        self.root = root
+        self.on_status = on_status
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._jobs = queue.Queue()
+        self._updates = queue.Queue()
+        self._pending = 0             # pedidos ainda não concluídos (só usado na thread do Tk)
+        self._poll_id = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="receipts", daemon=True)
+        self._thread.start()
+
+    def submit(self, sale_id, cashier, action="print", file_path=None, quiet=False, receipt_data=None,
+               preview=False):
+        """Agenda a nota da venda; receipt_data evita reler a venda do banco"""
+        if self._closed:
+            return None
+        job = ReceiptJob(sale_id, cashier, action, file_path, quiet, receipt_data, preview)
+        self._pending += 1
+        self._jobs.put(job)
+        self._schedule_poll()
+        return job
+
+    def shutdown(self):
+        """Encerra a thread depois do pedido em andamento; pedidos na fila são descartados"""
+        self._closed = True
+        self._jobs.put(None)
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except tk.TclError:
+                pass
+            self._poll_id = None
+
+    def _worker(self):
+        while True:
+            job = self._jobs.get()
+            if job is None or self._closed:
+                return
+            self._process(job)
+
+    def _process(self, job):
+        job.attempts += 1
+        self._report(job, STATUS_RUNNING)
+        try:
+            if job.receipt_data is None:
+                with pooled_connection() as conn:
+                    sale, items = get_sale_by_id(conn, job.sale_id)
+                if not sale:
+                    raise LookupError(f"Venda {job.sale_id} não encontrada")
+                job.receipt_data = build_receipt_data(sale, items or [], job.cashier)
+
+            if job.action == "save":
+                create_pdf(job.receipt_data, job.file_path)
+            else:
+                print_pdf(job.receipt_data)
+        except Exception as e:
+            job.error = e
+            if job.attempts >= self.max_attempts or isinstance(e, LookupError):
+                self._report(job, STATUS_FAILED)
+                return
+            # Nova tentativa mais tarde; a fila segue atendendo as outras notas
+            self._report(job, STATUS_RETRY)
+            timer = threading.Timer(self.retry_delay * job.attempts, self._jobs.put, (job,))
+            timer.daemon = True
+            timer.start()
+            return
+        job.error = None
+        self._report(job, STATUS_DONE)
+
+    def _report(self, job, status):
+        self._updates.put((job, status))
+
+    def _schedule_poll(self):
+        if self._poll_id is None and not self._closed:
+            self._poll_id = self.root.after(self.POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        if self._closed:
+            return
+        while True:
+            try:
+                job, status = self._updates.get_nowait()
+            except queue.Empty:
+                break
+            job.status = status
+            if status in (STATUS_DONE, STATUS_FAILED):
+                self._pending -= 1
+            if self.on_status is not None:
+                try:
+                    self.on_status(job)
+                except Exception:
+                    traceback.print_exc()
+        if self._pending > 0:
+            self._schedule_poll()
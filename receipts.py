@@ -0,0 +1,225 @@
+import os
+import subprocess
+import tempfile
+from fpdf import FPDF
+
+def build_receipt_data(sale, items, cashier):
+    """Monta os dados da nota fiscal a partir de get_sale_by_id (venda e itens)"""
+    receipt_data = {
+        "sale_id": sale[0],
+        "date": sale[1],
+        "customer_name": sale[2],
+        "customer_doc": sale[3],
+        "subtotal": sale[4],
+        "discount": sale[5],
+        "total": sale[6],
+        "payment_method": sale[7],
+        "cashier": cashier,
+        "items": []
+    }
+    
+    for item in items:
+        receipt_data["items"].append({
+            "name": item[6],  # product name
+            "quantity": item[3],
+            "unit_price": item[4],
+            "total_price": item[5]
+        })
+    
+    return receipt_data
+
+# Fontes usadas na nota (família, estilo, tamanho). "helvetica" é a fonte
+# embutida que o FPDF usa no lugar de "Arial"; usá-la direto evita o aviso
+# de substituição a cada set_font.
+FONT_TITLE = ("helvetica", 'B', 16)
+FONT_LABEL = ("helvetica", 'B', 12)
+FONT_TEXT = ("helvetica", '', 12)
+FONT_TABLE = ("helvetica", '', 10)
+FONT_FOOTER = ("helvetica", 'I', 8)
+FOOTER_TEXT = "Sistema de Gerenciamento de Estoque"
+
+# Partes fixas da tabela de itens: (largura, texto, alinhamento)
+ITEM_COLUMNS = ((100, "Descrição", 'L'), (20, "Qtd", 'C'), (30, "Unit. (R$)", 'R'), (30, "Total (R$)", 'R'))
+
+# Altura das linhas da nota (mm)
+LINE_HEIGHT = 10
+
+class ReceiptPDF(FPDF):
+    """Documento da nota fiscal; o rodapé é desenhado pelo próprio FPDF em cada página
+
+    footer_position (x, linha de base a partir do fim da página) é calculada
+    pelo ReceiptRenderer.
+    """
+
+    def __init__(self, footer_position):
+        super().__init__()
+        self.footer_position = footer_position
+
+    def footer(self):
+        x, baseline = self.footer_position
+        self.set_font(*FONT_FOOTER)
+        self.text(x, self.h + baseline, FOOTER_TEXT)
+
+class ReceiptRenderer:
+    """Gera o PDF da nota fiscal em memória
+
+    O layout é calculado uma vez no construtor: posição dos textos fixos
+    (título, rótulos, cabeçalho da tabela e rodapé), grade de colunas e linha
+    de base de cada fonte. A cada nota os textos são escritos com FPDF.text e
+    FPDF.rect nessas posições, sem o layout de FPDF.cell, com o mesmo desenho
+    (margens, alinhamentos, bordas e quebras de página). render() devolve os
+    bytes do PDF. Um mesmo renderizador pode ser usado por várias threads.
+    """
+
+    def __init__(self):
+        pdf = FPDF()
+        pdf.add_page()
+        left, margin, full_width = pdf.l_margin, pdf.c_margin, pdf.epw
+        self._left = left
+        self._margin = margin
+
+        def baseline(font):
+            # Mesma linha de base de cell(): meio da linha + 30% do tamanho da fonte
+            return 0.5 * LINE_HEIGHT + 0.3 * font[2] / pdf.k
+
+        def place(font, text, x, width, align):
+            pdf.set_font(*font)
+            return self._text_x(x, width, align, pdf.get_string_width(text))
+
+        self._baseline = {font: baseline(font) for font in (FONT_TITLE, FONT_LABEL, FONT_TEXT, FONT_TABLE)}
+        self._title_x = place(FONT_TITLE, "NOTA FISCAL", left, full_width, 'C')
+
+        # Grade da tabela de itens: (x, largura, alinhamento) de cada coluna
+        self._columns = []
+        self._item_header = []
+        x = left
+        for width, text, align in ITEM_COLUMNS:
+            self._columns.append((x, width, align))
+            self._item_header.append((place(FONT_TABLE, text, x, width, align), text))
+            x += width
+
+        # Totais: rótulo alinhado à direita das três primeiras colunas, valor na última
+        label_width = sum(width for width, _, _ in ITEM_COLUMNS[:3])
+        self._totals_value = (left + label_width, ITEM_COLUMNS[3][0])
+        self._totals_labels = {
+            label: place(FONT_LABEL if label == "TOTAL:" else FONT_TEXT, label, left, label_width, 'R')
+            for label in ("Subtotal:", "Desconto:", "TOTAL:")
+        }
+
+        # Rodapé: cell(0, 10) centralizada a 15 mm do fim da página
+        self._footer = (place(FONT_FOOTER, FOOTER_TEXT, left, full_width, 'C'), -15 + baseline(FONT_FOOTER))
+
+    def _text_x(self, x, width, align, text_width):
+        # Início do texto dentro de uma célula, como em cell()
+        if align == 'R':
+            return x + width - self._margin - text_width
+        if align == 'C':
+            return x + (width - text_width) / 2
+        return x + self._margin
+
+    def render(self, receipt_data):
+        """Devolve os bytes do PDF da nota fiscal"""
+        pdf = ReceiptPDF(self._footer)
+        self.draw(pdf, receipt_data)
+        return bytes(pdf.output())
+
+    def render_many(self, receipts):
+        """Devolve um único PDF com as notas em sequência, cada uma começando em nova página"""
+        pdf = ReceiptPDF(self._footer)
+        for receipt_data in receipts:
+            self.draw(pdf, receipt_data)
+        return bytes(pdf.output())
+
+    def _line(self, pdf):
+        # Quebra automática de página antes de uma linha que não cabe (como em cell())
+        if pdf.will_page_break(LINE_HEIGHT):
+            pdf.add_page()
+        y = pdf.y
+        pdf.y = y + LINE_HEIGHT
+        return y
+
+    def _write_line(self, pdf, font, text, x=None):
+        y = self._line(pdf)
+        if text:
+            pdf.text(self._left + self._margin if x is None else x, y + self._baseline[font], text)
+
+    def draw(self, pdf, receipt_data):
+        """Desenha a nota em uma nova página de pdf"""
+        pdf.add_page()
+
+        # Cabeçalho
+        pdf.set_font(*FONT_TITLE)
+        self._write_line(pdf, FONT_TITLE, "NOTA FISCAL", self._title_x)
+        pdf.set_font(*FONT_TEXT)
+        self._write_line(pdf, FONT_TEXT, f"Nº: {receipt_data['sale_id']}")
+        self._write_line(pdf, FONT_TEXT, f"Data: {receipt_data['date']}")
+        pdf.y += 5
+
+        # Cliente
+        pdf.set_font(*FONT_LABEL)
+        self._write_line(pdf, FONT_LABEL, "CLIENTE:")
+        pdf.set_font(*FONT_TEXT)
+        self._write_line(pdf, FONT_TEXT, receipt_data['customer_name'] or "")
+        if receipt_data['customer_doc']:
+            self._write_line(pdf, FONT_TEXT, f"CPF/CNPJ: {receipt_data['customer_doc']}")
+        pdf.y += 5
+
+        # Itens
+        pdf.set_font(*FONT_LABEL)
+        self._write_line(pdf, FONT_LABEL, "ITENS")
+        pdf.set_font(*FONT_TABLE)
+        baseline = self._baseline[FONT_TABLE]
+        y = self._line(pdf)
+        for (x, width, _), (text_x, text) in zip(self._columns, self._item_header):
+            pdf.rect(x, y, width, LINE_HEIGHT)
+            pdf.text(text_x, y + baseline, text)
+
+        for item in receipt_data['items']:
+            values = (item['name'], str(item['quantity']),
+                      f"{item['unit_price']:.2f}", f"{item['total_price']:.2f}")
+            y = self._line(pdf)
+            for (x, width, align), text in zip(self._columns, values):
+                pdf.rect(x, y, width, LINE_HEIGHT)
+                if text:
+                    text_x = x + self._margin if align == 'L' else \
+                        self._text_x(x, width, align, pdf.get_string_width(text))
+                    pdf.text(text_x, y + baseline, text)
+
+        # Totais
+        value_x, value_width = self._totals_value
+        for label, font, value in (("Subtotal:", FONT_TEXT, receipt_data['subtotal']),
+                                   ("Desconto:", FONT_TEXT, receipt_data['discount']),
+                                   ("TOTAL:", FONT_LABEL, receipt_data['total'])):
+            pdf.set_font(*font)
+            y = self._line(pdf)
+            text = f"R$ {value:.2f}"
+            pdf.text(self._totals_labels[label], y + self._baseline[font], label)
+            pdf.text(self._text_x(value_x, value_width, 'R', pdf.get_string_width(text)),
+                     y + self._baseline[font], text)
+        pdf.y += 10
+
+        # Pagamento e atendente
+        pdf.set_font(*FONT_TEXT)
+        self._write_line(pdf, FONT_TEXT, f"Forma de Pagamento: {receipt_data['payment_method']}")
+        self._write_line(pdf, FONT_TEXT, f"Atendente: {receipt_data['cashier']}")
+
+renderer = ReceiptRenderer()
+
+def create_pdf(receipt_data, file_path):
+    """Cria um PDF da nota fiscal"""
+    data = renderer.render(receipt_data)
+    with open(file_path, "wb") as f:
+        f.write(data)
+
+def print_pdf(receipt_data):
+    """Envia a nota fiscal para a impressora padrão"""
+    data = renderer.render(receipt_data)
+    if hasattr(os, "startfile"):
+        # No Windows a impressão passa pelo visualizador padrão, que precisa de um arquivo
+        temp_path = os.path.join(tempfile.gettempdir(), f"temp_receipt_{receipt_data['sale_id']}.pdf")
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.startfile(temp_path, 'print')
+    else:
+        # CUPS lê o documento da entrada padrão, sem arquivo temporário
+        subprocess.run(["lp"], input=data, check=True)
@@ -0,0 +1,60 @@
+import argparse
+import time
+from database import *
+
+def print_summary(conn, start_day, end_day):
+    """Mostra o resumo de vendas do período"""
+    sale_count, total = get_revenue_between(conn, start_day, end_day)
+    print(f"Período: {start_day} a {end_day}")
+    print(f"Vendas: {sale_count} | Faturamento: R$ {total:.2f}")
+
+    print("\nPor dia:")
+    for day, count, subtotal, discount, day_total in get_daily_sales(conn, start_day, end_day):
+        print(f"  {day}  {count:>5} vendas  R$ {day_total:>12.2f}  (desconto R$ {discount:.2f})")
+
+    print("\nProdutos mais vendidos:")
+    for product_id, name, quantity, revenue in get_top_products(conn, start_day, end_day):
+        print(f"  {name or f'#{product_id}':<30} {quantity:>7}  R$ {revenue:>12.2f}")
+
+    print("\nPor atendente:")
+    for user_id, name, count, cashier_total in get_sales_by_cashier(conn, start_day, end_day):
+        print(f"  {name or f'#{user_id}':<30} {count:>5} vendas  R$ {cashier_total:>12.2f}")
+
+    print("\nPor forma de pagamento:")
+    for payment_method, count, payment_total in get_sales_by_payment_method(conn, start_day, end_day):
+        print(f"  {payment_method or '-':<30} {count:>5} vendas  R$ {payment_total:>12.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatórios de vendas a partir dos resumos diários")
+    parser.add_argument("--db", default=DATABASE_FILE, help="arquivo do banco de dados")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("rebuild", help="recalcula os resumos a partir de todas as vendas")
+    commands.add_parser("mtd", help="faturamento do mês até hoje")
+    commands.add_parser("ytd", help="faturamento do ano até hoje")
+    summary = commands.add_parser("summary", help="resumo detalhado de um período")
+    summary.add_argument("start", help="data inicial (AAAA-MM-DD)")
+    summary.add_argument("end", nargs="?", help="data final (AAAA-MM-DD, padrão: hoje)")
+
+    args = parser.parse_args()
+    configure_database(args.db)
+    initialize_database()
+
+    with pooled_connection() as conn:
+        if args.command == "rebuild":
+            started = time.perf_counter()
+            if rebuild_sales_summaries(conn):
+                print(f"Resumos recalculados em {time.perf_counter() - started:.2f}s")
+        elif args.command == "mtd":
+            sale_count, total = get_month_to_date(conn)
+            print(f"Mês até hoje: {sale_count} vendas, R$ {total:.2f}")
+        elif args.command == "ytd":
+            sale_count, total = get_year_to_date(conn)
+            print(f"Ano até hoje: {sale_count} vendas, R$ {total:.2f}")
+        else:
+            print_summary(conn, args.start, args.end or time.strftime("%Y-%m-%d", time.gmtime()))
+
+    close_all_connections()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from datetime import datetime
+from database import *
+from money import Money
+from db_worker import DBExecutor
+from virtual_list import VirtualTreeview, SalesPageSource
+from receipts import build_receipt_data
+from receipt_queue import ReceiptQueue, STATUS_DONE, STATUS_FAILED
+
+PAYMENT_METHODS = ["", "Dinheiro", "Cartão Débito", "Cartão Crédito", "PIX", "Transferência"]
+
+def parse_date(text):
+    """Converte "DD/MM/AAAA" ou "AAAA-MM-DD" para "AAAA-MM-DD" (vazio -> None)"""
+    text = text.strip()
+    if not text:
+        return None
+    for date_format in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    raise ValueError(f"Data inválida: {text}")
+
+class SalesHistoryApp:
+    def __init__(self, root, current_user):
+        self.root = root
+        self.current_user = current_user
+        self.root.title("Histórico de Vendas")
+        
+        # Configurar tamanho e centralizar
+        self.root.state('zoomed')  # Maximiza a janela
+        
+        # Usuários comuns só consultam as próprias vendas
+        self.is_admin = bool(current_user[5])
+        
+        # Venda exibida no painel de detalhes (itens carregados só ao selecionar)
+        self.detail_sale_id = None
+        self.receipt_data = None
+        self.cashiers = {}   # nome exibido no filtro -> id do usuário
+        
+        # Criar widgets
+        self.create_widgets()
+        
+        # Consultas ao banco rodam fora da thread da interface
+        self.db = DBExecutor(self.root, indicator=self.loading_label)
+        self.tree.executor = self.db
+        self.receipt_queue = ReceiptQueue(self.root, on_status=self.on_receipt_status)
+        self.root.bind('<Destroy>', self.on_destroy)
+        
+        # Carregar dados
+        if self.is_admin:
+            self.db.submit(get_all_users, callback=self.on_users_loaded)
+        self.apply_filters()
+    
+    def create_widgets(self):
+        # Frame principal
+        self.main_frame = ttk.Frame(self.root, padding="10")
+        self.main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Filtros
+        filter_frame = ttk.LabelFrame(self.main_frame, text="Filtros", padding="10")
+        filter_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        ttk.Label(filter_frame, text="De:").grid(row=0, column=0, sticky=tk.W)
+        self.start_entry = ttk.Entry(filter_frame, width=12)
+        self.start_entry.grid(row=0, column=1, sticky=tk.W, padx=5)
+        
+        ttk.Label(filter_frame, text="Até:").grid(row=0, column=2, sticky=tk.W)
+        self.end_entry = ttk.Entry(filter_frame, width=12)
+        self.end_entry.grid(row=0, column=3, sticky=tk.W, padx=5)
+        
+        ttk.Label(filter_frame, text="Atendente:").grid(row=0, column=4, sticky=tk.W)
+        self.cashier_var = tk.StringVar(value="" if self.is_admin else self.current_user[3])
+        self.cashier_combobox = ttk.Combobox(filter_frame, textvariable=self.cashier_var, width=20, state="readonly")
+        self.cashier_combobox.grid(row=0, column=5, sticky=tk.W, padx=5)
+        if not self.is_admin:
+            self.cashier_combobox.config(values=[self.current_user[3]], state=tk.DISABLED)
+        
+        ttk.Label(filter_frame, text="Pagamento:").grid(row=0, column=6, sticky=tk.W)
+        self.payment_var = tk.StringVar(value="")
+        ttk.Combobox(filter_frame, textvariable=self.payment_var, values=PAYMENT_METHODS, width=15,
+                     state="readonly").grid(row=0, column=7, sticky=tk.W, padx=5)
+        
+        ttk.Label(filter_frame, text="CPF/CNPJ:").grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        self.doc_entry = ttk.Entry(filter_frame, width=20)
+        self.doc_entry.grid(row=1, column=1, columnspan=2, sticky=tk.W, padx=5, pady=(5, 0))
+        
+        ttk.Label(filter_frame, text="Total mínimo:").grid(row=1, column=3, sticky=tk.W, pady=(5, 0))
+        self.min_total_entry = ttk.Entry(filter_frame, width=12)
+        self.min_total_entry.grid(row=1, column=4, sticky=tk.W, padx=5, pady=(5, 0))
+        
+        ttk.Button(filter_frame, text="Filtrar", command=self.apply_filters).grid(row=1, column=6, padx=5, pady=(5, 0))
+        ttk.Button(filter_frame, text="Limpar", command=self.clear_filters).grid(row=1, column=7, sticky=tk.W, padx=5, pady=(5, 0))
+        
+        for entry in (self.start_entry, self.end_entry, self.doc_entry, self.min_total_entry):
+            entry.bind('<Return>', lambda event: self.apply_filters())
+        
+        # Lista de vendas (virtualizada) e detalhes da venda selecionada
+        content_frame = ttk.Frame(self.main_frame)
+        content_frame.pack(fill=tk.BOTH, expand=True)
+        
+        sales_frame = ttk.LabelFrame(content_frame, text="Vendas", padding="10")
+        sales_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 5))
+        
+        columns = ("Nº", "Data", "Cliente", "CPF/CNPJ", "Total", "Pagamento", "Atendente")
+        self.tree = VirtualTreeview(sales_frame, columns=columns)
+        
+        self.tree.heading("Nº", text="Nº")
+        self.tree.heading("Data", text="Data")
+        self.tree.heading("Cliente", text="Cliente")
+        self.tree.heading("CPF/CNPJ", text="CPF/CNPJ")
+        self.tree.heading("Total", text="Total (R$)")
+        self.tree.heading("Pagamento", text="Pagamento")
+        self.tree.heading("Atendente", text="Atendente")
+        
+        self.tree.column("Nº", width=60, anchor=tk.CENTER)
+        self.tree.column("Data", width=140)
+        self.tree.column("Cliente", width=150)
+        self.tree.column("CPF/CNPJ", width=110)
+        self.tree.column("Total", width=90, anchor=tk.E)
+        self.tree.column("Pagamento", width=110)
+        self.tree.column("Atendente", width=120)
+        
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.tree.tree.bind('<<TreeviewSelect>>', self.on_sale_selected, add="+")
+        
+        detail_frame = ttk.LabelFrame(content_frame, text="Itens da Venda", padding="10")
+        detail_frame.pack(side=tk.RIGHT, fill=tk.BOTH, padx=(5, 0))
+        
+        self.detail_label = ttk.Label(detail_frame, text="Selecione uma venda")
+        self.detail_label.pack(anchor=tk.W)
+        
+        self.items_tree = ttk.Treeview(detail_frame, columns=("Produto", "Qtd", "Unit", "Total"), show="headings", height=15)
+        self.items_tree.heading("Produto", text="Produto")
+        self.items_tree.heading("Qtd", text="Qtd")
+        self.items_tree.heading("Unit", text="Unit. (R$)")
+        self.items_tree.heading("Total", text="Total (R$)")
+        self.items_tree.column("Produto", width=160)
+        self.items_tree.column("Qtd", width=50, anchor=tk.CENTER)
+        self.items_tree.column("Unit", width=80, anchor=tk.E)
+        self.items_tree.column("Total", width=80, anchor=tk.E)
+        self.items_tree.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        self.totals_label = ttk.Label(detail_frame, text="", justify=tk.RIGHT)
+        self.totals_label.pack(anchor=tk.E)
+        
+        button_frame = ttk.Frame(detail_frame)
+        button_frame.pack(pady=(10, 0))
+        
+        self.reprint_button = ttk.Button(button_frame, text="Reimprimir Nota", command=self.reprint_receipt, state=tk.DISABLED)
+        self.reprint_button.pack(side=tk.LEFT, padx=5)
+        
+        self.save_button = ttk.Button(button_frame, text="Salvar como PDF", command=self.save_receipt, state=tk.DISABLED)
+        self.save_button.pack(side=tk.LEFT, padx=5)
+        
+        # Barra de status
+        self.status_frame = ttk.Frame(self.main_frame)
+        self.status_frame.pack(fill=tk.X, pady=(10, 0))
+        
+        self.status_label = ttk.Label(self.status_frame, text=f"Logado como: {self.current_user[3]} ({'Admin' if self.is_admin else 'Usuário'})")
+        self.status_label.pack(side=tk.LEFT)
+        
+        self.loading_label = ttk.Label(self.status_frame, text="")
+        self.loading_label.pack(side=tk.RIGHT)
+        
+        self.receipt_status_label = ttk.Label(self.status_frame, text="")
+        self.receipt_status_label.pack(side=tk.RIGHT, padx=10)
+    
+    def format_sale(self, sale):
+        return (
+            sale[0],  # Nº
+            sale[1],  # Data
+            sale[2],  # Cliente
+            sale[3],  # CPF/CNPJ
+            f"{sale[6]:.2f}",  # Total
+            sale[7],  # Pagamento
+            sale[9]   # Atendente
+        )
+    
+    def on_destroy(self, event):
+        if event.widget is self.root:
+            self.db.shutdown()
+            self.receipt_queue.shutdown()
+    
+    def on_users_loaded(self, users):
+        self.cashiers = {f"{user[3]} ({user[1]})": user[0] for user in users}
+        self.cashier_combobox.config(values=[""] + list(self.cashiers))
+    
+    def apply_filters(self):
+        """Recarrega a lista com os filtros informados (só a janela visível é lida)"""
+        try:
+            filters = {
+                "start_date": parse_date(self.start_entry.get()),
+                "end_date": parse_date(self.end_entry.get()),
+                "payment_method": self.payment_var.get(),
+                "customer_doc": self.doc_entry.get().strip(),
+                "min_total": Money.parse(self.min_total_entry.get()) if self.min_total_entry.get().strip() else None,
+            }
+        except ValueError as e:
+            messagebox.showerror("Erro", f"Filtro inválido: {e}")
+            return
+        
+        if self.is_admin:
+            filters["user_id"] = self.cashiers.get(self.cashier_var.get())
+        else:
+            filters["user_id"] = self.current_user[0]
+        
+        self.tree.set_source(SalesPageSource(self.format_sale, **filters))
+    
+    def clear_filters(self):
+        for entry in (self.start_entry, self.end_entry, self.doc_entry, self.min_total_entry):
+            entry.delete(0, tk.END)
+        self.payment_var.set("")
+        if self.is_admin:
+            self.cashier_var.set("")
+        self.apply_filters()
+    
+    def on_sale_selected(self, event):
+        """Carrega os itens da venda selecionada (uma consulta por seleção, não por linha)"""
+        sale = self.tree.selected_row()
+        if sale is None or sale[0] == self.detail_sale_id:
+            return
+        self.detail_sale_id = sale[0]
+        self.db.submit(get_sale_by_id, sale[0],
+                       callback=lambda result: self.on_sale_loaded(sale, result), key="sale_detail")
+    
+    def on_sale_loaded(self, sale_row, result):
+        sale, items = result
+        self.items_tree.delete(*self.items_tree.get_children())
+        if not sale:
+            self.receipt_data = None
+            self.detail_label.config(text="Venda não encontrada")
+            self.totals_label.config(text="")
+            self.reprint_button.config(state=tk.DISABLED)
+            self.save_button.config(state=tk.DISABLED)
+            return
+        
+        # O atendente da nota é quem fez a venda, não quem está consultando
+        self.receipt_data = build_receipt_data(sale, items or [], sale_row[9])
+        for item in self.receipt_data["items"]:
+            self.items_tree.insert("", tk.END, values=(
+                item["name"],
+                item["quantity"],
+                f"{item['unit_price']:.2f}",
+                f"{item['total_price']:.2f}"
+            ))
+        
+        self.detail_label.config(text=f"Venda Nº {sale[0]} - {sale[1]}")
+        self.totals_label.config(text=(
+            f"Subtotal: R$ {sale[4]:.2f}\n"
+            f"Desconto: R$ {sale[5]:.2f}\n"
+            f"TOTAL: R$ {sale[6]:.2f}"
+        ))
+        self.reprint_button.config(state=tk.NORMAL)
+        self.save_button.config(state=tk.NORMAL)
+    
+    def reprint_receipt(self):
+        """Envia a nota da venda selecionada para a impressora (em segundo plano)"""
+        if self.receipt_data is None:
+            return
+        self.receipt_queue.submit(self.receipt_data['sale_id'], self.receipt_data['cashier'],
+                                  receipt_data=self.receipt_data)
+    
+    def save_receipt(self):
+        """Salva a nota da venda selecionada como PDF (em segundo plano)"""
+        if self.receipt_data is None:
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF Files", "*.pdf")],
+            title="Salvar Nota Fiscal como PDF",
+            initialfile=f"NotaFiscal_{self.receipt_data['sale_id']}.pdf"
+        )
+        
+        if file_path:
+            self.receipt_queue.submit(self.receipt_data['sale_id'], self.receipt_data['cashier'], action="save",
+                                      file_path=file_path, receipt_data=self.receipt_data)
+    
+    def on_receipt_status(self, job):
+        self.receipt_status_label.config(text=f"Nota {job.sale_id}: {job.status}")
+        if job.status == STATUS_DONE:
+            if job.action == "save":
+                messagebox.showinfo("Sucesso", f"Nota fiscal salva como:\n{job.file_path}")
+            else:
+                messagebox.showinfo("Impressão", "Nota fiscal enviada para impressão")
+        elif job.status == STATUS_FAILED:
+            messagebox.showerror("Erro", f"Não foi possível gerar a nota:\n{job.error}")
@@ -0,0 +1,91 @@
+import re
+import unicodedata
+from collections import OrderedDict
+
+# Colunas indexadas pelo FTS5 (name, description, category, barcode) na linha de products
+SEARCH_COLUMNS = (1, 2, 3, 8)
+
+def normalize(text):
+    """Minúsculas e sem acentos, como o tokenizador unicode61 com remove_diacritics"""
+    text = unicodedata.normalize('NFD', str(text).casefold())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+def tokenize(text):
+    """Separa o texto em tokens normalizados, como _fts_query faz com o termo digitado"""
+    return re.findall(r"[^\W_]+", normalize(text))
+
+def refines(term_tokens, base_tokens):
+    """Indica se todo resultado de term_tokens também é resultado de base_tokens
+
+    Cada token é buscado por prefixo: "arroz int" está contido em "arr" porque
+    "arroz" começa com "arr".
+    """
+    return all(any(token.startswith(base) for token in term_tokens) for base in base_tokens)
+
+def matches(row, term_tokens):
+    """Reaplica em memória a busca por prefixo do FTS5 a uma linha de products"""
+    row_tokens = set()
+    for column in SEARCH_COLUMNS:
+        if row[column]:
+            row_tokens.update(tokenize(row[column]))
+    return all(any(word.startswith(token) for word in row_tokens) for token in term_tokens)
+
+class SearchCache:
+    """Cache LRU das últimas buscas: termo -> ids encontrados, na ordem de relevância
+
+    As linhas ficam em um único dicionário por id, compartilhado pelos termos. O
+    cache inteiro é descartado quando a versão de alterações de products muda.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.version = None
+        self._entries = OrderedDict()   # tokens -> (ids, completo)
+        self._rows = {}                 # id -> linha de products
+
+    def __len__(self):
+        return len(self._entries)
+
+    def invalidate(self, version):
+        """Esvazia o cache se products mudou desde que os resultados foram guardados"""
+        if version != self.version:
+            self._entries.clear()
+            self._rows.clear()
+            self.version = version
+
+    def put(self, term, rows, complete):
+        """Guarda o resultado de uma busca; complete indica que não foi cortado pelo limite"""
+        tokens = tuple(tokenize(term))
+        if not tokens:
+            return
+        for row in rows:
+            self._rows[row[0]] = row
+        self._entries[tokens] = ([row[0] for row in rows], complete)
+        self._entries.move_to_end(tokens)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            referenced = {row_id for ids, _ in self._entries.values() for row_id in ids}
+            self._rows = {row_id: row for row_id, row in self._rows.items() if row_id in referenced}
+
+    def get(self, term):
+        """Retorna as linhas do termo, exatas ou filtradas de uma busca mais ampla, ou None"""
+        tokens = tuple(tokenize(term))
+        if not tokens:
+            return None
+        entry = self._entries.get(tokens)
+        if entry is not None:
+            self._entries.move_to_end(tokens)
+            return [self._rows[row_id] for row_id in entry[0]]
+
+        # Termo estendido: filtra o menor resultado completo de um termo que ele refina
+        best = None
+        for base, (ids, complete) in self._entries.items():
+            if complete and refines(tokens, base) and (best is None or len(ids) < len(best[1])):
+                best = (base, ids)
+        if best is None:
+            return None
+
+        rows = [self._rows[row_id] for row_id in best[1] if matches(self._rows[row_id], tokens)]
+        self._entries.move_to_end(best[0])
+        self.put(term, rows, True)
+        return rows
@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+import database
+from database import migrate, get_schema_version, MIGRATIONS, SCHEMA_VERSION
+
+# Esquema da primeira versão do sistema (valores em reais, REAL), sem user_version
+BASELINE_SCHEMA = [
+    '''CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL,
+        full_name TEXT NOT NULL,
+        email TEXT,
+        is_admin INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT,
+        category TEXT,
+        price REAL NOT NULL,
+        quantity INTEGER NOT NULL,
+        min_quantity INTEGER DEFAULT 0,
+        supplier TEXT,
+        barcode TEXT UNIQUE,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE sales (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sale_date TEXT DEFAULT CURRENT_TIMESTAMP,
+        customer_name TEXT,
+        customer_doc TEXT,
+        subtotal REAL NOT NULL,
+        discount REAL DEFAULT 0,
+        total REAL NOT NULL,
+        payment_method TEXT,
+        user_id INTEGER NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )''',
+    '''CREATE TABLE sale_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sale_id INTEGER NOT NULL,
+        product_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        unit_price REAL NOT NULL,
+        total_price REAL NOT NULL,
+        FOREIGN KEY (sale_id) REFERENCES sales (id),
+        FOREIGN KEY (product_id) REFERENCES products (id)
+    )''',
+]
+
+def create_baseline_database(path):
+    """Banco como o da primeira versão, com dois produtos e duas vendas em reais"""
+    conn = sqlite3.connect(path)
+    for sql in BASELINE_SCHEMA:
+        conn.execute(sql)
+    conn.execute("INSERT INTO users(username, password, full_name, is_admin) VALUES('ana', 'x', 'Ana', 0)")
+    conn.executemany("INSERT INTO products(name, price, quantity, barcode) VALUES(?,?,?,?)",
+                     [("Café", 19.99, 10, "789"), ("Bala", 0.1 + 0.2, 100, "790")])
+    conn.executemany('''INSERT INTO sales(sale_date, subtotal, discount, total, payment_method, user_id)
+                        VALUES(?,?,?,?,?,1)''',
+                     [("2024-03-01 10:00:00", 39.98 + 0.3, 0.1 + 0.2, 39.98, "Dinheiro"),
+                      ("2024-03-01 15:30:00", 19.99, 0, 19.99, "Pix")])
+    conn.executemany('''INSERT INTO sale_items(sale_id, product_id, quantity, unit_price, total_price)
+                        VALUES(?,?,?,?,?)''',
+                     [(1, 1, 2, 19.99, 19.99 * 2), (1, 2, 1, 0.1 + 0.2, 0.1 + 0.2),
+                      (2, 1, 1, 19.99, 19.99)])
+    conn.commit()
+    return conn
+
+class MigrationTest(unittest.TestCase):
+    """Migração de bancos antigos para o esquema atual"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.conn = create_baseline_database(os.path.join(self.directory.name, "old.db"))
+
+    def tearDown(self):
+        self.conn.close()
+        self.directory.cleanup()
+
+    def test_baseline_reaches_current_version(self):
+        self.assertEqual(get_schema_version(self.conn), 0)
+        self.assertEqual(migrate(self.conn), SCHEMA_VERSION)
+        self.assertEqual(SCHEMA_VERSION, 10)
+        indexes = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        self.assertIn("idx_sale_items_sale_id", indexes)
+        self.assertIn("idx_sales_user_date", indexes)
+        self.assertNotIn("idx_sales_user_id", indexes)
+        self.assertEqual(self.conn.execute("SELECT username FROM users WHERE is_admin=1").fetchall(), [("admin",)])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0], 2)
+
+        # Rodar de novo não reaplica nada
+        self.assertEqual(migrate(self.conn), SCHEMA_VERSION)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0], 2)
+
+    def test_money_converted_to_cents_from_version_5(self):
+        with mock.patch.object(database, "MIGRATIONS", MIGRATIONS[:5]):
+            self.assertEqual(migrate(self.conn), 5)
+        self.assertEqual(migrate(self.conn), SCHEMA_VERSION)
+
+        self.assertEqual(self.conn.execute("SELECT id, price FROM products ORDER BY id").fetchall(),
+                         [(1, 1999), (2, 30)])
+        self.assertEqual(self.conn.execute("SELECT id, subtotal, discount, total FROM sales ORDER BY id").fetchall(),
+                         [(1, 4028, 30, 3998), (2, 1999, 0, 1999)])
+        self.assertEqual(self.conn.execute("SELECT unit_price, total_price FROM sale_items ORDER BY id").fetchall(),
+                         [(1999, 3998), (30, 30), (1999, 1999)])
+        self.assertEqual(self.conn.execute("SELECT * FROM sales_daily").fetchall(),
+                         [("2024-03-01", 2, 6027, 30, 5997)])
+        self.assertEqual(self.conn.execute("SELECT product_id, quantity, revenue FROM sales_daily_product ORDER BY product_id").fetchall(),
+                         [(1, 3, 5997), (2, 1, 30)])
+
+        # Ids e AUTOINCREMENT preservados pela reconstrução das tabelas
+        cursor = self.conn.execute("INSERT INTO products(name, price, quantity) VALUES('Pão', 50, 1)")
+        self.assertEqual(cursor.lastrowid, 3)
+        self.conn.commit()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+from decimal import Decimal
+from money import Money
+
+class MoneyComparisonTest(unittest.TestCase):
+    """Comparação de Money com números, convertidos como nas somas (Money.of)"""
+
+    def test_equal_to_amount_in_reais(self):
+        for cents, amount in [(100, 1), (10, 0.1), (1999, 19.99), (150, 1.5), (-5, -0.05), (0, 0)]:
+            self.assertEqual(Money(cents), amount)
+            self.assertEqual(hash(Money(cents)), hash(amount))
+        self.assertEqual(Money(10), Decimal("0.10"))
+        self.assertEqual(Money(30), 0.1 + 0.2)
+
+    def test_ordering_uses_rounded_cents(self):
+        self.assertLess(Money(1998), 19.99)
+        self.assertGreater(Money(2000), 19.99)
+        self.assertLessEqual(Money(30), 0.1 + 0.2)
+        self.assertNotEqual(Money(1999), 20)
+
+if __name__ == "__main__":
+    unittest.main()
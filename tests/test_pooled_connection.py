@@ -0,0 +1,51 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from database import ConnectionPool
+
+class PooledConnectionTest(unittest.TestCase):
+    """Ciclo de vida da conexão emprestada do pool"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(os.path.join(self.directory.name, "test.db"))
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.directory.cleanup()
+
+    def test_with_commits_and_rolls_back(self):
+        conn = self.pool.acquire()
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        with conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+        with self.assertRaises(ZeroDivisionError):
+            with conn:
+                conn.execute("INSERT INTO t VALUES (2)")
+                1 / 0
+        self.assertEqual(conn.execute("SELECT x FROM t").fetchall(), [(1,)])
+        conn.close()
+
+    def test_close_returns_connection_to_pool(self):
+        conn = self.pool.acquire()
+        raw = conn.raw
+        conn.close()
+        conn.close()   # segunda chamada não faz nada
+        again = self.pool.acquire()
+        self.assertIs(again.raw, raw)
+        again.close()
+
+    def test_closed_proxy_behaves_like_closed_connection(self):
+        conn = self.pool.acquire()
+        conn.close()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        with self.assertRaises(sqlite3.ProgrammingError):
+            with conn:
+                pass
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.__exit__(None, None, None)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from database import ConnectionPool, migrate, record_sale
+from money import Money
+
+def sale_header(total, user_id=1, payment_method="Dinheiro"):
+    return {"customer_name": "Cliente", "customer_doc": "", "subtotal": total, "discount": 0,
+            "total": total, "payment_method": payment_method, "user_id": user_id}
+
+class SalesTestCase(unittest.TestCase):
+    """Banco novo, migrado, com dois produtos: 1 (5 em estoque) e 2 (1 em estoque)"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(os.path.join(self.directory.name, "test.db"))
+        self.conn = self.pool.acquire()
+        migrate(self.conn)
+        with self.conn:
+            self.conn.executemany("INSERT INTO products(name, price, quantity) VALUES(?,?,?)",
+                                  [("Café", Money(1999), 5), ("Bala", Money(50), 1)])
+
+    def tearDown(self):
+        self.conn.close()
+        self.pool.close_all()
+        self.directory.cleanup()
+
+    def stock(self):
+        return dict(self.conn.execute("SELECT id, quantity FROM products").fetchall())
+
+class RecordSaleTest(SalesTestCase):
+    """Venda, itens e baixa de estoque gravados juntos"""
+
+    def test_records_sale_items_and_stock(self):
+        sale_id, failed = record_sale(self.conn, sale_header(Money(4048)),
+                                      [(1, 2, Money(1999), Money(3998)), (2, 1, Money(50), Money(50))])
+        self.assertEqual(failed, [])
+        self.assertEqual(self.conn.execute("SELECT total FROM sales WHERE id=?", (sale_id,)).fetchone()[0],
+                         Money(4048))
+        self.assertEqual(self.conn.execute("SELECT product_id, quantity, total_price FROM sale_items "
+                                           "WHERE sale_id=? ORDER BY id", (sale_id,)).fetchall(),
+                         [(1, 2, Money(3998)), (2, 1, Money(50))])
+        self.assertEqual(self.stock(), {1: 3, 2: 0})
+
+class ReserveStockTest(SalesTestCase):
+    """Baixa condicional de estoque: nada é gravado se alguma linha falhar"""
+
+    def test_insufficient_stock_rejects_sale(self):
+        sale_id, failed = record_sale(self.conn, sale_header(Money(2049)),
+                                      [(1, 1, Money(1999), Money(1999)), (2, 2, Money(50), Money(100))])
+        self.assertIsNone(sale_id)
+        self.assertEqual(failed, [(2, 2, 1)])
+        self.assertEqual(self.stock(), {1: 5, 2: 1})
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0], 0)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM sale_items").fetchone()[0], 0)
+
+    def test_duplicate_lines_are_aggregated(self):
+        # 3 + 3 do mesmo produto passam linha a linha, mas não juntas (estoque 5)
+        items = [(1, 3, Money(1999), Money(5997)), (1, 3, Money(1999), Money(5997))]
+        sale_id, failed = record_sale(self.conn, sale_header(Money(11994)), items)
+        self.assertIsNone(sale_id)
+        self.assertEqual(failed, [(1, 6, 5)])
+        self.assertEqual(self.stock(), {1: 5, 2: 1})
+
+        items = [(1, 2, Money(1999), Money(3998)), (1, 3, Money(1999), Money(5997))]
+        sale_id, failed = record_sale(self.conn, sale_header(Money(9995)), items)
+        self.assertIsNotNone(sale_id)
+        self.assertEqual(self.stock(), {1: 0, 2: 1})
+
+    def test_missing_product_is_rejected(self):
+        sale_id, failed = record_sale(self.conn, sale_header(Money(1999)),
+                                      [(1, 1, Money(1999), Money(1999)), (99, 1, Money(10), Money(10))])
+        self.assertIsNone(sale_id)
+        self.assertEqual(failed, [(99, 1, None)])
+        self.assertEqual(self.stock(), {1: 5, 2: 1})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from database import record_sale
+from money import Money
+from tests.test_sales import SalesTestCase, sale_header
+
+# (resumo mantido pelos gatilhos, mesma agregação calculada direto de sales e sale_items)
+SUMMARY_QUERIES = [
+    ("SELECT day, sale_count, subtotal, discount, total FROM sales_daily WHERE sale_count != 0",
+     """SELECT date(sale_date), COUNT(*), SUM(subtotal), SUM(COALESCE(discount, 0)), SUM(total)
+        FROM sales GROUP BY date(sale_date)"""),
+    ("SELECT day, user_id, sale_count, total FROM sales_daily_cashier WHERE sale_count != 0",
+     "SELECT date(sale_date), user_id, COUNT(*), SUM(total) FROM sales GROUP BY 1, 2"),
+    ("SELECT day, payment_method, sale_count, total FROM sales_daily_payment WHERE sale_count != 0",
+     "SELECT date(sale_date), COALESCE(payment_method, ''), COUNT(*), SUM(total) FROM sales GROUP BY 1, 2"),
+    ("SELECT day, product_id, quantity, revenue FROM sales_daily_product WHERE quantity != 0 OR revenue != 0",
+     """SELECT date(s.sale_date), si.product_id, SUM(si.quantity), SUM(si.total_price)
+        FROM sale_items si JOIN sales s ON s.id = si.sale_id GROUP BY 1, 2"""),
+]
+
+class SalesSummaryTest(SalesTestCase):
+    """Resumos diários iguais aos SUM sobre as vendas após cada tipo de alteração"""
+
+    def setUp(self):
+        super().setUp()
+        with self.conn:
+            self.conn.execute("UPDATE products SET quantity = 100")
+            self.conn.execute("INSERT INTO users(username, password, full_name) VALUES('ana', 'x', 'Ana')")
+        self.first, _ = record_sale(self.conn, sale_header(Money(4048)),
+                                    [(1, 2, Money(1999), Money(3998)), (2, 1, Money(50), Money(50))])
+        self.second, _ = record_sale(self.conn, sale_header(Money(1999), payment_method="Pix"),
+                                     [(1, 1, Money(1999), Money(1999))])
+
+    def rows(self, sql):
+        # Colunas CENTS vêm como Money, os SUM como centavos inteiros
+        return sorted(tuple(value.cents if isinstance(value, Money) else value for value in row)
+                      for row in self.conn.execute(sql).fetchall())
+
+    def assertSummariesMatch(self):
+        for summary, expected in SUMMARY_QUERIES:
+            self.assertEqual(self.rows(summary), self.rows(expected), summary)
+
+    def test_after_insert(self):
+        self.assertIsNotNone(self.first)
+        self.assertSummariesMatch()
+        self.assertEqual(self.conn.execute("SELECT sale_count, total FROM sales_daily").fetchall(),
+                         [(2, Money(6047))])
+
+    def test_after_update(self):
+        with self.conn:
+            self.conn.execute("UPDATE sales SET total = total - 100, discount = 100, payment_method = 'Cartão' "
+                              "WHERE id=?", (self.first,))
+            self.conn.execute("UPDATE sales SET sale_date = '2024-01-15 12:00:00', user_id = 2 WHERE id=?",
+                              (self.second,))
+            self.conn.execute("UPDATE sale_items SET quantity = 3, total_price = 5997 "
+                              "WHERE sale_id=? AND product_id=1", (self.first,))
+            self.conn.execute("UPDATE sale_items SET product_id = 1 WHERE sale_id=? AND product_id=2",
+                              (self.first,))
+        self.assertSummariesMatch()
+
+    def test_after_delete(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM sale_items WHERE sale_id=? AND product_id=2", (self.first,))
+        self.assertSummariesMatch()
+        with self.conn:
+            self.conn.execute("DELETE FROM sale_items WHERE sale_id=?", (self.second,))
+            self.conn.execute("DELETE FROM sales WHERE id=?", (self.second,))
+        self.assertSummariesMatch()
+        with self.conn:
+            self.conn.execute("DELETE FROM sales WHERE id=?", (self.first,))
+        self.assertSummariesMatch()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,293 @@
+import heapq
+import itertools
+import json
+import os
+import sys
+import time
+import tkinter as tk
+from tkinter import commondialog
+from db_metrics import FunctionStats
+
+# Quantas interações mais lentas entram no relatório
+SLOWEST_KEPT = 25
+
+def handler_name(func):
+    """Nome legível de um callback (Classe.método, função ou lambda)"""
+    target = getattr(func, "func", func)     # functools.partial
+    name = getattr(target, "__qualname__", None) or getattr(target, "__name__", None)
+    return name or type(target).__name__
+
+class UIProfiler:
+    """Mede cada comando e callback do Tk e o atraso do laço de eventos
+
+    O tempo em que um handler fica parado em um diálogo modal (messagebox,
+    filedialog, simpledialog) ou em um mainloop aninhado é descontado: conta
+    só o trabalho do handler, e os handlers que rodam durante a espera são
+    medidos separadamente.
+    Com capture_stacks=True cada handler roda sob cProfile e o perfil é
+    guardado quando passa de budget_ms.
+    """
+
+    def __init__(self, budget_ms=100.0, heartbeat_ms=100, capture_stacks=False, report_path=None):
+        self.budget_ms = budget_ms
+        self.heartbeat_ms = heartbeat_ms
+        self.capture_stacks = capture_stacks
+        self.report_path = report_path
+        self.started_at = time.time()
+        self.handlers = {}            # nome -> FunctionStats
+        self.lag = FunctionStats()
+        self.over_budget = 0
+        self._slowest = []            # heap de (ms, seq, entrada)
+        self._sequence = itertools.count()
+        self._active = []             # [tempo bloqueado, cProfile] de cada handler em execução
+        self._floors = []             # len(_active) no início de cada espera modal aninhada
+        self._originals = {}
+
+    # Instalação
+
+    def install(self):
+        """Substitui os pontos de registro de callbacks do tkinter"""
+        if self._originals:
+            return
+        profiler = self
+        original_register = tk.Misc._register
+        original_after = tk.Misc.after
+        original_wait_window = tk.Misc.wait_window
+        original_mainloop = tk.Misc.mainloop
+        original_show = commondialog.Dialog.show
+        self._originals = {
+            (tk.Misc, "_register"): original_register,
+            (tk.Misc, "after"): original_after,
+            (tk.Misc, "wait_window"): original_wait_window,
+            (tk.Misc, "mainloop"): original_mainloop,
+            (commondialog.Dialog, "show"): original_show,
+        }
+
+        def _register(widget, func, subst=None, needcleanup=1):
+            # O callit de after() já chega medido (ver after abaixo)
+            if not getattr(func, "_ui_profiled", False) and \
+                    not getattr(func, "__qualname__", "").endswith("after.<locals>.callit"):
+                func = profiler.timed(func)
+            return original_register(widget, func, subst, needcleanup)
+
+        def after(widget, ms, func=None, *args):
+            if func is not None and not getattr(func, "_ui_profiled", False):
+                func = profiler.timed(func)
+            return original_after(widget, ms, func, *args)
+
+        def wait_window(widget, window=None):
+            return profiler.blocking(original_wait_window, widget, window)
+
+        def mainloop(widget, n=0):
+            return profiler.blocking(original_mainloop, widget, n)
+
+        def show(dialog, **options):
+            return profiler.blocking(original_show, dialog, **options)
+
+        tk.Misc._register = _register
+        tk.Misc.after = after
+        tk.Misc.wait_window = wait_window
+        tk.Misc.mainloop = mainloop
+        commondialog.Dialog.show = show
+
+    def uninstall(self):
+        for (owner, attribute), original in self._originals.items():
+            setattr(owner, attribute, original)
+        self._originals = {}
+
+    # Medição
+
+    def timed(self, func):
+        """Envolve um callback para medir cada execução"""
+        name = handler_name(func)
+        profiler = self
+
+        def profiled(*args):
+            return profiler.run(name, func, args)
+
+        try:
+            profiled.__name__ = func.__name__
+        except AttributeError:
+            profiled.__name__ = type(func).__name__
+        profiled._ui_profiled = True
+        return profiled
+
+    def run(self, name, func, args):
+        profile = None
+        # Só o handler mais externo (desde a última espera modal) roda sob cProfile
+        if self.capture_stacks and len(self._active) == (self._floors[-1] if self._floors else 0):
+            import cProfile
+            profile = cProfile.Profile()
+        frame = [0.0, profile]
+        self._active.append(frame)
+        started = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            return func(*args)
+        finally:
+            if profile is not None:
+                profile.disable()
+            self._active.pop()
+            elapsed_ms = (time.perf_counter() - started - frame[0]) * 1000
+            self.record(name, elapsed_ms, profile)
+
+    def blocking(self, func, *args, **kwargs):
+        """Executa um diálogo modal sem contar a espera do usuário nos handlers ativos"""
+        # O perfil do handler fica pausado; os handlers da espera ganham perfis próprios
+        profile = next((frame[1] for frame in reversed(self._active) if frame[1] is not None), None)
+        if profile is not None:
+            profile.disable()
+        self._floors.append(len(self._active))
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            waited = time.perf_counter() - started
+            self._floors.pop()
+            for frame in self._active:
+                frame[0] += waited
+            if profile is not None:
+                profile.enable()
+
+    def record(self, name, elapsed_ms, profile=None):
+        stats = self.handlers.get(name)
+        if stats is None:
+            stats = self.handlers[name] = FunctionStats()
+        stats.add(elapsed_ms, 0, 0, 0)
+        if elapsed_ms < self.budget_ms:
+            return
+        self.over_budget += 1
+        entry = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "handler": name,
+            "duration_ms": round(elapsed_ms, 2),
+            "profile": _profile_text(profile) if profile is not None else None,
+        }
+        item = (elapsed_ms, next(self._sequence), entry)
+        if len(self._slowest) < SLOWEST_KEPT:
+            heapq.heappush(self._slowest, item)
+        else:
+            heapq.heappushpop(self._slowest, item)
+
+    # Atraso do laço de eventos
+
+    def attach(self, root):
+        """Inicia o batimento periódico que mede o atraso do laço de eventos de root"""
+        after = self._originals.get((tk.Misc, "after"), tk.Misc.after)
+        interval = self.heartbeat_ms
+
+        def beat(expected):
+            now = time.perf_counter()
+            self.lag.add(max(0.0, (now - expected) * 1000), 0, 0, 0)
+            schedule(now)
+
+        def schedule(now):
+            try:
+                after(root, interval, beat, now + interval / 1000)
+            except tk.TclError:
+                pass   # janela destruída
+
+        schedule(time.perf_counter())
+
+    # Relatório
+
+    def snapshot(self):
+        return {
+            "since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+            "until": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "budget_ms": self.budget_ms,
+            "over_budget": self.over_budget,
+            "event_loop_lag": self.lag.to_dict(),
+            "handlers": {name: stats.to_dict() for name, stats in sorted(self.handlers.items())},
+            "slowest": [entry for _, _, entry in sorted(self._slowest, reverse=True)],
+        }
+
+    def to_text(self):
+        data = self.snapshot()
+        lag = data["event_loop_lag"]
+        lines = [
+            f"Perfil da interface: {data['since']} a {data['until']}",
+            "",
+            f"Atraso do laço de eventos (batimento a cada {self.heartbeat_ms} ms): "
+            f"p50 {lag['p50_ms']} ms, p95 {lag['p95_ms']} ms, p99 {lag['p99_ms']} ms, máximo {lag['max_ms']} ms",
+            f"Interações acima de {data['budget_ms']:g} ms: {data['over_budget']}",
+            "",
+            f"{'handler':<52}{'chamadas':>9}{'total ms':>11}{'média':>9}{'p95':>8}{'máx':>10}",
+        ]
+        handlers = sorted(data["handlers"].items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        for name, stats in handlers:
+            lines.append(f"{name[:51]:<52}{stats['calls']:>9}{stats['total_ms']:>11.1f}{stats['mean_ms']:>9.2f}"
+                         f"{stats['p95_ms']:>8}{stats['max_ms']:>10.1f}")
+        lines.append("")
+        lines.append("Interações mais lentas:")
+        for entry in data["slowest"]:
+            lines.append(f"  [{entry['time']}] {entry['handler']} {entry['duration_ms']:.1f} ms")
+            if entry["profile"]:
+                lines.extend("      " + line for line in entry["profile"].splitlines())
+        return "\n".join(lines)
+
+    def write_report(self, file_path=None):
+        """Grava o relatório em JSON (.json) ou texto; devolve o caminho usado"""
+        file_path = file_path or self.report_path or time.strftime("perfil_interface_%Y%m%d_%H%M%S.txt")
+        content = json.dumps(self.snapshot(), indent=2, ensure_ascii=False) \
+            if file_path.lower().endswith(".json") else self.to_text()
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return file_path
+
+def _profile_text(profile, limit=15):
+    # pstats só é importado quando há perfil a mostrar (não pesa na inicialização)
+    import io
+    import pstats
+    output = io.StringIO()
+    stats = pstats.Stats(profile, stream=output)
+    stats.sort_stats("cumulative").print_stats(limit)
+    # Só a tabela de funções, sem o cabeçalho do pstats
+    lines = output.getvalue().splitlines()
+    start = next((index for index, line in enumerate(lines) if line.lstrip().startswith("ncalls")), 0)
+    return "\n".join(line for line in lines[start:] if line.strip())
+
+profiler = None
+
+def enable(budget_ms=100.0, heartbeat_ms=100, capture_stacks=False, report_path=None):
+    """Liga o modo de perfil; deve ser chamado antes de criar as janelas"""
+    global profiler
+    if profiler is None:
+        profiler = UIProfiler(budget_ms, heartbeat_ms, capture_stacks, report_path)
+        profiler.install()
+    return profiler
+
+def enable_from_environment(argv=None):
+    """Liga o perfil com --profile (ou POS_UI_PROFILE=1); --profile-stacks captura cProfile
+
+    POS_UI_PROFILE_BUDGET_MS define o limite de uma interação lenta (padrão 100)
+    e POS_UI_PROFILE_REPORT o arquivo do relatório de fim de turno.
+    """
+    argv = sys.argv if argv is None else argv
+    capture_stacks = "--profile-stacks" in argv or os.environ.get("POS_UI_PROFILE") == "stacks"
+    if not (capture_stacks or "--profile" in argv or os.environ.get("POS_UI_PROFILE", "0") not in ("", "0")):
+        return None
+    try:
+        budget_ms = float(os.environ.get("POS_UI_PROFILE_BUDGET_MS", 100))
+    except ValueError:
+        budget_ms = 100.0
+    return enable(budget_ms=budget_ms, capture_stacks=capture_stacks,
+                  report_path=os.environ.get("POS_UI_PROFILE_REPORT") or None)
+
+def attach(root):
+    """Mede o atraso do laço de eventos de root (sem efeito com o perfil desligado)"""
+    if profiler is not None:
+        profiler.attach(root)
+
+def finish():
+    """Grava o relatório de fim de turno, se o perfil estiver ligado"""
+    if profiler is None:
+        return None
+    try:
+        file_path = profiler.write_report()
+    except OSError as e:
+        print(e)
+        return None
+    print(f"Relatório de perfil da interface: {file_path}")
+    return file_path
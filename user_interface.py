@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database import *
+from db_worker import DBExecutor
 
 class LoginWindow:
     def __init__(self, root, on_login_success):
@@ -39,6 +40,9 @@ class LoginWindow:
         # Bind Enter key to login
         self.root.bind('<Return>', lambda event: self.login())
         
+        # Verificação de credenciais fora da thread da interface
+        self.db = DBExecutor(self.root, max_workers=1)
+        
     def login(self):
         username = self.username_entry.get()
         password = self.password_entry.get()
@@ -47,16 +51,22 @@ class LoginWindow:
             messagebox.showerror("Erro", "Por favor, preencha todos os campos")
             return
         
-        conn = create_connection()
-        if conn is not None:
-            user = login_user(conn, username, password)
-            conn.close()
-            
-            if user:
-                self.root.destroy()
-                self.on_login_success(user)
-            else:
-                messagebox.showerror("Erro", "Usuário ou senha incorretos")
+        self.login_button.config(state=tk.DISABLED)
+        self.db.submit(login_user, username, password, callback=self.on_login_result,
+                       errback=self.on_login_error, key="login")
+    
+    def on_login_result(self, user):
+        if user:
+            self.db.shutdown()
+            self.root.destroy()
+            self.on_login_success(user)
+        else:
+            self.login_button.config(state=tk.NORMAL)
+            messagebox.showerror("Erro", "Usuário ou senha incorretos")
+    
+    def on_login_error(self, error):
+        self.login_button.config(state=tk.NORMAL)
+        messagebox.showerror("Erro", f"Não foi possível verificar o login: {error}")
 
 class UserManagementApp:
     def __init__(self, root, current_user):
@@ -70,9 +80,17 @@ class UserManagementApp:
         # Verificar se o usuário atual é admin
         self.is_admin = bool(current_user[5])  # is_admin está na posição 5
         
+        # Linhas exibidas ({id: valores}) e versão de alterações já refletida
+        self.users_on_screen = {}
+        self.users_version = None
+        
         # Criar widgets
         self.create_widgets()
         
+        # Consultas ao banco rodam fora da thread da interface
+        self.db = DBExecutor(self.root, indicator=self.loading_label)
+        self.root.bind('<Destroy>', self.on_destroy)
+        
         # Carregar dados
         self.load_users()
         
@@ -129,31 +147,61 @@ class UserManagementApp:
         self.status_label = ttk.Label(self.status_frame, text=f"Logado como: {self.current_user[3]} ({'Admin' if self.is_admin else 'Usuário'})")
         self.status_label.pack(side=tk.LEFT)
         
+        self.loading_label = ttk.Label(self.status_frame, text="")
+        self.loading_label.pack(side=tk.RIGHT)
+        
         # Desabilitar botões se não for admin
         if not self.is_admin:
             self.add_button.config(state=tk.DISABLED)
             self.edit_button.config(state=tk.DISABLED)
             self.delete_button.config(state=tk.DISABLED)
     
+    def format_user(self, user):
+        return (
+            user[0],  # ID
+            user[1],  # Username
+            user[3],  # Full Name
+            user[4],  # Email
+            "Sim" if user[5] else "Não"  # Admin
+        )
+    
+    def on_destroy(self, event):
+        if event.widget is self.root:
+            self.db.shutdown()
+    
     def load_users(self):
-        # Limpar treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Carregar usuários do banco de dados
-        conn = create_connection()
-        if conn is not None:
-            users = get_all_users(conn)
-            conn.close()
-            
-            for user in users:
-                self.tree.insert("", tk.END, values=(
-                    user[0],  # ID
-                    user[1],  # Username
-                    user[3],  # Full Name
-                    user[4],  # Email
-                    "Sim" if user[5] else "Não"  # Admin
-                ))
+        if self.users_version is None:
+            # Primeira carga: lê a versão antes dos dados para não perder alterações
+            self.db.submit(lambda conn: (get_change_version(conn, 'users'), get_all_users(conn)),
+                           callback=self.on_users_loaded, key="users")
+        else:
+            # Atualizações seguintes: só as linhas alteradas
+            self.db.submit(get_changes_since, 'users', self.users_version,
+                           callback=self.on_users_changed, key="users")
+    
+    def on_users_loaded(self, result):
+        self.users_version, users = result
+        for user in users:
+            values = self.format_user(user)
+            self.tree.insert("", tk.END, iid=str(user[0]), values=values)
+            self.users_on_screen[user[0]] = values
+    
+    def on_users_changed(self, result):
+        # Alterações pontuais no Treeview mantêm rolagem e seleção
+        self.users_version, changed, deleted = result
+        
+        for user_id in deleted:
+            if self.users_on_screen.pop(user_id, None) is not None:
+                self.tree.delete(str(user_id))
+        
+        for user in changed:
+            values = self.format_user(user)
+            current = self.users_on_screen.get(user[0])
+            if current is None:
+                self.tree.insert("", tk.END, iid=str(user[0]), values=values)
+            elif current != values:
+                self.tree.item(str(user[0]), values=values)
+            self.users_on_screen[user[0]] = values
     
     def show_add_user_dialog(self):
         dialog = tk.Toplevel(self.root)
@@ -215,17 +263,16 @@ class UserManagementApp:
             messagebox.showerror("Erro", "Por favor, preencha pelo menos usuário, senha e nome completo")
             return
         
-        conn = create_connection()
-        if conn is not None:
-            user_id = add_user(conn, username, password, full_name, email, is_admin)
-            conn.close()
-            
-            if user_id:
-                messagebox.showinfo("Sucesso", "Usuário adicionado com sucesso!")
-                dialog.destroy()
-                self.load_users()
-            else:
-                messagebox.showerror("Erro", "Não foi possível adicionar o usuário. O nome de usuário pode já estar em uso.")
+        self.db.submit(add_user, username, password, full_name, email, is_admin,
+                       callback=lambda user_id: self.on_user_added(dialog, user_id))
+    
+    def on_user_added(self, dialog, user_id):
+        if user_id:
+            messagebox.showinfo("Sucesso", "Usuário adicionado com sucesso!")
+            dialog.destroy()
+            self.load_users()
+        else:
+            messagebox.showerror("Erro", "Não foi possível adicionar o usuário. O nome de usuário pode já estar em uso.")
     
     def show_edit_user_dialog(self):
         selected_item = self.tree.selection()
@@ -235,86 +282,85 @@ class UserManagementApp:
         
         user_id = self.tree.item(selected_item[0], "values")[0]
         
-        conn = create_connection()
-        if conn is not None:
-            user = get_user_by_id(conn, user_id)
-            conn.close()
-            
-            if user:
-                dialog = tk.Toplevel(self.root)
-                dialog.title("Editar Usuário")
-                
-                # Centralizar a janela
-                window_width = 400
-                window_height = 300
-                screen_width = dialog.winfo_screenwidth()
-                screen_height = dialog.winfo_screenheight()
-                x = (screen_width - window_width) // 2
-                y = (screen_height - window_height) // 2
-                dialog.geometry(f"{window_width}x{window_height}+{x}+{y}")
-                
-                # Frame principal
-                frame = ttk.Frame(dialog, padding="10")
-                frame.pack(fill=tk.BOTH, expand=True)
-                
-                # Widgets
-                ttk.Label(frame, text="Usuário:").grid(row=0, column=0, sticky=tk.W, pady=5)
-                username_entry = ttk.Entry(frame)
-                username_entry.insert(0, user[1])
-                username_entry.grid(row=0, column=1, sticky=tk.EW, pady=5)
-                
-                ttk.Label(frame, text="Senha (deixe em branco para manter):").grid(row=1, column=0, sticky=tk.W, pady=5)
-                password_entry = ttk.Entry(frame, show="*")
-                password_entry.grid(row=1, column=1, sticky=tk.EW, pady=5)
-                
-                ttk.Label(frame, text="Nome Completo:").grid(row=2, column=0, sticky=tk.W, pady=5)
-                full_name_entry = ttk.Entry(frame)
-                full_name_entry.insert(0, user[3])
-                full_name_entry.grid(row=2, column=1, sticky=tk.EW, pady=5)
-                
-                ttk.Label(frame, text="E-mail:").grid(row=3, column=0, sticky=tk.W, pady=5)
-                email_entry = ttk.Entry(frame)
-                email_entry.insert(0, user[4])
-                email_entry.grid(row=3, column=1, sticky=tk.EW, pady=5)
-                
-                is_admin_var = tk.IntVar(value=user[5])
-                is_admin_check = ttk.Checkbutton(frame, text="Administrador", variable=is_admin_var)
-                is_admin_check.grid(row=4, column=1, sticky=tk.W, pady=5)
-                
-                button_frame = ttk.Frame(frame)
-                button_frame.grid(row=5, column=0, columnspan=2, pady=10)
-                
-                ttk.Button(button_frame, text="Salvar", command=lambda: self.update_user(
-                    dialog,
-                    user[0],
-                    username_entry.get(),
-                    password_entry.get() or user[2],  # Mantém a senha atual se não for alterada
-                    full_name_entry.get(),
-                    email_entry.get(),
-                    is_admin_var.get()
-                )).pack(side=tk.LEFT, padx=5)
-                
-                ttk.Button(button_frame, text="Cancelar", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
-                
-                # Configurar expansão das colunas
-                frame.columnconfigure(1, weight=1)
+        self.db.submit(get_user_by_id, user_id, callback=self.open_edit_user_dialog)
+    
+    def open_edit_user_dialog(self, user):
+        if not user:
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Editar Usuário")
+        
+        # Centralizar a janela
+        window_width = 400
+        window_height = 300
+        screen_width = dialog.winfo_screenwidth()
+        screen_height = dialog.winfo_screenheight()
+        x = (screen_width - window_width) // 2
+        y = (screen_height - window_height) // 2
+        dialog.geometry(f"{window_width}x{window_height}+{x}+{y}")
+        
+        # Frame principal
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Widgets
+        ttk.Label(frame, text="Usuário:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        username_entry = ttk.Entry(frame)
+        username_entry.insert(0, user[1])
+        username_entry.grid(row=0, column=1, sticky=tk.EW, pady=5)
+        
+        ttk.Label(frame, text="Senha (deixe em branco para manter):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        password_entry = ttk.Entry(frame, show="*")
+        password_entry.grid(row=1, column=1, sticky=tk.EW, pady=5)
+        
+        ttk.Label(frame, text="Nome Completo:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        full_name_entry = ttk.Entry(frame)
+        full_name_entry.insert(0, user[3])
+        full_name_entry.grid(row=2, column=1, sticky=tk.EW, pady=5)
+        
+        ttk.Label(frame, text="E-mail:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        email_entry = ttk.Entry(frame)
+        email_entry.insert(0, user[4])
+        email_entry.grid(row=3, column=1, sticky=tk.EW, pady=5)
+        
+        is_admin_var = tk.IntVar(value=user[5])
+        is_admin_check = ttk.Checkbutton(frame, text="Administrador", variable=is_admin_var)
+        is_admin_check.grid(row=4, column=1, sticky=tk.W, pady=5)
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.grid(row=5, column=0, columnspan=2, pady=10)
+        
+        ttk.Button(button_frame, text="Salvar", command=lambda: self.update_user(
+            dialog,
+            user[0],
+            username_entry.get(),
+            password_entry.get() or user[2],  # Mantém a senha atual se não for alterada
+            full_name_entry.get(),
+            email_entry.get(),
+            is_admin_var.get()
+        )).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(button_frame, text="Cancelar", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+        
+        # Configurar expansão das colunas
+        frame.columnconfigure(1, weight=1)
     
     def update_user(self, dialog, user_id, username, password, full_name, email, is_admin):
         if not username or not full_name:
             messagebox.showerror("Erro", "Por favor, preencha pelo menos usuário e nome completo")
             return
         
-        conn = create_connection()
-        if conn is not None:
-            success = update_user(conn, user_id, username, password, full_name, email, is_admin)
-            conn.close()
-            
-            if success:
-                messagebox.showinfo("Sucesso", "Usuário atualizado com sucesso!")
-                dialog.destroy()
-                self.load_users()
-            else:
-                messagebox.showerror("Erro", "Não foi possível atualizar o usuário. O nome de usuário pode já estar em uso.")
+        self.db.submit(update_user, user_id, username, password, full_name, email, is_admin,
+                       callback=lambda success: self.on_user_updated(dialog, success))
+    
+    def on_user_updated(self, dialog, success):
+        if success:
+            messagebox.showinfo("Sucesso", "Usuário atualizado com sucesso!")
+            dialog.destroy()
+            self.load_users()
+        else:
+            messagebox.showerror("Erro", "Não foi possível atualizar o usuário. O nome de usuário pode já estar em uso.")
     
     def delete_user(self):
         selected_item = self.tree.selection()
@@ -326,13 +372,11 @@ class UserManagementApp:
         username = self.tree.item(selected_item[0], "values")[1]
         
         if messagebox.askyesno("Confirmar", f"Tem certeza que deseja excluir o usuário '{username}'?"):
-            conn = create_connection()
-            if conn is not None:
-                success = delete_user(conn, user_id)
-                conn.close()
-                
-                if success:
-                    messagebox.showinfo("Sucesso", "Usuário excluído com sucesso!")
-                    self.load_users()
-                else:
-                    messagebox.showerror("Erro", "Não foi possível excluir o usuário")
\ No newline at end of file
+            self.db.submit(delete_user, user_id, callback=self.on_user_deleted)
+    
+    def on_user_deleted(self, success):
+        if success:
+            messagebox.showinfo("Sucesso", "Usuário excluído com sucesso!")
+            self.load_users()
+        else:
+            messagebox.showerror("Erro", "Não foi possível excluir o usuário")
\ No newline at end of file
@@ -0,0 +1,410 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from bisect import bisect_left, bisect_right
+from database import *
+
+class ProductPageSource:
+    """Fonte paginada de produtos: cada página é uma consulta por chave no banco
+
+    count e page recebem a conexão do pedido que está lendo a lista.
+    """
+
+    def __init__(self, format_row, in_stock_only=False):
+        self.format_row = format_row
+        self.in_stock_only = in_stock_only
+
+    def count(self, conn):
+        return count_products(conn, self.in_stock_only)
+
+    def page(self, conn, order_by, descending, limit, after=None, inclusive=False, offset=None):
+        return get_products_page(conn, order_by or 'id', descending, after, inclusive,
+                                 offset, limit, self.in_stock_only)
+
+    def key(self, row, order_by):
+        return (row[PRODUCT_COLUMN_INDEX[order_by or 'id']], row[0])
+
+    def values(self, row):
+        return self.format_row(row)
+
+class SalesPageSource:
+    """Fonte paginada do histórico de vendas, mais recentes primeiro, com filtros de get_sales_page"""
+
+    # Filtros que o resumo diário (sales_daily) consegue contar sem ler as vendas
+    DAILY_FILTERS = ('start_date', 'end_date')
+
+    def __init__(self, format_row, **filters):
+        self.format_row = format_row
+        self.filters = {name: value for name, value in filters.items() if value not in (None, "")}
+
+    def count(self, conn):
+        if all(name in self.DAILY_FILTERS for name in self.filters):
+            # Só período: soma um resumo por dia em vez de contar milhões de vendas
+            return get_revenue_between(conn, self.filters.get('start_date', '0000-01-01'),
+                                       self.filters.get('end_date', '9999-12-31'))[0]
+        return count_sales(conn, **self.filters)
+
+    def page(self, conn, order_by, descending, limit, after=None, inclusive=False, offset=None):
+        # A ordem "crescente" da lista é da venda mais recente para a mais antiga
+        return get_sales_page(conn, after, not descending, limit, inclusive, offset, **self.filters)
+
+    def key(self, row, order_by):
+        return (row[1], row[0])
+
+    def values(self, row):
+        return self.format_row(row)
+
+class ListSource:
+    """Fonte em memória (ex.: resultados de busca) com a mesma interface paginada
+
+    Sem ordenação explícita mantém a ordem original das linhas (relevância da busca).
+    As linhas já estão em memória: a conexão recebida por count e page não é usada.
+    """
+
+    def __init__(self, rows, format_row, column_index=PRODUCT_COLUMN_INDEX):
+        self.rows = list(rows)
+        self.format_row = format_row
+        self.column_index = column_index
+        self._position = {row[0]: index for index, row in enumerate(self.rows)}
+        self._sorted = {}
+
+    def count(self, conn):
+        return len(self.rows)
+
+    def key(self, row, order_by):
+        if order_by is None:
+            return (self._position.get(row[0], len(self.rows)), row[0])
+        return (row[self.column_index[order_by]], row[0])
+
+    def _ordered(self, order_by):
+        # Lista ordenada (crescente) e suas chaves, calculadas uma vez por coluna
+        if order_by not in self._sorted:
+            rows = sorted(self.rows, key=lambda row: self.key(row, order_by))
+            self._sorted[order_by] = (rows, [self.key(row, order_by) for row in rows])
+        return self._sorted[order_by]
+
+    def page(self, conn, order_by, descending, limit, after=None, inclusive=False, offset=None):
+        rows, keys = self._ordered(order_by)
+        if descending:
+            end = len(rows)
+            if after is not None:
+                end = bisect_right(keys, after) if inclusive else bisect_left(keys, after)
+            selected = rows[:end][::-1]
+        else:
+            start = 0
+            if after is not None:
+                start = bisect_left(keys, after) if inclusive else bisect_right(keys, after)
+            selected = rows[start:]
+        offset = offset or 0
+        return selected[offset:offset + limit]
+
+    def values(self, row):
+        return self.format_row(row)
+
+    def apply_changes(self, changed_rows, deleted_ids):
+        """Atualiza as linhas já listadas; linhas novas não entram em um resultado fixo"""
+        changed = {row[0]: row for row in changed_rows}
+        deleted = set(deleted_ids)
+        self.rows = [changed.get(row[0], row) for row in self.rows if row[0] not in deleted]
+        self._position = {row[0]: index for index, row in enumerate(self.rows)}
+        self._sorted = {}
+
+class VirtualTreeview(ttk.Frame):
+    """Treeview virtualizada: reaproveita um conjunto fixo de linhas e busca só a janela visível"""
+
+    def __init__(self, master, columns, source=None, sort_columns=None, executor=None, **tree_options):
+        super().__init__(master)
+        self.source = source
+        self.executor = executor                 # DBExecutor opcional para ler as páginas fora da thread do Tk
+        self.sort_columns = sort_columns or {}   # cabeçalho -> coluna de ordenação da fonte
+        self.order_by = None
+        self.descending = False
+
+        self._rows = []        # linhas atualmente visíveis
+        self._pool = []        # itens do Treeview reaproveitados a cada rolagem
+        self._offset = 0       # posição (aproximada) da primeira linha visível
+        self._total = 0
+        self._visible = tree_options.pop('height', 20)
+        self._selected_id = None
+        self._heading_text = {}
+        self._fetching = False
+        self._scroll_backlog = 0
+        self._select_edge = 0
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse",
+                                 height=self._visible, **tree_options)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        for heading in self.sort_columns:
+            self.tree.heading(heading, command=lambda h=heading: self.sort_by(h))
+
+        style = ttk.Style()
+        try:
+            self.row_height = int(style.lookup("Treeview", "rowheight") or 20)
+        except (tk.TclError, ValueError):
+            self.row_height = 20
+
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda event: self._scroll_event(-3))
+        self.tree.bind('<Button-5>', lambda event: self._scroll_event(3))
+        self.tree.bind('<Down>', lambda event: self._on_arrow(1))
+        self.tree.bind('<Up>', lambda event: self._on_arrow(-1))
+        self.tree.bind('<Next>', lambda event: self._scroll_event(self._visible))
+        self.tree.bind('<Prior>', lambda event: self._scroll_event(-self._visible))
+        self.tree.bind('<Home>', lambda event: self._moveto_event(0.0))
+        self.tree.bind('<End>', lambda event: self._moveto_event(1.0))
+
+    # Repasse para o Treeview interno (mantém a interface usada pelas telas)
+    def heading(self, column, option=None, **kw):
+        if 'text' in kw:
+            self._heading_text[column] = kw['text']
+        return self.tree.heading(column, option, **kw)
+
+    def column(self, column, option=None, **kw):
+        return self.tree.column(column, option, **kw)
+
+    def selection(self):
+        return self.tree.selection()
+
+    def item(self, item, option=None, **kw):
+        return self.tree.item(item, option, **kw)
+
+    def selected_row(self):
+        """Retorna a linha da fonte selecionada, se ainda estiver na janela visível"""
+        for row in self._rows:
+            if row[0] == self._selected_id:
+                return row
+        return None
+
+    def set_source(self, source):
+        """Troca a fonte de dados e volta ao início da lista"""
+        self.source = source
+        self.reload()
+
+    def reload(self):
+        """Recarrega a lista a partir do início"""
+        self._request('reload')
+
+    def refresh(self):
+        """Relê a janela visível mantendo a posição de rolagem e a seleção"""
+        self._request('refresh')
+
+    def apply_changes(self, changed_rows, deleted_ids):
+        """Aplica alterações pontuais; a janela só é relida se foi afetada por elas"""
+        if self.source is None:
+            return
+        if hasattr(self.source, 'apply_changes'):
+            self.source.apply_changes(changed_rows, deleted_ids)
+        
+        visible_ids = {row[0] for row in self._rows}
+        affected = len(self._rows) < self._visible or any(row_id in visible_ids for row_id in deleted_ids)
+        if not affected and self._rows:
+            first = self.source.key(self._rows[0], self.order_by)
+            last = self.source.key(self._rows[-1], self.order_by)
+            low, high = (last, first) if self.descending else (first, last)
+            for row in changed_rows:
+                # Linha visível alterada ou linha que passa a cair dentro da janela
+                if row[0] in visible_ids or low <= self.source.key(row, self.order_by) <= high:
+                    affected = True
+                    break
+        if affected:
+            self.refresh()
+
+    def scroll(self, count):
+        """Rola a lista count linhas (negativo para cima) usando paginação por chave"""
+        if count:
+            self._request('scroll', count)
+
+    def moveto(self, fraction):
+        """Salta para uma posição relativa da lista (barra de rolagem arrastada)"""
+        self._request('moveto', min(max(fraction, 0.0), 1.0))
+
+    def sort_by(self, heading):
+        """Ordena pela coluna do cabeçalho clicado (um segundo clique inverte a ordem)"""
+        column = self.sort_columns.get(heading)
+        if column is None:
+            return
+        if self.order_by == column:
+            self.descending = not self.descending
+        else:
+            self.order_by = column
+            self.descending = False
+
+        for name, text in self._heading_text.items():
+            if name in self.sort_columns:
+                arrow = (" ▼" if self.descending else " ▲") if name == heading else ""
+                self.tree.heading(name, text=text + arrow)
+        self.reload()
+
+    def _request(self, kind, arg=None):
+        if self.source is None:
+            self._apply(([], 0, 0))
+            return
+        if self.executor is None:
+            with pooled_connection() as conn:
+                self._apply(self._compute(conn, kind, arg, self._snapshot()))
+            return
+        if kind == 'scroll' and self._fetching:
+            # Rolagens feitas enquanto a página anterior ainda está sendo lida se acumulam
+            self._scroll_backlog += arg
+            return
+        
+        self._scroll_backlog = 0
+        self._fetching = True
+        snapshot = self._snapshot()
+        self.executor.submit(lambda conn: self._compute(conn, kind, arg, snapshot),
+                             callback=self._on_fetched, errback=self._on_fetch_error, key=str(self))
+
+    def _on_fetched(self, result):
+        self._fetching = False
+        self._apply(result)
+        if self._scroll_backlog:
+            count, self._scroll_backlog = self._scroll_backlog, 0
+            self._request('scroll', count)
+
+    def _on_fetch_error(self, error):
+        # Libera a lista para novas leituras; as rolagens acumuladas são descartadas
+        self._fetching = False
+        self._scroll_backlog = 0
+        self._select_edge = 0
+        messagebox.showerror("Erro", f"Não foi possível carregar a lista: {error}", parent=self)
+
+    def _snapshot(self):
+        return (self.source, self.order_by, self.descending, list(self._rows),
+                self._offset, self._total, self._visible)
+
+    def _compute(self, conn, kind, arg, state):
+        """Calcula a nova janela (linhas, posição, total) com a conexão conn; pode rodar fora da thread do Tk"""
+        source, order_by, descending, rows, offset, total, visible = state
+        
+        def page(limit, after=None, inclusive=False, offset=None, reverse=False):
+            return source.page(conn, order_by, descending != reverse, limit, after, inclusive, offset)
+        
+        def fill_backward(rows, offset):
+            # No fim da lista completa a janela com as linhas anteriores
+            missing = visible - len(rows)
+            if missing <= 0:
+                return rows, offset
+            if rows:
+                before = page(missing, after=source.key(rows[0], order_by), reverse=True)
+            else:
+                before = page(missing, reverse=True)
+            before.reverse()
+            return before + rows, max(total - len(before) - len(rows), 0)
+        
+        if kind == 'reload':
+            return page(visible), 0, source.count(conn)
+        
+        if kind == 'refresh':
+            total = source.count(conn)
+            if rows:
+                rows = page(visible, after=source.key(rows[0], order_by), inclusive=True)
+            else:
+                rows = page(visible, offset=offset)
+            rows, offset = fill_backward(rows, offset)
+            return rows, offset, total
+        
+        if kind == 'moveto':
+            offset = int(arg * max(total - visible, 0))
+            rows, offset = fill_backward(page(visible, offset=offset), offset)
+            return rows, offset, total
+        
+        # kind == 'scroll'
+        if not rows:
+            return rows, offset, total
+        if arg > 0:
+            new_rows = page(arg, after=source.key(rows[-1], order_by))
+            combined = rows + new_rows
+            dropped = max(len(combined) - visible, 0)
+            return combined[dropped:], offset + dropped, total
+        new_rows = page(-arg, after=source.key(rows[0], order_by), reverse=True)
+        new_rows.reverse()
+        return (new_rows + rows)[:visible], max(offset - len(new_rows), 0), total
+
+    def _apply(self, result):
+        self._rows, self._offset, self._total = result
+        if self._select_edge and self._rows:
+            # Seleção levada até a borda pelas setas do teclado
+            self._selected_id = self._rows[-1 if self._select_edge > 0 else 0][0]
+        self._select_edge = 0
+        self._render()
+
+    def _render(self):
+        # Ajusta o tamanho do pool e reaproveita os itens existentes
+        while len(self._pool) < self._visible:
+            self._pool.append(self.tree.insert("", tk.END, values=()))
+        while len(self._pool) > self._visible:
+            self.tree.delete(self._pool.pop())
+
+        selected_iid = None
+        for index, iid in enumerate(self._pool):
+            if index < len(self._rows):
+                row = self._rows[index]
+                self.tree.item(iid, values=self.source.values(row))
+                self.tree.move(iid, "", index)
+                if row[0] == self._selected_id:
+                    selected_iid = iid
+            else:
+                self.tree.detach(iid)
+
+        if selected_iid is not None:
+            if self.tree.selection() != (selected_iid,):
+                self.tree.selection_set(selected_iid)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        if self._total > 0:
+            first = self._offset / self._total
+            last = min((self._offset + len(self._rows)) / self._total, 1.0)
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
+
+    def _on_configure(self, event):
+        visible = max(int(event.height // self.row_height) - 1, 1)
+        if visible != self._visible:
+            self._visible = visible
+            self.refresh()
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self._pool:
+            index = self._pool.index(selection[0])
+            if index < len(self._rows):
+                self._selected_id = self._rows[index][0]
+
+    def _on_scrollbar(self, *args):
+        if args[0] == 'moveto':
+            self.moveto(float(args[1]))
+        elif args[0] == 'scroll':
+            count = int(args[1])
+            if args[2] == 'pages':
+                count *= self._visible
+            self.scroll(count)
+
+    def _on_mousewheel(self, event):
+        return self._scroll_event(-3 if event.delta > 0 else 3)
+
+    def _scroll_event(self, count):
+        self.scroll(count)
+        return "break"
+
+    def _moveto_event(self, fraction):
+        self.moveto(fraction)
+        return "break"
+
+    def _on_arrow(self, step):
+        # Nas bordas da janela a seta rola a lista em vez de perder a seleção
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self._pool:
+            return None
+        index = self._pool.index(selection[0])
+        at_edge = index == len(self._rows) - 1 if step > 0 else index == 0
+        if not at_edge:
+            return None
+        self._select_edge = step
+        self.scroll(step)
+        return "break"